@@ -1,11 +1,23 @@
 from app.entity.request_entity import PinRequestEntity
 
 class getAllRequestsController():
-    def get_all_requests(self):
+    def get_all_requests(self, filters: dict = None, page: int = None, page_size: int = None):
         entity = PinRequestEntity()  # Create an instance of RequestEntity
 
-        return entity.get_all_requests()  # Call the get_all_requests method of the entity and return the result
+        return entity.get_all_requests(filters, page, page_size)  # Call the get_all_requests method of the entity and return the result
+
+class getRequestFacetsController():
+    def get_request_facets(self, filters: dict):
+        entity = PinRequestEntity()  # Create an instance of RequestEntity
+
+        return entity.get_request_facets(filters)  # Call the get_request_facets method of the entity and return the result
     
+class getRequestChangesController():
+    def get_request_changes(self, since: str = None, scope: str = None, limit: int = None):
+        entity = PinRequestEntity()  # Create an instance of RequestEntity
+
+        return entity.get_request_changes(since, scope, limit)  # Call the get_request_changes method of the entity and return the result
+
 class updateRequestController():
     def update_request(self, request_id: int, body: dict):
         entity = PinRequestEntity()  # Create an instance of RequestEntity
@@ -16,4 +28,10 @@ class viewRequestController():
     def view_request(self, request_id: int):
         entity = PinRequestEntity()  # Create an instance of RequestEntity
 
-        return entity.view_request(request_id)  # Call the view_request method of the entity and return the result
\ No newline at end of file
+        return entity.view_request(request_id)  # Call the view_request method of the entity and return the result
+
+class batchAssignRequestsController():
+    def batch_assign_requests(self, body: dict):
+        entity = PinRequestEntity()  # Create an instance of RequestEntity
+
+        return entity.batch_assign_requests(body)  # Call the batch_assign_requests method of the entity and return the result
@@ -1,4 +1,5 @@
 from app.entity.request_entity import PinRequestEntity
+from app.entity.recommendation_entity import RecommendationEntity
 from typing import Optional
 
 class getCSRRequestAvailableController:
@@ -42,11 +43,23 @@ class removeShortlistCSRRequestController:
 
         return entity.remove_from_shortlist(request_id, csr_id) # Call the remove_from_shortlist method of the entity and return the result
     
+class bulkShortlistCSRRequestController:
+    def bulk_shortlist_csr_requests(self, request_info: dict):
+        entity = PinRequestEntity() # Create an instance of PinRequestEntity
+
+        return entity.bulk_shortlist_csr_requests(request_info) # Call the bulk_shortlist_csr_requests method of the entity and return the per-request results
+
+class bulkRemoveShortlistCSRRequestController:
+    def bulk_remove_from_shortlist(self, request_info: dict):
+        entity = PinRequestEntity() # Create an instance of PinRequestEntity
+
+        return entity.bulk_remove_from_shortlist(request_info) # Call the bulk_remove_from_shortlist method of the entity and return the per-request results
+    
 class incrementRequestViewController:
-    def increment_request_view(self, request_id: int):
+    def increment_request_view(self, request_id: int, viewer: str = None):
         entity = PinRequestEntity() # Create an instance of PinRequestEntity
 
-        return entity.increment_request_view(request_id) # Call the increment_request_view method of the entity and return the result
+        return entity.increment_request_view(request_id, viewer) # Call the increment_request_view method of the entity and return the result
     
 class getCSRRequestCompletedController:
     def get_csr_requests_completed(self):
@@ -58,4 +71,16 @@ class searchCSRRequestCompletedController:
     def search_csr_requests_completed(self, filter: dict):
         entity = PinRequestEntity() # Create an instance of PinRequestEntity
 
-        return entity.search_csr_requests_completed(filter) # Call the search_csr_requests_completed method of the entity and return the list of completed CSR requests
\ No newline at end of file
+        return entity.search_csr_requests_completed(filter) # Call the search_csr_requests_completed method of the entity and return the list of completed CSR requests
+
+class getTrendingRequestsController:
+    def get_trending_requests(self, limit: int = 20, category_id: int = None):
+        entity = PinRequestEntity() # Create an instance of PinRequestEntity
+
+        return entity.get_trending_requests(limit, category_id) # Call the get_trending_requests method of the entity and return the list of trending requests
+
+class getRecommendedRequestsController:
+    def get_recommended_requests(self, csr_user_id: int, limit: int = 10):
+        entity = RecommendationEntity() # Create an instance of RecommendationEntity
+
+        return entity.get_recommended_requests(csr_user_id, limit) # Call the get_recommended_requests method of the entity and return the list of recommended requests
@@ -0,0 +1,26 @@
+from app.entity.job_entity import JobEntity
+from app.utils.job_handlers import JOB_HANDLERS
+
+class submitJobController:
+    def submit_job(self, job_info: dict):
+        entity = JobEntity() # Create an instance of JobEntity
+
+        return entity.submit_job(job_info, JOB_HANDLERS) # Call the submit_job method of the entity and return the job handle
+
+class getJobController:
+    def get_job(self, job_id: int):
+        entity = JobEntity() # Create an instance of JobEntity
+
+        return entity.get_job(job_id) # Call the get_job method of the entity and return the job status
+
+class watchJobController:
+    def watch_job(self, job_id: int):
+        entity = JobEntity() # Create an instance of JobEntity
+
+        return entity.watch_job(job_id) # Call the watch_job method of the entity and return a generator of status updates
+
+class getJobResultController:
+    def get_job_result_path(self, job_id: int):
+        entity = JobEntity() # Create an instance of JobEntity
+
+        return entity.get_job_result_path(job_id) # Call the get_job_result_path method of the entity and return the path, None or str
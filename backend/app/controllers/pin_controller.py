@@ -1,4 +1,6 @@
 from app.entity.request_entity import PinRequestEntity
+from app.entity.viewerSketch_entity import ViewerSketchEntity
+from app.entity.requestSeries_entity import RequestSeriesEntity
 from typing import Optional
 
 class getPinRequestsController:
@@ -42,6 +44,18 @@ class getPinRequestViewsController:
 
         return entity.get_pin_request_views(request_id) # Call the get_pin_request_views method of the entity and return bool on success and str on failure
     
+class getUniqueViewersController:
+    def unique_viewers(self, scope: str, ids: list = None, start=None, end=None):
+        entity = ViewerSketchEntity() # Create an instance of ViewerSketchEntity
+
+        return entity.unique_viewers(scope, ids, start, end) # Call the unique_viewers method of the entity and return {id: distinct viewers} or str on failure
+
+class getRequestSeriesController:
+    def get_request_series(self, ids: str = None, pin_user_id: int = None, days: int = 30, end: str = None):
+        entity = RequestSeriesEntity() # Create an instance of RequestSeriesEntity
+
+        return entity.get_request_series(ids, pin_user_id, days, end) # Call the get_request_series method of the entity and return daily series or str on failure
+
 class getPinRequestShortlistsController:
     def get_pin_request_shortlists(self, request_id: int):
         entity = PinRequestEntity() # Create an instance of PinRequestShortlist
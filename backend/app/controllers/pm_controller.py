@@ -1,5 +1,6 @@
 from app.entity.category_entity import CategoryEntity
 from app.entity.request_entity import PinRequestEntity
+from app.entity.analytics_entity import AnalyticsEntity
 
 class createCategoryController:
     def create_category(self, category_info: dict):
@@ -33,22 +34,25 @@ class searchCategoryController:
         return entity.search_category(search_input) # Call the search_categories method of the entity and return the result
 
 class generateDailyReportController:
-    def generate_pm_daily_report(self):
+    def generate_pm_daily_report(self, day: str = None, page: int = 1, page_size: int = 100):
         entity = PinRequestEntity() # Create an instance of PinRequestEntity
 
-        return entity.generate_pm_daily_report() # Call the generate_daily_report method of the entity and return the result
+        return entity.generate_pm_daily_report(day, page, page_size) # Call the generate_daily_report method of the entity and return the result
     
 class generateWeeklyReportController:
-    def generate_pm_weekly_report(self):
+    def generate_pm_weekly_report(self, week: str = None, page: int = 1, page_size: int = 100):
         entity = PinRequestEntity() # Create an instance of PinRequestEntity
 
-        return entity.generate_pm_weekly_report() # Call the generate_weekly_report method of the entity and return the result
+        return entity.generate_pm_weekly_report(week, page, page_size) # Call the generate_weekly_report method of the entity and return the result
     
 class generateMonthlyReportController:
-    def generate_pm_monthly_report(self):
+    def generate_pm_monthly_report(self, month: str = None, page: int = 1, page_size: int = 100):
         entity = PinRequestEntity() # Create an instance of PinRequestEntity
 
-        return entity.generate_pm_monthly_report() # Call the generate_monthly_report method of the entity and return the result
-    
+        return entity.generate_pm_monthly_report(month, page, page_size) # Call the generate_monthly_report method of the entity and return the result
 
+class getAnalyticsController:
+    def query_analytics(self, params: dict):
+        entity = AnalyticsEntity() # Create an instance of AnalyticsEntity
 
+        return entity.query_analytics(params) # Call the query_analytics method of the entity and return the result
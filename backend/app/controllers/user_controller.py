@@ -1,5 +1,6 @@
 from app.entity.userAccount_entity import UserAccountEntity
 from app.entity.userProfiles_entity import UserProfilesEntity
+from app.utils.user_upload import iter_user_rows, chunked
 
 class getUserController:
     def get_all_users(self):
@@ -43,6 +44,54 @@ class searchUserController:
 
         return entity.search_users(search_input) # Call the search_users method of the entity and return the list of user objects
 
+class bulkCreateUserController:
+    def bulk_create_users(self, users: list):
+
+        entity = UserAccountEntity() # Create an instance of UserAccountEntity
+
+        return entity.bulk_create_users(users) # Call the bulk_create_users method of the entity and return the per-row report
+
+class uploadUsersController:
+    def upload_users(self, file, filename: str):
+
+        entity = UserAccountEntity() # Create an instance of UserAccountEntity
+
+        report = []
+        try:
+            for chunk in chunked(iter_user_rows(file, filename), 1000): # Validate and insert 1000 rows at a time
+                result = entity.bulk_create_users(chunk)
+                if isinstance(result, str):
+                    return result # Return str on failure
+
+                for entry in result:
+                    entry["row"] += len(report) # Row numbers relative to the whole file
+                report.extend(result)
+        except ValueError as e:
+            return f"Invalid upload: {str(e)}" # Return str on unreadable file
+
+        return report # Return the per-row report
+
+class bulkSuspendUserController:
+    def bulk_suspend_users(self, body: dict):
+
+        entity = UserAccountEntity() # Create an instance of UserAccountEntity
+
+        return entity.bulk_suspend_users(body) # Call the bulk_suspend_users method of the entity and return the report
+
+class bulkReactivateUserController:
+    def bulk_reactivate_users(self, body: dict):
+
+        entity = UserAccountEntity() # Create an instance of UserAccountEntity
+
+        return entity.bulk_reactivate_users(body) # Call the bulk_reactivate_users method of the entity and return the report
+
+class bulkChangeUserRoleController:
+    def bulk_change_user_role(self, body: dict):
+
+        entity = UserAccountEntity() # Create an instance of UserAccountEntity
+
+        return entity.bulk_change_user_role(body) # Call the bulk_change_user_role method of the entity and return the per-id report
+
 class getUserProfilesController:
     def get_user_profiles(self):
 
@@ -1,11 +1,14 @@
 # backend/app/database.py
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
 from dotenv import load_dotenv
 from pathlib import Path
 import os
 from contextlib import contextmanager
+from contextvars import ContextVar
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
 
 # Load the .env file
 env_path = Path(__file__).resolve().parent.parent / ".env"
@@ -13,8 +16,33 @@ load_dotenv(dotenv_path=env_path)
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Pool sizing (the API warms DB_WARM_CONNECTIONS of these at startup, see app/utils/warmup.py)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+# Driver: "psycopg2" (default) or "psycopg" (psycopg 3: server-side prepared statements + pipeline mode)
+DB_DRIVER = os.getenv("DB_DRIVER", "psycopg2")
+# psycopg 3 prepares a statement on the server once it has run this many times on a connection
+DB_PREPARE_THRESHOLD = int(os.getenv("DB_PREPARE_THRESHOLD", "5"))
+
+
+def make_engine(driver: str = None, **kwargs):
+    # Same DATABASE_URL for both drivers, only the dialect part changes
+    driver = driver or DB_DRIVER
+    url = make_url(DATABASE_URL).set(drivername=f"postgresql+{driver}")
+    connect_args = {"prepare_threshold": DB_PREPARE_THRESHOLD} if driver == "psycopg" else {}
+    return create_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        connect_args=connect_args,
+        **kwargs,
+    )
+
+
 # SQLAlchemy setup
-engine = create_engine(DATABASE_URL)
+engine = make_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -26,9 +54,118 @@ def get_db():
     finally:
         db.close()
 
-# --- For Entities (used outside FastAPI) ---
+# --- Unit of work: one session + one transaction per HTTP request ---
+# libpq transaction status after a failed statement (same value in psycopg2 and psycopg 3);
+# the server answers COMMIT on such a transaction with a silent ROLLBACK
+TRANSACTION_STATUS_INERROR = 3
+
+
+class UnitOfWorkSession(Session):
+    """Session shared by every entity call of one HTTP request.
+
+    commit() from entity code only flushes; the transaction is committed once
+    by finish() when the route returns, so the whole request is atomic.
+    rollback() from entity code (its error path) fails the unit of work: the
+    earlier calls' writes are already gone, so nothing else is committed either.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.active = True
+        self.failed = False
+
+    def commit(self):
+        if self.active:
+            self.flush() # Deferred, see finish()
+        else:
+            super().commit()
+
+    def rollback(self):
+        if self.active:
+            self.failed = True
+        super().rollback()
+
+    def aborted(self):
+        # A DB error an entity swallowed without rolling back leaves the transaction unusable
+        driver_connection = self.connection().connection.driver_connection
+        return driver_connection.info.transaction_status == TRANSACTION_STATUS_INERROR
+
+    def finish(self, success: bool):
+        """Commit or roll back the request's transaction; returns False if its work was not saved."""
+        self.active = False
+        try:
+            transaction = self.get_transaction()
+            if transaction is None:
+                return success and not self.failed # Nothing left to commit
+            if success and not self.failed and transaction.is_active and not self.aborted():
+                super().commit()
+                return True
+            super().rollback() # Route failed, or an entity call already gave up on the transaction
+            return False
+        finally:
+            self.close()
+
+
+UnitOfWorkLocal = sessionmaker(class_=UnitOfWorkSession, autocommit=False, autoflush=False, bind=engine)
+request_session = ContextVar("request_session", default=None)
+
+
+class UnitOfWorkRoute(APIRoute):
+    """Route class that wraps each request in one UnitOfWorkSession.
+
+    The session ends when the route handler returns, before a streamed body
+    is produced, so streaming endpoints fall back to short-lived sessions.
+    A unit of work that was rolled back is answered with status 500.
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def unit_of_work_handler(request):
+            db = UnitOfWorkLocal()
+            token = request_session.set(db) # Copied into the threadpool that runs sync endpoints
+            try:
+                response = await handler(request)
+            except Exception:
+                await run_in_threadpool(db.finish, False)
+                raise
+            finally:
+                request_session.reset(token)
+
+            committed = await run_in_threadpool(db.finish, response.status_code < 500)
+            if not committed and response.status_code < 500:
+                response.status_code = 500 # Keep the entity's error message, but don't report success
+            return response
+
+        return unit_of_work_handler
+
+
+# --- Pipeline mode (psycopg 3) ---
+@contextmanager
+def pipeline(db):
+    """Send the statements of the block to the server without waiting for each reply.
+
+    Only for statements whose results are not read inside the block (plain
+    INSERT/UPDATE without RETURNING); the replies are collected when it exits.
+    With psycopg2 this is a no-op and statements run one round trip each.
+    """
+    if db.get_bind().dialect.driver != "psycopg":
+        yield db
+        return
+
+    driver_connection = db.connection().connection.driver_connection
+    with driver_connection.pipeline():
+        yield db
+
+
+# --- For Entities (used inside and outside FastAPI) ---
 @contextmanager
 def get_db_session():
+    shared = request_session.get()
+    if shared is not None and shared.active:
+        yield shared # Inside an HTTP request: reuse its session, UnitOfWorkRoute commits and closes it
+        return
+
     db = SessionLocal()
     try:
         yield db
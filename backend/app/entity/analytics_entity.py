@@ -0,0 +1,189 @@
+from app.database import engine
+from app.models.models import Request, ArchivedRequest, Category, request_shortlists, request_shortlists_archive
+from sqlalchemy import select, union_all, func, cast, literal, Float
+from datetime import date, datetime, timezone
+from pathlib import Path
+import json
+import os
+import shutil
+
+# Columnar snapshots of requests / shortlists / categories, one directory per export;
+# CURRENT names the newest complete one, so readers never see a half-written snapshot
+ANALYTICS_DIR = Path(os.getenv("ANALYTICS_DIR", Path(__file__).resolve().parents[2] / "analytics"))
+ANALYTICS_KEEP_SNAPSHOTS = int(os.getenv("ANALYTICS_KEEP_SNAPSHOTS", "2"))
+ANALYTICS_MAX_ROWS = int(os.getenv("ANALYTICS_MAX_ROWS", "10000")) # Result rows returned per query
+EXPORT_CHUNK = 50000 # Rows per Parquet row group
+
+# Filters accepted by the endpoint: name -> (value type, datasets it applies to)
+ANALYTICS_FILTERS = {
+    "status": (str, ("requests", "shortlists")),
+    "category_id": (int, ("requests", "shortlists")),
+    "pin_user_id": (int, ("requests", "shortlists")),
+    "assigned_to": (int, ("requests",)),
+    "csr_user_id": (int, ("shortlists",)),
+    "archived": (lambda v: v.lower() in ("1", "true", "yes"), ("requests", "shortlists")),
+}
+
+
+def export_queries():
+    # dataset -> one statement over live and archived rows, columns in SCHEMAS order
+    def request_rows(model, archived):
+        return (
+            select(
+                model.id,
+                model.pin_user_id,
+                model.category_id,
+                func.coalesce(Category.name, "Misc").label("category"),
+                model.status,
+                model.assigned_to,
+                model.created_at,
+                model.completed_at,
+                cast(func.extract("epoch", model.completed_at - model.created_at) / 86400.0, Float).label("completion_days"),
+                model.view,
+                model.shortlist_count,
+                literal(archived).label("archived"),
+            )
+            .outerjoin(Category, model.category_id == Category.id)
+        )
+
+    def shortlist_rows(table, model, archived):
+        return (
+            select(
+                table.c.csr_user_id,
+                table.c.request_id,
+                model.pin_user_id,
+                model.category_id,
+                func.coalesce(Category.name, "Misc").label("category"),
+                model.status,
+                model.created_at,
+                model.completed_at,
+                literal(archived).label("archived"),
+            )
+            .join(model, model.id == table.c.request_id)
+            .outerjoin(Category, model.category_id == Category.id)
+        )
+
+    return {
+        "requests": union_all(request_rows(Request, False), request_rows(ArchivedRequest, True)),
+        "shortlists": union_all(
+            shortlist_rows(request_shortlists, Request, False),
+            shortlist_rows(request_shortlists_archive, ArchivedRequest, True),
+        ),
+        "categories": select(Category.id, Category.name),
+    }
+
+
+def current_snapshot():
+    # (directory, manifest) of the newest complete snapshot, or None before the first export
+    try:
+        name = (ANALYTICS_DIR / "CURRENT").read_text().strip()
+        path = ANALYTICS_DIR / name
+        return path, json.loads((path / "manifest.json").read_text())
+    except FileNotFoundError:
+        return None
+
+
+def parse_list(value):
+    if value is None or isinstance(value, list):
+        return value or []
+    return [v.strip() for v in str(value).split(",") if v.strip()]
+
+
+class AnalyticsEntity:
+    def export_snapshot(self):
+        # pyarrow is only needed by analytics, so the rest of the API never imports it
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        from app.utils.analytics import SCHEMAS
+
+        taken_at = datetime.now(timezone.utc)
+        name = taken_at.strftime("snapshot_%Y%m%dT%H%M%SZ")
+        staging = ANALYTICS_DIR / f"{name}.tmp"
+
+        try:
+            staging.mkdir(parents=True, exist_ok=True)
+            counts = {}
+            # One REPEATABLE READ transaction: the three files describe the same moment
+            with engine.connect().execution_options(isolation_level="REPEATABLE READ") as conn:
+                for dataset, query in export_queries().items():
+                    schema = SCHEMAS[dataset]
+                    counts[dataset] = 0
+                    with pq.ParquetWriter(staging / f"{dataset}.parquet", schema, compression="zstd") as writer:
+                        result = conn.execute(query.execution_options(stream_results=True, yield_per=EXPORT_CHUNK))
+                        for chunk in result.mappings().partitions():
+                            writer.write_table(pa.Table.from_pylist([dict(row) for row in chunk], schema=schema))
+                            counts[dataset] += len(chunk)
+
+            manifest = {"snapshot": name, "taken_at": taken_at.isoformat(), "rows": counts}
+            (staging / "manifest.json").write_text(json.dumps(manifest))
+            staging.rename(ANALYTICS_DIR / name)
+
+            # Switch readers over atomically, then drop old snapshots
+            (ANALYTICS_DIR / "CURRENT.tmp").write_text(name)
+            os.replace(ANALYTICS_DIR / "CURRENT.tmp", ANALYTICS_DIR / "CURRENT")
+            snapshots = sorted(p for p in ANALYTICS_DIR.glob("snapshot_*") if p.is_dir() and p.suffix != ".tmp")
+            for old in snapshots[:-ANALYTICS_KEEP_SNAPSHOTS]:
+                shutil.rmtree(old, ignore_errors=True)
+
+            return manifest # Return snapshot name, time and row counts
+
+        except Exception as e:
+            shutil.rmtree(staging, ignore_errors=True)
+            print(f"[ERROR] export_snapshot failed: {e}")
+            return f"Failed to export analytics snapshot: {str(e)}"
+
+    def query_analytics(self, params: dict):
+        snapshot = current_snapshot()
+        if snapshot is None:
+            return "No analytics snapshot yet, run the export_analytics job first"
+        path, manifest = snapshot
+
+        from app.utils.analytics import aggregate, DIMENSIONS, METRICS, TIME_FIELDS, BUCKETS
+
+        # --- Validate against the whitelists; nothing from the query string reaches a column name unchecked ---
+        dataset = params.get("dataset") or "requests"
+        if dataset not in DIMENSIONS:
+            return f"Unknown dataset '{dataset}', use one of {', '.join(DIMENSIONS)}"
+        group_by = parse_list(params.get("group_by"))
+        unknown = [g for g in group_by if g not in DIMENSIONS[dataset]]
+        if unknown:
+            return f"Cannot group {dataset} by {', '.join(unknown)}; use {', '.join(DIMENSIONS[dataset])}"
+        metrics = parse_list(params.get("metrics")) or ["count"]
+        unknown = [m for m in metrics if m not in METRICS[dataset]]
+        if unknown:
+            return f"Unknown metrics {', '.join(unknown)} for {dataset}; use {', '.join(METRICS[dataset])}"
+        time_field = params.get("time_field") or "created_at"
+        bucket = params.get("bucket") or None
+        if time_field not in TIME_FIELDS:
+            return f"time_field must be one of {', '.join(TIME_FIELDS)}"
+        if bucket and bucket not in BUCKETS:
+            return f"bucket must be one of {', '.join(BUCKETS)}"
+
+        try:
+            filters = {}
+            for name, (convert, datasets) in ANALYTICS_FILTERS.items():
+                values = parse_list(params.get(name))
+                if values and dataset in datasets:
+                    filters[name] = [convert(v) for v in values]
+            start, end = (
+                datetime.combine(date.fromisoformat(params[key]), datetime.min.time(), tzinfo=timezone.utc)
+                if params.get(key) else None
+                for key in ("start", "end")
+            )
+        except ValueError:
+            return "Invalid filter value or date, expected ids like 1,2 and dates as YYYY-MM-DD"
+
+        try:
+            rows = aggregate(str(path / f"{dataset}.parquet"), dataset, group_by, metrics, filters, time_field, bucket, start, end)
+            return {
+                "snapshot": manifest,
+                "dataset": dataset,
+                "group_by": (["bucket"] if bucket else []) + group_by,
+                "metrics": metrics,
+                "rows": rows[:ANALYTICS_MAX_ROWS],
+                "truncated": len(rows) > ANALYTICS_MAX_ROWS,
+            } # Return aggregated rows from the snapshot
+
+        except Exception as e:
+            print(f"[ERROR] query_analytics failed: {e}")
+            return f"Failed to run analytics query: {str(e)}"
@@ -0,0 +1,112 @@
+from app.database import get_db_session
+from app.models.models import Request, ArchivedRequest, request_shortlists, request_shortlists_archive
+from sqlalchemy import select, delete, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from datetime import datetime, timedelta, timezone
+import os
+import time
+
+# Completed requests older than this are moved to requests_archive
+ARCHIVE_RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS", "180"))
+
+
+def archive_horizon():
+    # Anything completed after this point is guaranteed to still be in `requests`
+    return datetime.now(timezone.utc) - timedelta(days=ARCHIVE_RETENTION_DAYS)
+
+
+def month_start(dt: datetime):
+    return dt.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(dt: datetime):
+    return dt.replace(year=dt.year + 1, month=1) if dt.month == 12 else dt.replace(month=dt.month + 1)
+
+
+class RequestArchiveEntity:
+    def ensure_partitions(self, db, start: datetime, end: datetime):
+        # Create one requests_archive partition per month between start and end (inclusive)
+        month = month_start(start)
+        created = []
+        while month <= end:
+            upper = next_month(month)
+            name = f"requests_archive_y{month.year}m{month.month:02d}"
+            db.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF requests_archive "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+            )) # Indexes declared on requests_archive are created on the partition automatically
+            created.append(name)
+            month = upper
+        return created
+
+    def archive_completed_requests(self, batch_size: int = 1000, max_batches: int = None, pause: float = 0.1):
+        cutoff = archive_horizon()
+        eligible = (Request.status == "completed", Request.completed_at < cutoff)
+
+        try:
+            with get_db_session() as db:
+                first, last = db.execute(
+                    select(func.min(Request.created_at), func.max(Request.created_at)).where(*eligible)
+                ).one()
+                if first is None:
+                    return {"archived": 0, "batches": 0, "cutoff": cutoff.isoformat()} # Nothing to move
+
+                self.ensure_partitions(db, first, last)
+                db.commit() # Partitions must exist before rows are moved
+
+            columns = [c.name for c in Request.__table__.columns]
+            archived = 0
+            batches = 0
+
+            while max_batches is None or batches < max_batches:
+                with get_db_session() as db:
+                    # Lock one bounded batch; rows being edited by users are skipped, not waited on
+                    batch = (
+                        select(Request.id)
+                        .where(*eligible, Request.created_at <= last)
+                        .order_by(Request.completed_at)
+                        .limit(batch_size)
+                        .with_for_update(skip_locked=True)
+                        .cte("batch")
+                    )
+
+                    # Copy the shortlists before the delete cascades them away
+                    moved_shortlists = (
+                        pg_insert(request_shortlists_archive)
+                        .from_select(
+                            ["csr_user_id", "request_id"],
+                            select(request_shortlists.c.csr_user_id, request_shortlists.c.request_id)
+                            .where(request_shortlists.c.request_id.in_(select(batch.c.id))),
+                        )
+                        .on_conflict_do_nothing()
+                        .returning(request_shortlists_archive.c.request_id)
+                        .cte("moved_shortlists")
+                    )
+
+                    moved = (
+                        delete(Request.__table__)
+                        .where(Request.__table__.c.id.in_(select(batch.c.id)))
+                        .returning(*Request.__table__.c)
+                        .cte("moved")
+                    )
+
+                    # Delete + insert in one statement, so each batch is a short transaction
+                    rows = db.execute(
+                        pg_insert(ArchivedRequest.__table__)
+                        .from_select(columns, select(*[moved.c[name] for name in columns]))
+                        .returning(ArchivedRequest.__table__.c.id)
+                        .add_cte(moved_shortlists)
+                    ).all()
+                    db.commit() # Commit the batch, releases its row locks
+
+                archived += len(rows)
+                batches += 1
+                if len(rows) < batch_size:
+                    break
+                time.sleep(pause) # Give regular traffic room between batches
+
+            return {"archived": archived, "batches": batches, "cutoff": cutoff.isoformat()} # Return job summary
+
+        except Exception as e:
+            print(f"Error archiving completed requests: {e}")
+            return f"Failed to archive requests: {str(e)}" # Return str on failure
@@ -1,7 +1,12 @@
 from app.database import get_db_session
 from app.models.models import Category, Request
+from app.utils.cache import evict_on_commit, evict_prefixes_on_commit, REQUEST_PREFIXES, CSR_COMPLETED_KEY
+from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
 
+# Hot statement, compiled once per process (see app/utils/warmup.py)
+CATEGORIES_STMT = select(Category).order_by(Category.id)
+
 class CategoryEntity:
     def create_category(self, category_info: dict):
         try:
@@ -51,6 +56,8 @@ class CategoryEntity:
                     return "Another category with this name already exists" # Return str if duplicate found
 
                 category.name = new_name # Update the category name
+                evict_prefixes_on_commit(db, *REQUEST_PREFIXES) # Cached requests carry the category name
+                evict_on_commit(db, CSR_COMPLETED_KEY)
                 db.commit() # Commit the changes
                 db.refresh(category) # Refresh the instance
 
@@ -76,6 +83,8 @@ class CategoryEntity:
                     req.category_id = None
 
                 db.delete(category) # Delete the category
+                evict_prefixes_on_commit(db, *REQUEST_PREFIXES) # Cached requests carry the category name
+                evict_on_commit(db, CSR_COMPLETED_KEY)
                 db.commit() # Commit the changes
 
                 return True  # Success
@@ -90,7 +99,7 @@ class CategoryEntity:
     def get_category(self):
         try:
             with get_db_session() as db:
-                categories = db.query(Category).order_by(Category.id).all() # Fetch all categories
+                categories = db.execute(CATEGORIES_STMT).scalars().all() # Fetch all categories
 
                 return [
                     {
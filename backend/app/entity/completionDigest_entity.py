@@ -0,0 +1,114 @@
+from app.database import get_db_session
+from app.models.models import CompletionDigest, Category, Request, ArchivedRequest
+from app.utils.tdigest import TDigest
+from sqlalchemy import select, update, delete, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from datetime import date, datetime, time, timezone
+
+REPORT_PERCENTILES = (50, 90, 99)
+REBUILD_CHUNK = 5000
+
+
+def completion_days(created_at: datetime, completed_at: datetime):
+    return max((completed_at - created_at).total_seconds(), 0) / 86400.0
+
+
+def percentiles(digest: TDigest):
+    # Report block: count and p50/p90/p99 completion time in days
+    count = int(digest.count)
+    return {
+        "count": count,
+        **{f"p{p}": round(digest.quantile(p / 100), 2) if count else 0 for p in REPORT_PERCENTILES},
+    }
+
+
+class CompletionDigestEntity:
+    def record_completion(self, db, category_id: int, created_at: datetime, completed_at: datetime):
+        # Runs inside the caller's transaction, so the digest commits (or rolls back) with the completion
+        key = {"category_id": category_id or 0, "day": completed_at.astimezone(timezone.utc).date()}
+        point = TDigest().add(completion_days(created_at, completed_at))
+
+        inserted = db.execute(
+            pg_insert(CompletionDigest)
+            .values(**key, digest=point.to_bytes())
+            .on_conflict_do_nothing()
+            .returning(CompletionDigest.day)
+        ).first()
+        if inserted:
+            return
+
+        # Completions are rare, so merging under a short row lock is fine
+        stored = db.execute(
+            select(CompletionDigest.digest)
+            .where(CompletionDigest.category_id == key["category_id"], CompletionDigest.day == key["day"])
+            .with_for_update()
+        ).scalar_one()
+        db.execute(
+            update(CompletionDigest)
+            .where(CompletionDigest.category_id == key["category_id"], CompletionDigest.day == key["day"])
+            .values(digest=TDigest(stored).merge(point).to_bytes())
+        )
+
+    def rebuild_digests(self, since: date = None):
+        # Recompute the digests of every day from `since` (default: all history) from live and archived rows
+        try:
+            since = date.fromisoformat(since) if isinstance(since, str) else since
+        except ValueError:
+            return "Invalid date, expected YYYY-MM-DD"
+
+        try:
+            with get_db_session() as db:
+                digests = {}
+                for model in (Request, ArchivedRequest):
+                    query = (
+                        select(model.category_id, model.created_at, model.completed_at)
+                        .where(model.status == "completed", model.completed_at.isnot(None))
+                        .execution_options(yield_per=REBUILD_CHUNK)
+                    )
+                    if since:
+                        query = query.where(model.completed_at >= datetime.combine(since, time.min, tzinfo=timezone.utc))
+                    for category_id, created_at, completed_at in db.execute(query):
+                        key = (category_id or 0, completed_at.astimezone(timezone.utc).date())
+                        digests.setdefault(key, TDigest()).add(completion_days(created_at, completed_at))
+
+                stale = delete(CompletionDigest)
+                if since:
+                    stale = stale.where(CompletionDigest.day >= since)
+                db.execute(stale)
+
+                rows = [
+                    {"category_id": category_id, "day": day, "digest": digest.to_bytes()}
+                    for (category_id, day), digest in digests.items()
+                ]
+                for start in range(0, len(rows), REBUILD_CHUNK):
+                    db.execute(insert(CompletionDigest), rows[start:start + REBUILD_CHUNK])
+                db.commit()
+
+                return {"digests": len(rows), "completions": int(sum(d.count for d in digests.values()))} # Return rebuild summary
+
+        except Exception as e:
+            print(f"[ERROR] rebuild_digests failed: {e}")
+            return f"Failed to rebuild completion digests: {str(e)}"
+
+    def report_percentiles(self, db, start: date, end: date):
+        # Report block: completion-time percentiles overall and per category name for completions in [start, end)
+        rows = db.execute(
+            select(CompletionDigest.category_id, CompletionDigest.digest)
+            .where(CompletionDigest.day >= start, CompletionDigest.day < end)
+        ).all()
+
+        overall = TDigest()
+        per_category = {}
+        for category_id, digest in rows:
+            digest = TDigest(digest)
+            overall.merge(digest)
+            per_category.setdefault(category_id, TDigest()).merge(digest)
+
+        names = dict(db.execute(select(Category.id, Category.name).where(Category.id.in_(list(per_category)))).all())
+        return {
+            "overall": percentiles(overall),
+            "by_category": {
+                names.get(category_id, "Uncategorized"): percentiles(digest)
+                for category_id, digest in per_category.items()
+            },
+        }
@@ -0,0 +1,167 @@
+from app.database import get_db_session
+from app.models.models import Job
+from sqlalchemy import select, update, or_, and_, func
+from datetime import datetime, timedelta, timezone
+from fastapi.encoders import jsonable_encoder
+import time
+
+JOB_TIMEOUT = timedelta(minutes=15) # A running job older than this is assumed to have lost its worker
+RETRY_BASE_SECONDS = 5 # Backoff: 5s, 10s, 20s, ...
+
+class JobEntity:
+    def submit_job(self, job_info: dict, job_types):
+        job_type = job_info.get("job_type")
+        if job_type not in job_types:
+            return f"Unknown job type '{job_type}'" # Return str on invalid type
+
+        with get_db_session() as db:
+            try:
+                job = Job(
+                    job_type=job_type,
+                    payload=job_info.get("payload") or {},
+                    max_attempts=int(job_info.get("max_attempts", 3)),
+                ) # Create new Job instance
+                db.add(job)
+                db.commit() # Commit the changes
+                db.refresh(job)
+                return {"id": job.id, "status": job.status} # Return the new job handle
+            except Exception as e:
+                db.rollback()
+                print(f"Error submitting job: {e}")
+                return f"Failed to submit job: {str(e)}" # Return str on failure
+
+    def get_job(self, job_id: int):
+        with get_db_session() as db:
+            job = db.query(Job).filter(Job.id == job_id).first()
+            if not job:
+                return "Job not found" # Return str if job does not exist
+
+            return {
+                "id": job.id,
+                "job_type": job.job_type,
+                "status": job.status,
+                "progress": job.progress,
+                "attempts": job.attempts,
+                "error": job.error,
+                "has_file": job.result_path is not None,
+                "result": job.result,
+                "created_at": job.created_at,
+                "updated_at": job.updated_at,
+                "finished_at": job.finished_at,
+            } # Return job status
+
+    def get_job_result_path(self, job_id: int):
+        with get_db_session() as db:
+            job = db.query(Job).filter(Job.id == job_id).first()
+            if not job:
+                return "Job not found"
+            if job.status != "succeeded":
+                return f"Job is {job.status}"
+            return job.result_path # Return path (or None when the result is stored inline)
+
+    def watch_job(self, job_id: int, interval: float = 1.0, timeout: float = 600):
+        # Yield the job status whenever it changes, until it finishes
+        last = None
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            job = self.get_job(job_id)
+            if isinstance(job, str):
+                yield {"error": job}
+                return
+
+            snapshot = (job["status"], job["progress"], job["attempts"])
+            if snapshot != last:
+                last = snapshot
+                yield jsonable_encoder(job)
+
+            if job["status"] in ("succeeded", "failed"):
+                return
+            time.sleep(interval)
+
+    def claim_job(self, worker_id: str):
+        with get_db_session() as db:
+            now = func.now()
+            stale = and_(Job.status == "running", Job.locked_at < now - JOB_TIMEOUT)
+
+            # A job that outlived its worker on its last attempt is given up, not retried forever
+            db.execute(
+                update(Job)
+                .where(stale, Job.attempts >= Job.max_attempts)
+                .values(status="failed", error="Timed out", locked_by=None, finished_at=now)
+                .execution_options(synchronize_session=False)
+            )
+
+            # Oldest runnable job, plus jobs whose worker died mid-run and have attempts left
+            candidate = (
+                select(Job.id)
+                .where(
+                    or_(
+                        and_(Job.status == "queued", Job.run_at <= now),
+                        and_(stale, Job.attempts < Job.max_attempts),
+                    )
+                )
+                .order_by(Job.run_at)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+
+            row = db.execute(
+                update(Job)
+                .where(Job.id == candidate)
+                .values(status="running", locked_by=worker_id, locked_at=now, attempts=Job.attempts + 1)
+                .returning(Job.id, Job.job_type, Job.payload, Job.attempts, Job.locked_by)
+                .execution_options(synchronize_session=False)
+            ).first()
+            db.commit() # Commit the claim
+
+            return dict(row._mapping) if row else None # Return claimed job or None
+
+    # Progress, completion and failure only apply while this worker still holds the job;
+    # a run that was timed out and reclaimed must not overwrite the newer run
+
+    def update_progress(self, job_id: int, worker_id: str, progress: int):
+        with get_db_session() as db:
+            db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.locked_by == worker_id)
+                .values(progress=max(0, min(100, int(progress))))
+            )
+            db.commit()
+
+    def complete_job(self, job_id: int, worker_id: str, result=None, result_path: str = None):
+        with get_db_session() as db:
+            done = db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.locked_by == worker_id)
+                .values(
+                    status="succeeded",
+                    progress=100,
+                    result=jsonable_encoder(result),
+                    result_path=result_path,
+                    error=None,
+                    locked_by=None,
+                    finished_at=func.now(),
+                )
+                .returning(Job.id)
+            ).first()
+            db.commit()
+            return done is not None # False when the job was reclaimed by another worker
+
+    def fail_job(self, job_id: int, worker_id: str, error: str):
+        with get_db_session() as db:
+            job = db.query(Job).filter(Job.id == job_id, Job.locked_by == worker_id).with_for_update().first()
+            if not job:
+                return False # Reclaimed by another worker, or gone
+
+            job.error = error
+            job.locked_by = None
+            if job.attempts < job.max_attempts:
+                # Retry later with exponential backoff
+                job.status = "queued"
+                job.run_at = datetime.now(timezone.utc) + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (job.attempts - 1))
+            else:
+                job.status = "failed"
+                job.finished_at = datetime.now(timezone.utc)
+            db.commit()
+            return True
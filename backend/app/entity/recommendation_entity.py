@@ -0,0 +1,229 @@
+from app.database import get_db_session
+from app.entity.request_entity import xid_horizon
+from app.models.models import (
+    CsrRecommendation, RecommendationRun, Request, ArchivedRequest, RequestEvent, CSR, Category,
+    request_shortlists, request_shortlists_archive,
+)
+from sqlalchemy import select, delete, insert, func, exists, union_all, bindparam, Integer
+import math
+import os
+
+RECOMMEND_TOP_K = int(os.getenv("RECOMMEND_TOP_K", "20")) # Stored per CSR
+INSERT_CHUNK = 5000
+
+# Serving path: one PK range read on csr_recommendations, joined to the still-pending requests
+RECOMMENDED_STMT = (
+    select(
+        Request.id,
+        Request.pin_user_id,
+        Request.title,
+        Request.description,
+        Request.status,
+        func.coalesce(Category.name, "Misc").label("category_name"),
+        Request.created_at,
+        Request.view,
+        Request.shortlist_count.label("shortlistees_count"),
+        CsrRecommendation.rank,
+        CsrRecommendation.score,
+    )
+    .join(Request, Request.id == CsrRecommendation.request_id)
+    .outerjoin(Category, Request.category_id == Category.id)
+    .where(
+        CsrRecommendation.csr_user_id == bindparam("csr_user_id", type_=Integer),
+        Request.status == "pending",
+        ~exists().where(
+            request_shortlists.c.request_id == Request.id,
+            request_shortlists.c.csr_user_id == CsrRecommendation.csr_user_id,
+        ), # Shortlisted since the last refresh
+    )
+    .order_by(CsrRecommendation.rank)
+)
+
+
+def history_rows(db, shortlist_weight: float, assignment_weight: float):
+    # (csr_user_id, category_id, weight) per pair from live and archived shortlists and assignments
+    live_category = func.coalesce(Request.category_id, 0)
+    archived_category = func.coalesce(ArchivedRequest.category_id, 0)
+    parts = [
+        select(request_shortlists.c.csr_user_id, live_category, func.count() * shortlist_weight)
+        .join(Request, Request.id == request_shortlists.c.request_id)
+        .group_by(request_shortlists.c.csr_user_id, live_category),
+        select(request_shortlists_archive.c.csr_user_id, archived_category, func.count() * shortlist_weight)
+        .join(ArchivedRequest, ArchivedRequest.id == request_shortlists_archive.c.request_id)
+        .group_by(request_shortlists_archive.c.csr_user_id, archived_category),
+        select(Request.assigned_to, live_category, func.count() * assignment_weight)
+        .where(Request.assigned_to.isnot(None))
+        .group_by(Request.assigned_to, live_category),
+        select(ArchivedRequest.assigned_to, archived_category, func.count() * assignment_weight)
+        .where(ArchivedRequest.assigned_to.isnot(None))
+        .group_by(ArchivedRequest.assigned_to, archived_category),
+    ]
+    return db.execute(union_all(*parts)).all()
+
+
+def changes_since(db, last_run):
+    # CSRs whose history moved, and requests created since the last run. Events are read by inserting
+    # transaction from the last run's horizon, so one committed after that run with a lower id is not
+    # skipped; events seen by both runs only rescore or merge twice, which changes nothing
+    if last_run.xid_horizon is not None:
+        after_last_run = RequestEvent.xid >= last_run.xid_horizon
+    else:
+        after_last_run = RequestEvent.id > last_run.last_event_id # Runs from before xid_horizon existed
+    events = db.execute(
+        select(RequestEvent.event_type, RequestEvent.request_id, RequestEvent.actor_role, RequestEvent.actor_id)
+        .where(
+            after_last_run,
+            RequestEvent.event_type.in_(("created", "shortlisted", "unshortlisted", "assigned")),
+        )
+    ).all()
+
+    changed = {e.actor_id for e in events if e.event_type != "created" and e.actor_role == "csr"}
+    assigned = [e.request_id for e in events if e.event_type == "assigned"]
+    if assigned:
+        changed.update(
+            db.execute(
+                select(Request.assigned_to).where(Request.id.in_(assigned), Request.assigned_to.isnot(None))
+            ).scalars().all()
+        )
+    created = [e.request_id for e in events if e.event_type == "created"]
+    return changed, created
+
+
+class RecommendationEntity:
+    def refresh_recommendations(self, full: bool = False, top_k: int = RECOMMEND_TOP_K):
+        # numpy / scipy are only needed here, so API workers never import them
+        from app.utils import recommender as rec
+
+        try:
+            with get_db_session() as db:
+                last_run = db.execute(
+                    select(RecommendationRun).order_by(RecommendationRun.id.desc()).limit(1)
+                ).scalars().first()
+                # Taken before reading events: transactions still open now are read again next run
+                horizon = xid_horizon(db)
+                last_event_id = db.execute(select(func.coalesce(func.max(RequestEvent.id), 0))).scalar()
+                incremental = last_run is not None and not full
+                if incremental:
+                    changed, created = changes_since(db, last_run)
+                    if not changed and not created:
+                        return {"full": False, "csrs_rescored": 0, "csrs_merged": 0, "up_to_date": True}
+
+                # --- Matrices: CSR x category affinity, category x pending request one-hot ---
+                csr_ids = db.execute(select(CSR.csr_user_id).order_by(CSR.csr_user_id)).scalars().all()
+                category_ids = [0] + db.execute(select(Category.id).order_by(Category.id)).scalars().all()
+                csr_index = rec.index_of(csr_ids)
+                category_index = rec.index_of(category_ids)
+
+                pending = db.execute(
+                    select(Request.id, Request.category_id, Request.shortlist_count)
+                    .where(Request.status == "pending")
+                    .order_by(Request.id)
+                ).all()
+                request_ids = [r.id for r in pending]
+                request_index = rec.index_of(request_ids)
+
+                affinity = rec.affinity_matrix(
+                    history_rows(db, rec.SHORTLIST_WEIGHT, rec.ASSIGNMENT_WEIGHT), csr_index, category_index
+                )
+                categories = rec.category_matrix(
+                    [r.category_id if r.category_id in category_index else 0 for r in pending], category_index
+                )
+                base = rec.base_scores(affinity, categories, [r.shortlist_count for r in pending])
+                excluded = rec.pair_matrix(
+                    db.execute(
+                        select(request_shortlists.c.csr_user_id, request_shortlists.c.request_id)
+                        .join(Request, Request.id == request_shortlists.c.request_id)
+                        .where(Request.status == "pending")
+                    ).all(),
+                    csr_index,
+                    request_index,
+                )
+
+                # --- Which CSRs to score against everything, which only against new requests ---
+                stored = {}
+                if incremental:
+                    for csr_user_id, request_id, score in db.execute(
+                        select(CsrRecommendation.csr_user_id, CsrRecommendation.request_id, CsrRecommendation.score)
+                    ).all():
+                        if request_id in request_index: # Closed requests free their slot
+                            stored.setdefault(csr_user_id, []).append((request_id, score))
+                    rescore = [c for c in csr_ids if c in changed or c not in stored]
+                    merge = [c for c in csr_ids if c not in changed and c in stored]
+                    new_columns = [request_index[r] for r in dict.fromkeys(created) if r in request_index]
+                else:
+                    rescore, merge, new_columns = list(csr_ids), [], []
+
+                results = {}
+                columns, scores = rec.top_k(
+                    affinity, categories, base, excluded, top_k, [csr_index[c] for c in rescore]
+                )
+                for csr_user_id, cols, row_scores in zip(rescore, columns, scores):
+                    results[csr_user_id] = [
+                        (request_ids[col], float(score)) for col, score in zip(cols, row_scores) if math.isfinite(score)
+                    ]
+
+                if merge and new_columns:
+                    columns, scores = rec.top_k(
+                        affinity,
+                        categories[:, new_columns],
+                        base[new_columns],
+                        excluded[:, new_columns],
+                        top_k,
+                        [csr_index[c] for c in merge],
+                    )
+                    for csr_user_id, cols, row_scores in zip(merge, columns, scores):
+                        listed = {request_id for request_id, _ in stored[csr_user_id]}
+                        fresh = [
+                            (request_ids[new_columns[col]], float(score))
+                            for col, score in zip(cols, row_scores)
+                            if math.isfinite(score) and request_ids[new_columns[col]] not in listed
+                        ]
+                        results[csr_user_id] = sorted(stored[csr_user_id] + fresh, key=lambda p: -p[1])[:top_k]
+
+                self.write_recommendations(db, results)
+                db.add(RecommendationRun(
+                    last_event_id=last_event_id,
+                    xid_horizon=horizon,
+                    full_refresh=not incremental,
+                    csrs_rescored=len(rescore),
+                    csrs_merged=len(merge) if new_columns else 0,
+                ))
+                db.commit() # Readers switch to the new lists all at once
+
+                return {
+                    "full": not incremental,
+                    "csrs_rescored": len(rescore),
+                    "csrs_merged": len(merge) if new_columns else 0,
+                    "pending_requests": len(request_ids),
+                    "up_to_date": True,
+                } # Return run summary
+
+        except Exception as e:
+            print(f"[ERROR] refresh_recommendations failed: {e}")
+            return f"Failed to refresh recommendations: {str(e)}"
+
+    def write_recommendations(self, db, results: dict):
+        if not results:
+            return
+        db.execute(delete(CsrRecommendation).where(CsrRecommendation.csr_user_id.in_(list(results))))
+        rows = [
+            {"csr_user_id": csr_user_id, "rank": rank, "request_id": request_id, "score": score}
+            for csr_user_id, picks in results.items()
+            for rank, (request_id, score) in enumerate(picks, start=1)
+        ]
+        for start in range(0, len(rows), INSERT_CHUNK):
+            db.execute(insert(CsrRecommendation), rows[start:start + INSERT_CHUNK])
+
+    def get_recommended_requests(self, csr_user_id: int, limit: int = 10):
+        if not csr_user_id:
+            return "csr_user_id is required"
+        limit = max(1, min(RECOMMEND_TOP_K, int(limit or 10)))
+
+        try:
+            with get_db_session() as db:
+                rows = db.execute(RECOMMENDED_STMT.limit(limit), {"csr_user_id": csr_user_id}).all()
+                return [dict(row._mapping) for row in rows] # Return recommended requests, best first
+
+        except Exception as e:
+            print(f"[ERROR] get_recommended_requests failed: {e}")
+            return [] # Return empty list on failure
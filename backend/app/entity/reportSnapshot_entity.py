@@ -0,0 +1,58 @@
+from app.database import get_db_session
+from app.models.models import ReportSnapshot
+from app.entity.viewerSketch_entity import ViewerSketchEntity, VIEW_SKETCH_FLUSH_SECONDS
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from fastapi.encoders import jsonable_encoder
+from datetime import timedelta
+import os
+
+# A period is frozen only this long after it ends, so every worker has flushed its buffered
+# viewer sketches (each flushes at least every VIEW_SKETCH_FLUSH_SECONDS, see main.py)
+REPORT_SNAPSHOT_GRACE = timedelta(seconds=float(
+    os.getenv("REPORT_SNAPSHOT_GRACE_SECONDS", str(max(300.0, 3 * VIEW_SKETCH_FLUSH_SECONDS)))
+))
+
+
+def period_closed(end, now):
+    return end + REPORT_SNAPSHOT_GRACE <= now
+
+
+class ReportSnapshotEntity:
+    def get_or_create(self, report_type: str, period: str, closed: bool, compute):
+        # Open periods are always computed live
+        if not closed:
+            report = compute()
+            if "error" not in report:
+                report["closed"] = False
+            return report
+
+        with get_db_session() as db:
+            snapshot = (
+                db.query(ReportSnapshot)
+                .filter(ReportSnapshot.report_type == report_type, ReportSnapshot.period == period)
+                .first()
+            )
+            if snapshot:
+                return {**snapshot.data, "closed": True} # Return stored snapshot
+
+        ViewerSketchEntity().flush() # This worker's buffered viewers belong in the frozen report
+        report = compute()
+        if "error" in report:
+            return report # Never store a failed report
+
+        data = jsonable_encoder(report)
+        with get_db_session() as db:
+            try:
+                # A parallel request may have stored the same period already; keep the first one.
+                # In a savepoint, so a failed save loses only the snapshot, not the request's unit of work
+                with db.begin_nested():
+                    db.execute(
+                        pg_insert(ReportSnapshot)
+                        .values(report_type=report_type, period=period, data=data)
+                        .on_conflict_do_nothing(constraint="uq_report_snapshot_period")
+                    )
+                db.commit() # Commit the snapshot
+            except Exception as e:
+                print(f"Error saving {report_type} report snapshot {period}: {e}")
+
+        return {**data, "closed": True} # Return the freshly frozen report
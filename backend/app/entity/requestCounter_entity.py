@@ -0,0 +1,128 @@
+from app.database import get_db_session
+from app.models.models import Request, request_shortlists
+from sqlalchemy import select, update, func, text
+
+# requests.shortlist_count is kept in step with request_shortlists by statement-level
+# triggers: one UPDATE per INSERT/DELETE statement (bulk shortlists, FK cascades and
+# the seed import included), in the same transaction as the shortlist change.
+# The insert trigger also counts the day's new shortlists in request_daily_stats.
+COUNTER_TRIGGERS_SQL = """
+-- Written by the insert trigger below; created here so installing the triggers first cannot break shortlisting
+CREATE TABLE IF NOT EXISTS request_daily_stats (
+    request_id INTEGER NOT NULL REFERENCES requests(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    views INTEGER NOT NULL DEFAULT 0,
+    shortlists INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (request_id, day)
+);
+
+CREATE OR REPLACE FUNCTION requests_shortlist_count_ins() RETURNS trigger AS $$
+BEGIN
+    UPDATE requests r
+    SET shortlist_count = r.shortlist_count + d.n
+    FROM (SELECT request_id, count(*) AS n FROM new_rows GROUP BY request_id) d
+    WHERE r.id = d.request_id;
+
+    -- Shortlists added per request and UTC day, for the request series (requestSeries_entity.py)
+    INSERT INTO request_daily_stats AS s (request_id, day, shortlists)
+    SELECT request_id, (now() AT TIME ZONE 'UTC')::date, count(*) FROM new_rows GROUP BY request_id ORDER BY request_id
+    ON CONFLICT (request_id, day) DO UPDATE SET shortlists = s.shortlists + EXCLUDED.shortlists;
+    RETURN NULL;
+END $$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION requests_shortlist_count_del() RETURNS trigger AS $$
+BEGIN
+    UPDATE requests r
+    SET shortlist_count = r.shortlist_count - d.n
+    FROM (SELECT request_id, count(*) AS n FROM old_rows GROUP BY request_id) d
+    WHERE r.id = d.request_id;
+    RETURN NULL;
+END $$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_request_shortlists_count_ins ON request_shortlists;
+CREATE TRIGGER trg_request_shortlists_count_ins
+    AFTER INSERT ON request_shortlists
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION requests_shortlist_count_ins();
+
+DROP TRIGGER IF EXISTS trg_request_shortlists_count_del ON request_shortlists;
+CREATE TRIGGER trg_request_shortlists_count_del
+    AFTER DELETE ON request_shortlists
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION requests_shortlist_count_del();
+"""
+
+
+def actual_shortlist_count():
+    # COUNT(*) the stored column replaces, correlated to the outer requests row
+    return (
+        select(func.count())
+        .select_from(request_shortlists)
+        .where(request_shortlists.c.request_id == Request.id)
+        .scalar_subquery()
+    )
+
+
+class RequestCounterEntity:
+    def install_triggers(self):
+        try:
+            with get_db_session() as db:
+                db.execute(text(COUNTER_TRIGGERS_SQL))
+                db.commit()
+                return True # Return True once the triggers are in place
+        except Exception as e:
+            print(f"[ERROR] install_triggers failed: {e}")
+            return f"Failed to install counter triggers: {str(e)}"
+
+    def find_drift(self, limit: int = 100):
+        actual = actual_shortlist_count()
+        try:
+            with get_db_session() as db:
+                rows = db.execute(
+                    select(Request.id, Request.shortlist_count.label("stored"), actual.label("actual"))
+                    .where(Request.shortlist_count != actual)
+                    .order_by(Request.id)
+                    .limit(limit)
+                ).all()
+                return [dict(row._mapping) for row in rows] # Return list of drifted requests
+        except Exception as e:
+            print(f"[ERROR] find_drift failed: {e}")
+            return f"Failed to check counters: {str(e)}"
+
+    def reconcile_shortlist_counts(self, batch_size: int = 5000):
+        actual = actual_shortlist_count()
+        last_id = 0
+        repaired = []
+        checked = 0
+
+        try:
+            while True:
+                with get_db_session() as db:
+                    # Lock the batch first: a shortlist committed while we count then waits for
+                    # our commit, and its trigger applies on top of the repaired value
+                    ids = db.execute(
+                        select(Request.id)
+                        .where(Request.id > last_id)
+                        .order_by(Request.id)
+                        .limit(batch_size)
+                        .with_for_update()
+                    ).scalars().all()
+                    if not ids:
+                        break
+
+                    fixed = db.execute(
+                        update(Request)
+                        .where(Request.id.in_(ids), Request.shortlist_count != actual)
+                        .values(shortlist_count=actual, updated_at=Request.updated_at) # Not a user-visible edit
+                        .returning(Request.id)
+                    ).scalars().all()
+                    db.commit()
+
+                repaired.extend(fixed)
+                checked += len(ids)
+                last_id = ids[-1]
+
+            return {"checked": checked, "repaired": len(repaired), "repaired_ids": repaired[:100]}
+        except Exception as e:
+            print(f"[ERROR] reconcile_shortlist_counts failed: {e}")
+            return f"Failed to reconcile counters: {str(e)}"
@@ -0,0 +1,155 @@
+from app.database import engine, get_db_session
+from app.models.models import RequestDailyStat, Request
+from sqlalchemy import select, exists, values, column, Integer, Date
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from datetime import datetime, date, timedelta, timezone
+import os
+import threading
+import time
+
+# View counts are added up in memory and written in one upsert per flush
+VIEW_SERIES_FLUSH_SECONDS = float(os.getenv("VIEW_SERIES_FLUSH_SECONDS", "10"))
+VIEW_SERIES_FLUSH_VIEWS = int(os.getenv("VIEW_SERIES_FLUSH_VIEWS", "500"))
+
+SERIES_MAX_REQUESTS = 200
+SERIES_MAX_DAYS = 90
+
+# Shortlists added per day come from the statement-level shortlist trigger (see requestCounter_entity.py)
+
+
+class ViewCountBuffer:
+    """Per-process view counts not written yet, keyed by (request_id, day)."""
+
+    def __init__(self):
+        self.pending = {}
+        self.views = 0
+        self.last_flush = time.monotonic()
+        self.lock = threading.Lock()
+
+    def add(self, request_id: int, day: date):
+        with self.lock:
+            key = (request_id, day)
+            self.pending[key] = self.pending.get(key, 0) + 1
+            self.views += 1
+            return self.views >= VIEW_SERIES_FLUSH_VIEWS or time.monotonic() - self.last_flush >= VIEW_SERIES_FLUSH_SECONDS
+
+    def drain(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.views = 0
+            self.last_flush = time.monotonic()
+            return pending
+
+    def restore(self, pending: dict):
+        # Put back a batch that failed to write; counts are added, so nothing is lost or doubled
+        with self.lock:
+            for key, count in pending.items():
+                self.pending[key] = self.pending.get(key, 0) + count
+
+
+view_counts = ViewCountBuffer()
+
+
+class RequestSeriesEntity:
+    def record_view(self, request_id: int):
+        if view_counts.add(request_id, datetime.now(timezone.utc).date()):
+            self.flush()
+
+    def flush(self):
+        pending = view_counts.drain()
+        if not pending:
+            return 0
+        try:
+            self.write_views(pending)
+            return len(pending) # Return number of (request, day) rows written
+        except Exception as e:
+            view_counts.restore(pending)
+            print(f"[WARN] View series flush failed, retrying on the next flush: {e}")
+            return 0
+
+    def write_views(self, pending: dict):
+        t = RequestDailyStat.__table__
+        batch = values(
+            column("request_id", Integer), column("day", Date), column("views", Integer), name="batch"
+        ).data([(request_id, day, count) for (request_id, day), count in pending.items()])
+
+        # One upsert for the whole batch, rows locked in key order in every worker;
+        # requests deleted since they were viewed are skipped instead of failing the batch
+        stmt = pg_insert(t).from_select(
+            ["request_id", "day", "views"],
+            select(batch.c.request_id, batch.c.day, batch.c.views)
+            .where(exists().where(Request.id == batch.c.request_id))
+            .order_by(batch.c.request_id, batch.c.day),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[t.c.request_id, t.c.day],
+            set_={"views": t.c.views + stmt.excluded.views},
+        )
+
+        # Own transaction, outside any request's unit of work
+        with engine.begin() as conn:
+            conn.execute(stmt)
+
+    def get_request_series(self, ids=None, pin_user_id: int = None, days: int = 30, end: date = None):
+        # Daily views and shortlists for up to SERIES_MAX_REQUESTS requests over the `days` days ending on `end`
+        try:
+            if isinstance(ids, str):
+                ids = [int(i) for i in ids.split(",") if i.strip()]
+            end = date.fromisoformat(end) if isinstance(end, str) else end
+            days = int(days or 30)
+        except ValueError:
+            return "Invalid ids, days or end date, expected ids=1,2,3 and YYYY-MM-DD"
+        if not ids and not pin_user_id:
+            return "ids or pin_user_id is required"
+        if ids and len(ids) > SERIES_MAX_REQUESTS:
+            return f"At most {SERIES_MAX_REQUESTS} requests per call"
+        if not 1 <= days <= SERIES_MAX_DAYS:
+            return f"days must be between 1 and {SERIES_MAX_DAYS}"
+
+        end = end or datetime.now(timezone.utc).date()
+        start = end - timedelta(days=days - 1)
+        self.flush() # Include this worker's buffered views
+
+        if ids:
+            request_ids = select(Request.id).where(Request.id.in_(ids))
+        else:
+            # A PIN dashboard: their most recent requests
+            request_ids = (
+                select(Request.id)
+                .where(Request.pin_user_id == pin_user_id)
+                .order_by(Request.created_at.desc())
+                .limit(SERIES_MAX_REQUESTS)
+            )
+        request_ids = request_ids.cte("ids")
+
+        try:
+            with get_db_session() as db:
+                # One query: requests without activity come back as a row of NULLs (outer join)
+                rows = db.execute(
+                    select(request_ids.c.id, RequestDailyStat.day, RequestDailyStat.views, RequestDailyStat.shortlists)
+                    .outerjoin(
+                        RequestDailyStat,
+                        (RequestDailyStat.request_id == request_ids.c.id)
+                        & (RequestDailyStat.day >= start)
+                        & (RequestDailyStat.day <= end),
+                    )
+                ).all()
+
+                series = {}
+                for request_id, day, day_views, day_shortlists in rows:
+                    s = series.setdefault(request_id, {"views": [0] * days, "shortlists": [0] * days})
+                    if day is not None:
+                        i = (day - start).days
+                        s["views"][i] = day_views
+                        s["shortlists"][i] = day_shortlists
+
+                return {
+                    "start": start.isoformat(),
+                    "end": end.isoformat(),
+                    "days": [(start + timedelta(days=i)).isoformat() for i in range(days)],
+                    "series": series,
+                } # Return dense per-day arrays keyed by request id
+
+        except Exception as e:
+            print(f"[ERROR] get_request_series failed: {e}")
+            return f"Failed to load request series: {str(e)}"
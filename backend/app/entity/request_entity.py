@@ -1,36 +1,258 @@
-from sqlalchemy.orm import joinedload
-from sqlalchemy import or_, select, insert, delete, func, case, extract, exists, not_
-from app.database import get_db_session
-from app.models.models import Request, request_shortlists, CSR, Category
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy import or_, select, insert, update, delete, func, case, extract, exists, not_, literal, distinct, bindparam, tuple_, cast, union_all, Integer, BigInteger, String
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.database import get_db_session, pipeline
+from app.utils.loader import get_loader
+from app.utils.trending import trend_bump, trend_point, decayed_score, TREND_VIEW_WEIGHT, TREND_SHORTLIST_WEIGHT, TREND_CREATED_WEIGHT
+from app.utils.cache import cache, evict_on_commit, request_key, pin_requests_key, CSR_COMPLETED_KEY
+from app.models.models import Request, ArchivedRequest, RequestEvent, Tombstone, request_shortlists, CSR, Category
+from app.entity.archive_entity import archive_horizon
+from app.entity.reportSnapshot_entity import ReportSnapshotEntity, period_closed
+from app.entity.viewerSketch_entity import ViewerSketchEntity
+from app.entity.completionDigest_entity import CompletionDigestEntity
+from app.entity.requestSeries_entity import RequestSeriesEntity
 from typing import Optional
 from sqlalchemy.exc import SQLAlchemyError
 import random
-from collections import Counter
 from datetime import datetime, timedelta, timezone, date
 
+BULK_LIMIT = 1000 # Max request ids accepted by one bulk call
+
+# --- Hot statements: built once at import, compiled once per process (see app/utils/warmup.py) ---
+
+# A PIN's own requests, with category and shortlistees
+def pin_requests_stmt(model):
+    return (
+        select(model)
+        .options(joinedload(model.category), selectinload(model.shortlistees))
+        .where(model.pin_user_id == bindparam("pin_user_id", type_=Integer))
+        .order_by(model.created_at.desc())
+    )
+
+# A PIN's own requests, live and archived (the archive job must not make them disappear)
+PIN_REQUESTS_STMT = pin_requests_stmt(Request)
+ARCHIVED_PIN_REQUESTS_STMT = pin_requests_stmt(ArchivedRequest)
+
+# CSR feed: pending requests the CSR has not shortlisted, with their stored shortlist counts, in one query
+CSR_FEED_STMT = (
+    select(
+        Request.id,
+        Request.pin_user_id,
+        Request.title,
+        Request.description,
+        Request.status,
+        func.coalesce(Category.name, "Misc").label("category_name"),
+        Request.assigned_to,
+        Request.created_at,
+        Request.updated_at,
+        Request.completed_at,
+        Request.shortlist_count.label("shortlistees_count"),
+    )
+    .outerjoin(Category, Request.category_id == Category.id)
+    .where(
+        func.lower(Request.status) == "pending",
+        ~exists().where(
+            request_shortlists.c.request_id == Request.id,
+            request_shortlists.c.csr_user_id == bindparam("csr_user_id", type_=Integer),
+        ), # NULL csr_user_id matches nothing, so every pending request is returned
+    )
+    .order_by(Request.created_at.desc())
+)
+
+# View counter: bump pending requests and tell "not found" apart from "not pending" in one round trip
+VIEW_REQUEST = (
+    select(Request.id, Request.pin_user_id, Request.category_id)
+    .where(Request.id == bindparam("request_id", type_=Integer))
+    .cte("req")
+)
+VIEW_BUMP = (
+    update(Request)
+    .where(Request.id == bindparam("request_id", type_=Integer), func.lower(Request.status) == "pending")
+    .values(
+        view=func.coalesce(Request.view, 0) + 1,
+        trend_score=trend_bump(Request.trend_score, Request.created_at, TREND_VIEW_WEIGHT),
+    )
+    .returning(Request.id)
+    .cte("bumped")
+)
+VIEW_INCREMENT_STMT = select(
+    VIEW_REQUEST.c.pin_user_id,
+    VIEW_REQUEST.c.category_id,
+    select(VIEW_BUMP.c.id).exists().label("counted"), # False when the request is not pending
+).add_cte(VIEW_BUMP) # No row = not found
+
+# Trending: pending requests by decayed score, a top-N walk of ix_requests_trending(_category)
+TRENDING_STMT = (
+    select(
+        Request.id,
+        Request.pin_user_id,
+        Request.title,
+        Request.description,
+        Request.status,
+        func.coalesce(Category.name, "Misc").label("category_name"),
+        Request.created_at,
+        Request.view,
+        Request.shortlist_count.label("shortlistees_count"),
+        Request.trend_score,
+    )
+    .outerjoin(Category, Request.category_id == Category.id)
+    .where(Request.status == "pending") # Same predicate as the partial indexes
+    .order_by(Request.trend_score.desc().nullslast(), Request.id)
+)
+TRENDING_LIMIT = 100
+
+def bump_trend(request_ids, weight):
+    # Add one event of `weight` to each request's decayed score; not an edit, so updated_at stays
+    return (
+        update(Request)
+        .where(Request.id.in_(request_ids))
+        .values(
+            trend_score=trend_bump(Request.trend_score, Request.created_at, weight),
+            updated_at=Request.updated_at,
+        )
+    )
+
+# Delta sync: request rows in change order, same fields as the CSR feed plus the view counter
+CHANGES_STMT = (
+    select(
+        Request.id,
+        Request.pin_user_id,
+        Request.title,
+        Request.description,
+        Request.status,
+        func.coalesce(Category.name, "Misc").label("category_name"),
+        Request.assigned_to,
+        Request.created_at,
+        Request.updated_at,
+        Request.completed_at,
+        Request.view,
+        Request.shortlist_count.label("shortlistees_count"),
+        Request.change_xid,
+    )
+    .outerjoin(Category, Request.category_id == Category.id)
+    .order_by(Request.change_xid, Request.id)
+)
+CHANGES_LIMIT = 500 # Max changed requests per page
+
+EVENT_COLUMNS = ["request_id", "event_type", "category_id", "actor_role", "actor_id"]
+
+def record_event(db, request_id, event_type, category_id=None, actor_role=None, actor_id=None):
+    # Append one lifecycle event, in the caller's transaction
+    db.execute(
+        insert(RequestEvent).values(
+            request_id=request_id,
+            event_type=event_type,
+            category_id=category_id,
+            actor_role=actor_role,
+            actor_id=actor_id,
+        )
+    )
+
+def events_from(request_ids, event_type, actor_role=None, actor_id=None):
+    # INSERT ... SELECT one event per request id, category taken from the request row
+    return insert(RequestEvent).from_select(
+        EVENT_COLUMNS,
+        select(
+            Request.id,
+            literal(event_type, String),
+            Request.category_id,
+            literal(actor_role, String),
+            literal(actor_id, Integer),
+        ).where(Request.id.in_(request_ids)),
+    )
+
+def event_window(start, end, *event_types):
+    # Events of the given types inside [start, end): a range scan on ix_request_events_type_occurred_at
+    return (
+        RequestEvent.event_type.in_(event_types)
+        & (RequestEvent.occurred_at >= start)
+        & (RequestEvent.occurred_at < end)
+    )
+
+REPORT_EVENTS = ("created", "assigned", "completed")
+
+def range_activity(start, end):
+    # Requests created, assigned or completed inside [start, end), as a filter on report_requests() rows
+    return lambda rows: rows.c.id.in_(select(RequestEvent.request_id).where(event_window(start, end, *REPORT_EVENTS)))
+
+def evict_requests(db, request_ids, pin_user_ids=None):
+    # Drop cached views of these requests and their PINs' lists once the transaction commits
+    if pin_user_ids is None:
+        pin_user_ids = db.execute(
+            select(distinct(Request.pin_user_id)).where(Request.id.in_(list(request_ids)))
+        ).scalars().all()
+    evict_on_commit(
+        db,
+        *[request_key(rid) for rid in request_ids],
+        *[pin_requests_key(pid) for pid in pin_user_ids],
+    )
+
+def xid_horizon(db):
+    # Oldest transaction still running: every change stamped below it is committed and final
+    return db.execute(
+        select(cast(cast(func.pg_snapshot_xmin(func.pg_current_snapshot()), String), BigInteger))
+    ).scalar()
+
+def parse_change_cursor(cursor):
+    # "X" = everything up to transaction X seen, "X:I" = transaction X seen up to request id I
+    if cursor in (None, ""):
+        return -1, None
+    xid, _, request_id = str(cursor).partition(":")
+    return int(xid), int(request_id) if request_id else None
+
+def parse_change_scope(scope):
+    # "all" or "pin:<pin_user_id>" (the owner never changes, so rows cannot leave the scope)
+    if scope in (None, "", "all"):
+        return None
+    kind, _, value = scope.partition(":")
+    if kind != "pin" or not value.isdigit():
+        raise ValueError(f"Unknown scope '{scope}', use 'all' or 'pin:<pin_user_id>'")
+    return int(value)
+
+def needs_archive(completed_after):
+    # True unless the range starts inside the window that is never archived
+    if not completed_after:
+        return True
+    try:
+        start = datetime.fromisoformat(str(completed_after))
+    except ValueError:
+        return True
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    return start < archive_horizon()
+
+REPORT_REQUEST_COLUMNS = ("id", "title", "status", "category_id", "created_at", "updated_at", "completed_at", "shortlist_count")
+
+def report_requests(since):
+    # Rows a report reaching back to `since` reads: live requests, plus the archive once `since`
+    # is past the retention window, so closed periods are not frozen with archived rows missing
+    parts = [select(*[getattr(Request, c) for c in REPORT_REQUEST_COLUMNS])]
+    if needs_archive(since):
+        parts.append(select(*[getattr(ArchivedRequest, c) for c in REPORT_REQUEST_COLUMNS]))
+    return (union_all(*parts) if len(parts) > 1 else parts[0]).subquery("report_requests")
+
 class PinRequestEntity:
     def get_pin_requests(self, id: int, filter: str):
-        with get_db_session() as db:
-            query = (
-                db.query(Request)
-                .options(
-                    joinedload(Request.category),
-                    joinedload(Request.shortlistees)
-                )
-                .filter(Request.pin_user_id == id)
-            )
+        if filter:
+            return self.query_pin_requests(id, filter) # Searches are not cached
 
-            # Apply search if q provided
-            if filter:
-                query = query.filter(
-                    or_(
-                        Request.title.ilike(f"%{q}%"),
-                        Request.description.ilike(f"%{q}%"),
+        return cache.get_or_set(pin_requests_key(id), lambda: self.query_pin_requests(id, None))
+
+    def query_pin_requests(self, id: int, filter: str):
+        with get_db_session() as db:
+            rows = []
+            for model, stmt in ((Request, PIN_REQUESTS_STMT), (ArchivedRequest, ARCHIVED_PIN_REQUESTS_STMT)):
+                # Apply search if filter provided
+                if filter:
+                    stmt = stmt.where(
+                        or_(
+                            model.title.ilike(f"%{filter}%"),
+                            model.description.ilike(f"%{filter}%"),
+                        )
                     )
-                )
+                rows.extend(db.execute(stmt, {"pin_user_id": id}).unique().scalars().all())
 
-            # Sort and execute
-            rows = query.order_by(Request.created_at.desc()).all()
+            rows.sort(key=lambda r: r.created_at, reverse=True) # Newest first across live and archived
 
             result = []
             for r in rows:
@@ -44,7 +266,7 @@ class PinRequestEntity:
                     "created_at": r.created_at,
                     "updated_at": r.updated_at,
                     "view": r.view,
-                    "shortlistees_count": len(r.shortlistees or []),
+                    "shortlistees_count": r.shortlist_count,
                     "shortlistees": [
                         {
                             "user_id": csr.csr_user_id,
@@ -59,28 +281,32 @@ class PinRequestEntity:
     def search_pin_requests(self, search_input: str, pin_user_id: int):
         with get_db_session() as db:
             try:
-                # Base query with eager loads
-                q = (
-                    db.query(Request)
-                    .options(
-                        joinedload(Request.category),
-                        joinedload(Request.shortlistees),
+                rows = []
+                for model in (Request, ArchivedRequest):
+                    # Base query with eager loads
+                    q = (
+                        db.query(model)
+                        .options(
+                            joinedload(model.category),
+                            joinedload(model.shortlistees),
+                        )
+                        .filter(model.pin_user_id == pin_user_id)
                     )
-                    .filter(Request.pin_user_id == pin_user_id)
-                )
 
-                # Apply search if provided
-                if search_input:
-                    search_pattern = f"%{search_input}%"
-                    q = q.filter(
-                        or_(
-                            Request.title.ilike(search_pattern),
-                            Request.description.ilike(search_pattern),
+                    # Apply search if provided
+                    if search_input:
+                        search_pattern = f"%{search_input}%"
+                        q = q.filter(
+                            or_(
+                                model.title.ilike(search_pattern),
+                                model.description.ilike(search_pattern),
+                            )
                         )
-                    )
 
-                # Sort & fetch
-                rows = q.order_by(Request.created_at.desc()).all()
+                    rows.extend(q.all())
+
+                # Sort newest first across live and archived
+                rows.sort(key=lambda r: r.created_at, reverse=True)
 
                 # Build output
                 result = []
@@ -95,7 +321,7 @@ class PinRequestEntity:
                         "created_at": r.created_at,
                         "updated_at": r.updated_at,
                         "view": r.view,
-                        "shortlistees_count": len(r.shortlistees or []),
+                        "shortlistees_count": r.shortlist_count,
                         "shortlistees": [
                             {
                                 "csr_user_id": csr.csr_user_id,
@@ -126,6 +352,8 @@ class PinRequestEntity:
                     return f"Cannot delete a '{req.status}' request" # Return str on failure
 
                 # Delete the request
+                record_event(db, req.id, "deleted", req.category_id, "pin", req.pin_user_id)
+                evict_requests(db, [req.id], [req.pin_user_id])
                 db.delete(req) # Mark for deletion
                 db.commit() # Commit the changes
                 return True  # Successful deletion
@@ -157,7 +385,7 @@ class PinRequestEntity:
 
                 # If category provided, validate it exists
                 if category_id:
-                    category = db.query(Category).filter(Category.id == category_id).first()
+                    category = get_loader(db, Category).load(category_id)
                     if not category:
                         return f"Category with ID {category_id} does not exist" # Return str on failure
 
@@ -165,6 +393,7 @@ class PinRequestEntity:
                 req.title = title.strip()
                 req.description = description.strip() if description else None
                 req.category_id = category_id if category_id else None
+                evict_requests(db, [req.id], [req.pin_user_id])
 
                 db.commit() # Commit the changes
                 db.refresh(req) # Refresh the instance, reflect latest changes
@@ -183,9 +412,13 @@ class PinRequestEntity:
                     description=form_data.get("description"),
                     category_id=form_data.get("category_id"),
                     status="pending",
+                    trend_score=trend_point(TREND_CREATED_WEIGHT),
                 ) # Create new Request instance
 
                 db.add(new_request) # Add new request to the session
+                db.flush() # Assign the id
+                record_event(db, new_request.id, "created", new_request.category_id, "pin", new_request.pin_user_id)
+                evict_on_commit(db, pin_requests_key(new_request.pin_user_id))
                 db.commit() # Commit the changes
                 db.refresh(new_request) # Refresh the instance, reflect latest changes
 
@@ -215,19 +448,12 @@ class PinRequestEntity:
     def get_pin_request_shortlists(self, request_id: int):
         try:
             with get_db_session() as db:
-                req = db.query(Request).filter(Request.id == request_id).first()
-                if not req:
-                    return "Request not found"
-
-                # Count number of CSRs who shortlisted this request
-                shortlists_count = (
-                    db.query(request_shortlists)
-                    .filter(request_shortlists.c.request_id == request_id)
-                    .count()
-                )
-
+                # Number of CSRs who shortlisted this request, stored on the row
+                shortlists_count = db.execute(
+                    select(Request.shortlist_count).where(Request.id == request_id)
+                ).scalar()
                 if shortlists_count is None:
-                    shortlists_count = 0
+                    return "Request not found"
                 return shortlists_count # Return integer count
 
         except Exception as e:
@@ -236,150 +462,111 @@ class PinRequestEntity:
         
     def get_pin_requests_completed(self):
         try:
-            with get_db_session() as db:
-                rows = (
-                    db.query(Request)
-                    .options(joinedload(Request.category))
-                    .filter(func.lower(Request.status) == "completed")
-                    .order_by(Request.completed_at.desc())
-                    .all()
-                )
-
-                result = []
-                for r in rows:
-                    result.append({
-                        "id": r.id,
-                        "pin_user_id": r.pin_user_id,
-                        "title": r.title,
-                        "description": r.description,
-                        "status": r.status,
-                        "category_name": r.category.name if r.category else "Misc",
-                        "service_type": r.category.name if r.category else "Misc",
-                        "created_at": r.created_at,
-                        "updated_at": r.updated_at,
-                        "completed_at": r.completed_at,
-                    }) # Build result list
-
-                return result # Return list of completed requests
+            return self.query_completed_requests({}) # No date range, so archived requests are included
 
         except Exception as e:
-            print(f"[ERROR] get_csr_completed_requests failed: {e}")
+            print(f"[ERROR] get_pin_requests_completed failed: {e}")
             return [] # Return empty list on failure
     
     def search_pin_requests_completed(self, filters: dict):
         try:
-            search_input = (filters.get("search_input") or "").strip()
-            service_type = (filters.get("service_type") or "").strip()
-            completed_after = filters.get("completed_after")
-            completed_before = filters.get("completed_before")
+            return self.query_completed_requests(filters) # Return list of completed requests
 
-            with get_db_session() as db:
-                # Base query: completed requests
-                query = (
-                    db.query(Request)
-                    .options(joinedload(Request.category))
-                    .filter(Request.status == "completed")
-                )
+        except Exception as e:
+            print(f"Error searching completed PIN requests: {e}")
+            return [] # Return empty list on failure
 
-                # Keyword filter (title/description)
-                if search_input:
-                    pattern = f"%{search_input}%"
-                    query = query.filter(
-                        or_(
-                            Request.title.ilike(pattern),
-                            Request.description.ilike(pattern)
-                        )
-                    )
+    def completed_requests_queries(self, db, filters: dict):
+        search_input = (filters.get("search_input") or "").strip()
+        service_type = (filters.get("service_type") or "").strip()
+        completed_after = filters.get("completed_after")
+        completed_before = filters.get("completed_before")
 
-                # Category / Service Type filter
-                if service_type and service_type.lower() != "all":
-                    query = query.join(Category).filter(
-                        func.lower(Category.name) == service_type.lower()
-                    )
+        # Only touch the archive when the range reaches back past the retention window
+        models = [Request]
+        if needs_archive(completed_after):
+            models.append(ArchivedRequest)
 
-                # Date range filters
-                if completed_after:
-                    query = query.filter(Request.completed_at >= completed_after)
-                if completed_before:
-                    query = query.filter(Request.completed_at <= completed_before)
+        queries = []
+        for model in models:
+            # Base query: completed requests
+            query = (
+                db.query(model)
+                .options(joinedload(model.category))
+                .filter(model.status == "completed")
+            )
 
-                query = query.order_by(Request.completed_at.desc())
-                rows = query.all()
+            # Keyword filter (title/description)
+            if search_input:
+                pattern = f"%{search_input}%"
+                query = query.filter(
+                    or_(
+                        model.title.ilike(pattern),
+                        model.description.ilike(pattern)
+                    )
+                )
 
-                result = []
-                for r in rows:
-                    result.append({
-                        "id": r.id,
-                        "pin_user_id": r.pin_user_id,
-                        "title": r.title,
-                        "description": r.description,
-                        "status": r.status,
-                        "category_name": r.category.name if r.category else "Misc",
-                        "service_type": r.category.name if r.category else "Misc",
-                        "created_at": r.created_at,
-                        "updated_at": r.updated_at,
-                        "completed_at": r.completed_at,
-                    }) # Build result list
-                return result # Return list of completed requests
+            # Category / Service Type filter
+            if service_type and service_type.lower() != "all":
+                query = query.join(model.category).filter(
+                    func.lower(Category.name) == service_type.lower()
+                )
 
-        except Exception as e:
-            print(f"Error searching completed CSR requests: {e}")
-            return [] # Return empty list on failure
+            # Date range filters
+            if completed_after:
+                query = query.filter(model.completed_at >= completed_after)
+            if completed_before:
+                query = query.filter(model.completed_at <= completed_before)
+
+            queries.append(query.order_by(model.completed_at.desc()))
+        return queries # One query per table, live first, each newest first
+
+    def completed_request_row(self, r):
+        return {
+            "id": r.id,
+            "pin_user_id": r.pin_user_id,
+            "title": r.title,
+            "description": r.description,
+            "status": r.status,
+            "category_name": r.category.name if r.category else "Misc",
+            "service_type": r.category.name if r.category else "Misc",
+            "created_at": r.created_at,
+            "updated_at": r.updated_at,
+            "completed_at": r.completed_at,
+        }
+
+    def query_completed_requests(self, filters: dict):
+        with get_db_session() as db:
+            queries = self.completed_requests_queries(db, filters)
+            rows = []
+            for query in queries:
+                rows.extend(query.all())
 
-    def get_csr_requests_available(self, csr_user_id: int = None):
-        try:
-            with get_db_session() as db:
-                # Query only pending requests
-                query = (
-                    db.query(Request)
-                    .options(joinedload(Request.category))
-                    .filter(func.lower(Request.status) == "pending")
-                    .order_by(Request.created_at.desc())
-                )
+            if len(queries) > 1:
+                rows.sort(key=lambda r: r.completed_at or datetime.min.replace(tzinfo=timezone.utc), reverse=True)
 
-                rows = query.all()
-                result = []
+            return [self.completed_request_row(r) for r in rows] # Return list of completed requests
 
-                for r in rows:
-                    # Check if this CSR has already shortlisted this request
-                    is_shortlisted = False
-                    if csr_user_id:
-                        is_shortlisted = (
-                            db.query(request_shortlists)
-                            .filter(
-                                request_shortlists.c.csr_user_id == csr_user_id,
-                                request_shortlists.c.request_id == r.id,
-                            )
-                            .first()
-                            is not None
-                        )
+    def count_completed_requests(self, filters: dict):
+        with get_db_session() as db:
+            return sum(query.order_by(None).count() for query in self.completed_requests_queries(db, filters))
 
-                    # Skip if already shortlisted
-                    if is_shortlisted:
-                        continue
+    def stream_completed_requests(self, filters: dict, chunk: int = 5000):
+        # Same rows as query_completed_requests, fetched `chunk` at a time from a server-side cursor (exports)
+        with get_db_session() as db:
+            for query in self.completed_requests_queries(db, filters):
+                for r in query.yield_per(chunk):
+                    yield self.completed_request_row(r)
 
-                    # Count total shortlistees
-                    shortlistees_count = (
-                        db.query(request_shortlists)
-                        .filter(request_shortlists.c.request_id == r.id)
-                        .count()
-                    )
+    def get_csr_requests_available(self, csr_user_id: int = None):
+        try:
+            with get_db_session() as db:
+                # Pending requests not yet shortlisted by this CSR, counts included (no per-row queries)
+                rows = db.execute(CSR_FEED_STMT, {"csr_user_id": csr_user_id}).all()
 
-                    result.append({
-                        "id": r.id,
-                        "pin_user_id": r.pin_user_id,
-                        "title": r.title,
-                        "description": r.description,
-                        "status": r.status,
-                        "category_name": r.category.name if r.category else "Misc",
-                        "assigned_to": r.assigned_to,
-                        "created_at": r.created_at,
-                        "updated_at": r.updated_at,
-                        "completed_at": r.completed_at,
-                        "my_shortlisted": False,
-                        "shortlistees_count": shortlistees_count,
-                    }) # Build result list
-                return result # Return list of available requests
+                return [
+                    {**row._mapping, "my_shortlisted": False} for row in rows
+                ] # Return list of available requests
 
         except Exception as e:
             print(f"[ERROR] get_csr_requests_available failed: {e}")
@@ -407,12 +594,6 @@ class PinRequestEntity:
                 result = []
 
                 for r in rows:
-                    shortlistees_count = (
-                        db.query(request_shortlists)
-                        .filter(request_shortlists.c.request_id == r.id)
-                        .count()
-                    )
-
                     result.append({
                         "id": r.id,
                         "pin_user_id": r.pin_user_id,
@@ -425,7 +606,7 @@ class PinRequestEntity:
                         "updated_at": r.updated_at,
                         "completed_at": r.completed_at,
                         "my_shortlisted": True,
-                        "shortlistees_count": shortlistees_count,
+                        "shortlistees_count": r.shortlist_count,
                     }) # Build result list
                 return result # Return list of shortlisted requests
 
@@ -460,13 +641,6 @@ class PinRequestEntity:
                 result = []
 
                 for r in rows:
-                    shortlistees_count = (
-                        db.query(func.count())
-                        .select_from(request_shortlists)
-                        .filter(request_shortlists.c.request_id == r.id)
-                        .scalar()
-                    ) # Count of shortlistees
-
                     result.append({
                         "id": r.id,
                         "pin_user_id": r.pin_user_id,
@@ -479,7 +653,7 @@ class PinRequestEntity:
                         "updated_at": r.updated_at,
                         "completed_at": r.completed_at,
                         "my_shortlisted": False,  # these are all NOT shortlisted
-                        "shortlistees_count": shortlistees_count or 0,
+                        "shortlistees_count": r.shortlist_count,
                     }) # Build result list
 
                 return result # Return list of search results
@@ -513,13 +687,6 @@ class PinRequestEntity:
                 result = []
 
                 for r in rows:
-                    shortlistees_count = (
-                        db.query(func.count())
-                        .select_from(request_shortlists)
-                        .filter(request_shortlists.c.request_id == r.id)
-                        .scalar()
-                    ) # Count of shortlistees
-
                     result.append({
                         "id": r.id,
                         "pin_user_id": r.pin_user_id,
@@ -532,7 +699,7 @@ class PinRequestEntity:
                         "updated_at": r.updated_at,
                         "completed_at": r.completed_at,
                         "my_shortlisted": True,  # these are all shortlisted
-                        "shortlistees_count": shortlistees_count or 0,
+                        "shortlistees_count": r.shortlist_count,
                     }) # Build result list
 
                 return result # Return list of search results
@@ -541,6 +708,27 @@ class PinRequestEntity:
             print(f"Error searching CSR shortlisted requests: {e}")
             return [] # empty list on failure
 
+    def get_trending_requests(self, limit: int = 20, category_id: int = None):
+        limit = max(1, min(TRENDING_LIMIT, int(limit or 20)))
+        try:
+            with get_db_session() as db:
+                stmt = TRENDING_STMT.limit(limit)
+                if category_id is not None:
+                    stmt = stmt.where(Request.category_id == category_id)
+                rows = db.execute(stmt).all()
+
+                now = datetime.now(timezone.utc)
+                result = []
+                for row in rows:
+                    item = {k: v for k, v in row._mapping.items() if k != "trend_score"}
+                    item["trend"] = round(decayed_score(row.trend_score, now), 3)
+                    result.append(item)
+                return result # Return the top pending requests, hottest first
+
+        except Exception as e:
+            print(f"[ERROR] get_trending_requests failed: {e}")
+            return [] # Return empty list on failure
+
     def shortlist_csr_requests(self, request_id: int, request_info: dict):
         csr_id = request_info.get("csr_id")
         if not csr_id:
@@ -548,30 +736,49 @@ class PinRequestEntity:
 
         try:
             with get_db_session() as db:
-                req = db.query(Request).filter(Request.id == request_id).first()
-                if not req:
-                    return "Request not found"
-
-                # Check if already shortlisted
-                existing = db.execute(
-                    select(request_shortlists).where(
-                        request_shortlists.c.request_id == request_id,
-                        request_shortlists.c.csr_user_id == csr_id
-                    )
-                ).first()
-
-                if existing:
-                    return "Request already shortlisted"
-
-                # Insert record into association table
-                db.execute(
-                    insert(request_shortlists).values(
-                        csr_user_id=csr_id,
-                        request_id=request_id,
+                # One statement: insert the link only if the request exists, and report what happened
+                req = (
+                    select(Request.id, Request.category_id, Request.pin_user_id)
+                    .where(Request.id == request_id)
+                    .cte("req")
+                )
+                ins = (
+                    pg_insert(request_shortlists)
+                    .from_select(["csr_user_id", "request_id"], select(literal(csr_id, Integer), req.c.id))
+                    .on_conflict_do_nothing()
+                    .returning(request_shortlists.c.request_id)
+                    .cte("ins")
+                )
+                # Event only for a link that was actually inserted
+                event = (
+                    insert(RequestEvent)
+                    .from_select(
+                        EVENT_COLUMNS,
+                        select(
+                            req.c.id, literal("shortlisted", String), req.c.category_id,
+                            literal("csr", String), literal(csr_id, Integer),
+                        ).join(ins, ins.c.request_id == req.c.id),
                     )
+                    .returning(RequestEvent.id)
+                    .cte("event")
                 )
+                # Trending score bumped in the same statement, again only for a new link
+                bump = bump_trend(select(ins.c.request_id), TREND_SHORTLIST_WEIGHT).returning(Request.id).cte("bump")
+                found, inserted, pin_user_id = db.execute(
+                    select(
+                        select(func.count()).select_from(req).scalar_subquery(),
+                        select(func.count()).select_from(ins).scalar_subquery(),
+                        select(req.c.pin_user_id).scalar_subquery(),
+                    ).add_cte(event).add_cte(bump)
+                ).one()
+                if inserted:
+                    evict_requests(db, [request_id], [pin_user_id])
                 db.commit() # Commit the changes
-                db.refresh(req) # Refresh the instance, reflect latest changes
+
+                if not found:
+                    return "Request not found"
+                if not inserted:
+                    return "Request already shortlisted"
 
                 return True # Return True on successful addition to shortlist
 
@@ -582,47 +789,144 @@ class PinRequestEntity:
     def remove_from_shortlist(self, request_id: int, csr_id: int):
         try:
             with get_db_session() as db:
-                # Check if the record exists
-                existing = db.execute(
-                    select(request_shortlists).where(
+                # Delete record, RETURNING tells us whether it existed
+                deleted = (
+                    delete(request_shortlists)
+                    .where(
                         request_shortlists.c.request_id == request_id,
                         request_shortlists.c.csr_user_id == csr_id
                     )
+                    .returning(request_shortlists.c.request_id)
+                    .cte("deleted")
+                )
+                # Event written in the same statement, only if a link was removed
+                event = (
+                    events_from(select(deleted.c.request_id), "unshortlisted", "csr", csr_id)
+                    .returning(RequestEvent.id)
+                    .cte("event")
+                )
+                removed = db.execute(
+                    select(
+                        deleted.c.request_id,
+                        select(Request.pin_user_id).where(Request.id == request_id).scalar_subquery(),
+                    ).add_cte(event)
                 ).first()
+                if removed:
+                    evict_requests(db, [request_id], [removed[1]])
 
-                if not existing:
+                db.commit() # Commit the changes
+
+                if not removed:
                     return "Not shortlisted"
 
-                # Delete record
-                db.execute(
-                    delete(request_shortlists).where(
-                        request_shortlists.c.request_id == request_id,
-                        request_shortlists.c.csr_user_id == csr_id
-                    )
+                return True  # success
+
+        except Exception as e:
+            print(f"Error removing from shortlist: {e}")
+            return f"Failed to remove from shortlist: {str(e)}"
+
+    def bulk_shortlist_csr_requests(self, request_info: dict):
+        csr_id = request_info.get("csr_id")
+        request_ids = list(dict.fromkeys(request_info.get("request_ids") or []))  # De-duplicate, keep order
+        if not csr_id or not request_ids:
+            return "csr_id and request_ids are required"
+        if len(request_ids) > BULK_LIMIT:
+            return f"Cannot shortlist more than {BULK_LIMIT} requests at once"
+
+        try:
+            with get_db_session() as db:
+                # Validate all requests in one query
+                statuses = dict(
+                    db.execute(select(Request.id, Request.status).where(Request.id.in_(request_ids))).all()
                 )
+                pending_ids = [rid for rid in request_ids if (statuses.get(rid) or "").lower() == "pending"]
+
+                # One multi-row insert; existing links are skipped
+                inserted = set()
+                if pending_ids:
+                    inserted = set(
+                        db.execute(
+                            pg_insert(request_shortlists)
+                            .values([{"csr_user_id": csr_id, "request_id": rid} for rid in pending_ids])
+                            .on_conflict_do_nothing()
+                            .returning(request_shortlists.c.request_id)
+                        ).scalars().all()
+                    )
+                if inserted:
+                    db.execute(events_from(list(inserted), "shortlisted", "csr", csr_id))
+                    db.execute(bump_trend(list(inserted), TREND_SHORTLIST_WEIGHT))
+                    evict_requests(db, inserted)
+                db.commit() # Commit the changes
+
+                results = []
+                for rid in request_ids:
+                    if rid not in statuses:
+                        outcome = "Request not found"
+                    elif rid not in pending_ids:
+                        outcome = f"Cannot shortlist a '{statuses[rid]}' request"
+                    elif rid not in inserted:
+                        outcome = "Request already shortlisted"
+                    else:
+                        outcome = True
+                    results.append({"request_id": rid, "result": outcome})
+
+                return results # Return per-request outcome list
+
+        except Exception as e:
+            print(f"Error bulk adding to shortlist: {e}")
+            return f"Failed to add to shortlist: {str(e)}"
+
+    def bulk_remove_from_shortlist(self, request_info: dict):
+        csr_id = request_info.get("csr_id")
+        request_ids = list(dict.fromkeys(request_info.get("request_ids") or []))  # De-duplicate, keep order
+        if not csr_id or not request_ids:
+            return "csr_id and request_ids are required"
+        if len(request_ids) > BULK_LIMIT:
+            return f"Cannot remove more than {BULK_LIMIT} requests at once"
 
+        try:
+            with get_db_session() as db:
+                # One multi-row delete, RETURNING tells us which links existed
+                removed = set(
+                    db.execute(
+                        delete(request_shortlists)
+                        .where(
+                            request_shortlists.c.csr_user_id == csr_id,
+                            request_shortlists.c.request_id.in_(request_ids),
+                        )
+                        .returning(request_shortlists.c.request_id)
+                    ).scalars().all()
+                )
+                if removed:
+                    db.execute(events_from(list(removed), "unshortlisted", "csr", csr_id))
+                    evict_requests(db, removed)
                 db.commit() # Commit the changes
 
-                return True  # success
+                return [
+                    {"request_id": rid, "result": True if rid in removed else "Not shortlisted"}
+                    for rid in request_ids
+                ] # Return per-request outcome list
 
         except Exception as e:
-            print(f"Error removing from shortlist: {e}")
+            print(f"Error bulk removing from shortlist: {e}")
             return f"Failed to remove from shortlist: {str(e)}"
-        
-    def increment_request_view(self, request_id: int):
+
+    def increment_request_view(self, request_id: int, viewer: str = None):
         try:
             with get_db_session() as db:
-                req = db.query(Request).filter(Request.id == request_id).first()
-                if not req:
-                    return "Request not found" # Return str if request does not exist
+                found = db.execute(VIEW_INCREMENT_STMT, {"request_id": request_id}).first()
+                db.commit() # Commit the changes
 
-                # Only increment if status is "pending"
-                if req.status and req.status.lower() == "pending":
-                    req.view = (req.view or 0) + 1
-                    db.commit() # Commit the changes
-                    db.refresh(req) # Refresh the instance, reflect latest changes
+                if not found:
+                    return "Request not found" # Return str if request does not exist
 
-                return True  # success
+                if found.counted:
+                    # Same views as the `view` column, counted per day in memory and written in batches
+                    RequestSeriesEntity().record_view(request_id)
+                if viewer:
+                    # Distinct viewers are sketched in memory and written in batches
+                    ViewerSketchEntity().record_view(request_id, found.pin_user_id, found.category_id, viewer)
+                return True  # success (non-pending requests are left unchanged)
 
         except Exception as e:
             print(f"Error incrementing request view: {e}")
@@ -630,31 +934,8 @@ class PinRequestEntity:
 
     def get_csr_requests_completed(self):
         try:
-            with get_db_session() as db:
-                rows = (
-                    db.query(Request)
-                    .options(joinedload(Request.category))
-                    .filter(func.lower(Request.status) == "completed")
-                    .order_by(Request.completed_at.desc())
-                    .all()
-                )
-
-                result = []
-                for r in rows:
-                    result.append({
-                        "id": r.id,
-                        "pin_user_id": r.pin_user_id,
-                        "title": r.title,
-                        "description": r.description,
-                        "status": r.status,
-                        "category_name": r.category.name if r.category else "Misc",
-                        "service_type": r.category.name if r.category else "Misc",
-                        "created_at": r.created_at,
-                        "updated_at": r.updated_at,
-                        "completed_at": r.completed_at,
-                    }) # Build result list
-
-                return result # Return list of completed requests
+            # No date range, so archived requests are included; evicted when a request completes
+            return cache.get_or_set(CSR_COMPLETED_KEY, lambda: self.query_completed_requests({}))
 
         except Exception as e:
             print(f"[ERROR] get_csr_completed_requests failed: {e}")
@@ -662,72 +943,105 @@ class PinRequestEntity:
     
     def search_csr_requests_completed(self, filters: dict):
         try:
-            search_input = (filters.get("search_input") or "").strip()
-            service_type = (filters.get("service_type") or "").strip()
-            completed_after = filters.get("completed_after")
-            completed_before = filters.get("completed_before")
+            return self.query_completed_requests(filters) # Return list of completed requests
 
-            with get_db_session() as db:
-                # Base query: completed requests
-                query = (
-                    db.query(Request)
-                    .options(joinedload(Request.category))
-                    .filter(Request.status == "completed")
-                )
+        except Exception as e:
+            print(f"Error searching completed CSR requests: {e}")
+            return [] # Return empty list on failure
 
-                # Keyword filter (title/description)
-                if search_input:
-                    pattern = f"%{search_input}%"
-                    query = query.filter(
-                        or_(
-                            Request.title.ilike(pattern),
-                            Request.description.ilike(pattern)
-                        )
-                    )
+    def request_filter_clauses(self, filters: dict):
+        # Shared by the list and facets endpoints so counts always match the listed rows
+        clauses = []
 
-                # Category / Service Type filter
-                if service_type and service_type.lower() != "all":
-                    query = query.join(Category).filter(
-                        func.lower(Category.name) == service_type.lower()
-                    )
+        if filters.get("status"):
+            clauses.append(Request.status == filters["status"])
 
-                # Date range filters
-                if completed_after:
-                    query = query.filter(Request.completed_at >= completed_after)
-                if completed_before:
-                    query = query.filter(Request.completed_at <= completed_before)
+        if filters.get("category_id"):
+            clauses.append(Request.category_id == int(filters["category_id"]))
 
-                query = query.order_by(Request.completed_at.desc())
-                rows = query.all()
+        if filters.get("pin_user_id"):
+            clauses.append(Request.pin_user_id == int(filters["pin_user_id"]))
 
-                result = []
-                for r in rows:
-                    result.append({
-                        "id": r.id,
-                        "pin_user_id": r.pin_user_id,
-                        "title": r.title,
-                        "description": r.description,
-                        "status": r.status,
-                        "category_name": r.category.name if r.category else "Misc",
-                        "service_type": r.category.name if r.category else "Misc",
-                        "created_at": r.created_at,
-                        "updated_at": r.updated_at,
-                        "completed_at": r.completed_at,
-                    }) # Build result list
-                return result # Return list of completed requests
+        if filters.get("csr_user_id"):
+            clauses.append(Request.assigned_to == int(filters["csr_user_id"]))
+
+        if filters.get("created_from"):
+            clauses.append(Request.created_at >= filters["created_from"])
+
+        if filters.get("created_to"):
+            clauses.append(Request.created_at < filters["created_to"])
+
+        if filters.get("search_input"):
+            pattern = f"%{filters['search_input']}%"
+            clauses.append(or_(Request.title.ilike(pattern), Request.description.ilike(pattern)))
+
+        return clauses
+
+    def get_request_facets(self, filters: dict):
+        try:
+            with get_db_session() as db:
+                # One pass: GROUPING SETS ((status), (category_id), (assigned_to)),
+                # answered from ix_requests_facets without touching the heap
+                rows = db.execute(
+                    select(
+                        Request.status,
+                        Request.category_id,
+                        Request.assigned_to,
+                        # Bitmask of the columns not in the row's set: 1 = status, 2 = category, 3 = assigned CSR
+                        func.grouping(Request.status, Request.category_id).label("grouping_set"),
+                        func.count().label("count"),
+                    )
+                    .where(*self.request_filter_clauses(filters))
+                    .group_by(func.grouping_sets(Request.status, Request.category_id, Request.assigned_to))
+                ).all()
+
+                categories = get_loader(db, Category).load_many([r.category_id for r in rows if r.grouping_set == 2])
+
+                status_counts = {}
+                category_counts = {}
+                csr_counts = []
+                for row in rows:
+                    if row.grouping_set == 1:
+                        status_counts[row.status] = row.count
+                    elif row.grouping_set == 2:
+                        category = categories.get(row.category_id)
+                        name = category.name if category else "Uncategorized"
+                        category_counts[name] = category_counts.get(name, 0) + row.count
+                    elif row.assigned_to is not None:
+                        csr_counts.append({"csr_user_id": row.assigned_to, "count": row.count})
+
+                return {
+                    "total": sum(status_counts.values()),
+                    "status": status_counts,
+                    "categories": category_counts,
+                    "assigned_to": sorted(csr_counts, key=lambda c: -c["count"]),
+                } # Return facet counts for the scope
 
         except Exception as e:
-            print(f"Error searching completed CSR requests: {e}")
-            return [] # Return empty list on failure
+            print(f"Error fetching request facets: {e}")
+            return f"Failed to fetch request facets: {str(e)}" # Return str on failure
 
-    def get_all_requests(self):
+    def get_all_requests(self, filters: dict = None, page: int = None, page_size: int = None):
         try:
             with get_db_session() as db:
                 # Load category + shortlistees
-                requests = db.query(Request).options(
-                    joinedload(Request.category),
-                    joinedload(Request.shortlistees)
-                ).all()
+                query = (
+                    db.query(Request)
+                    .options(
+                        joinedload(Request.category),
+                        selectinload(Request.shortlistees).joinedload(CSR.user)
+                    )
+                    .filter(*self.request_filter_clauses(filters or {}))
+                    .order_by(Request.created_at.desc(), Request.id.desc())
+                )
+
+                # Paginate only when asked, the unfiltered call keeps returning everything
+                if page_size:
+                    page = max(1, int(page or 1))
+                    page_size = max(1, min(500, int(page_size)))
+                    query = query.limit(page_size).offset((page - 1) * page_size)
+
+                requests = query.all()
 
                 result = []
                 for req in requests:
@@ -741,11 +1055,11 @@ class PinRequestEntity:
                         "created_at": req.created_at,
                         "updated_at": req.updated_at,
                         "view": req.view,
-                        "shortlistees_count": len(req.shortlistees),
+                        "shortlistees_count": req.shortlist_count,
                         "shortlistees": [
                             {
-                                "user_id": csr.user_id,
-                                "username": csr.username,
+                                "user_id": csr.csr_user_id, # What assigned_to takes
+                                "username": csr.user.username if csr.user else None,
                                 "company": csr.company
                             }
                             for csr in req.shortlistees
@@ -758,6 +1072,61 @@ class PinRequestEntity:
             print(f"Error fetching all requests: {e}")
             return []  # Return empty list on failure
         
+    def get_request_changes(self, since: str = None, scope: str = None, limit: int = None):
+        try:
+            since_xid, since_id = parse_change_cursor(since)
+            pin_user_id = parse_change_scope(scope)
+        except ValueError as e:
+            return f"Invalid changes request: {str(e)}" # Return str on a bad cursor or scope
+        limit = max(1, min(CHANGES_LIMIT, int(limit or CHANGES_LIMIT)))
+
+        try:
+            with get_db_session() as db:
+                horizon = xid_horizon(db)
+
+                # Only finished transactions: anything still running is stamped >= horizon and shows up next time
+                if since_id is None:
+                    after_cursor = Request.change_xid > since_xid
+                else:
+                    after_cursor = tuple_(Request.change_xid, Request.id) > tuple_(since_xid, since_id)
+                stmt = CHANGES_STMT.where(after_cursor, Request.change_xid < horizon).limit(limit)
+                if pin_user_id is not None:
+                    stmt = stmt.where(Request.pin_user_id == pin_user_id)
+                rows = db.execute(stmt).all()
+
+                # A full page stops mid-way; otherwise everything below the horizon has been sent
+                has_more = len(rows) == limit
+                if has_more:
+                    upper = rows[-1].change_xid
+                    cursor = f"{upper}:{rows[-1].id}"
+                else:
+                    upper = horizon - 1
+                    cursor = str(max(upper, since_xid))
+
+                # Tombstones of every transaction the page reached into (at most once per transaction)
+                tombstones = select(Tombstone).where(Tombstone.change_xid > since_xid, Tombstone.change_xid <= upper)
+                if pin_user_id is not None:
+                    tombstones = tombstones.where(
+                        or_(Tombstone.entity == "category", Tombstone.pin_user_id == pin_user_id)
+                    )
+                deleted = db.execute(tombstones.order_by(Tombstone.id)).scalars().all()
+
+                return {
+                    "changes": [
+                        {k: v for k, v in row._mapping.items() if k != "change_xid"} for row in rows
+                    ],
+                    "deleted": [
+                        {"id": t.entity_id, "reason": t.reason} for t in deleted if t.entity == "request"
+                    ],
+                    "deleted_categories": [t.entity_id for t in deleted if t.entity == "category"],
+                    "cursor": cursor,
+                    "has_more": has_more,
+                } # Return the changes since the cursor and the cursor to send next time
+
+        except Exception as e:
+            print(f"Error fetching request changes: {e}")
+            return f"Failed to fetch request changes: {str(e)}" # Return str on failure
+
     def update_request(self, request_id: int, body: dict):
         try:
             with get_db_session() as db:
@@ -772,15 +1141,15 @@ class PinRequestEntity:
                 if not req:
                     return "Request not found" # Return str if request does not exist
 
-                # Handle assignment
-                assigned_to = body.get("assigned_to")
+                # Handle assignment; an already assigned request keeps its CSR unless a new one is given
+                assigned_to = body.get("assigned_to") or req.assigned_to
                 if not assigned_to:
                     if not req.shortlistees or len(req.shortlistees) == 0:
                         return "No shortlistees available to assign"
                     assigned_csr = random.choice(req.shortlistees)
-                    assigned_to = assigned_csr.user_id
+                    assigned_to = assigned_csr.csr_user_id
                 else:
-                    csr = db.query(CSR).filter(CSR.user_id == assigned_to).first()
+                    csr = get_loader(db, CSR, CSR.csr_user_id).load(assigned_to)
                     if not csr:
                         return "CSR not found" # Return str if CSR does not exist
 
@@ -790,6 +1159,21 @@ class PinRequestEntity:
                 if new_status not in valid_statuses:
                     return "Invalid status value" # Return str on invalid status
 
+                # Record the transitions that actually happen
+                if assigned_to != req.assigned_to:
+                    record_event(db, req.id, "assigned", req.category_id, "pm", None)
+                if new_status == "completed" and req.status != "completed":
+                    record_event(db, req.id, "completed", req.category_id, "csr", assigned_to)
+                    # Reopening keeps completed_at, so it is only unset on the first completion; a sketch
+                    # sample cannot be removed, so a re-completion is not added again (rebuild_digests
+                    # re-derives every digest from the latest completed_at)
+                    first_completion = req.completed_at is None
+                    req.completed_at = datetime.now(timezone.utc)
+                    if first_completion:
+                        CompletionDigestEntity().record_completion(db, req.category_id, req.created_at, req.completed_at)
+                    evict_on_commit(db, CSR_COMPLETED_KEY)
+                evict_requests(db, [req.id], [req.pin_user_id])
+
                 # Apply updates
                 req.assigned_to = assigned_to
                 req.status = new_status
@@ -802,16 +1186,126 @@ class PinRequestEntity:
         except Exception as e:
             print(f"Error updating request: {e}")
             return f"Failed to update request: {str(e)}" # Return str on failure
-        
+
+    def batch_assign_requests(self, body: dict):
+        request_ids = body.get("request_ids")  # None -> all pending requests
+        if request_ids is not None and len(request_ids) == 0:
+            return {"assigned": 0, "assignments": [], "unassigned": []} # Nothing asked for
+
+        try:
+            try:
+                capacity = int(body.get("capacity", 10))  # Max open assignments per CSR
+            except (TypeError, ValueError):
+                return "Capacity must be a number"
+            if capacity < 1:
+                return "Capacity must be at least 1"
+
+            with get_db_session() as db:
+                # Lock pending requests that have shortlistees; rows locked by a parallel run are skipped.
+                # FOR NO KEY UPDATE: shortlist inserts (FK KEY SHARE on the request) are not blocked
+                query = (
+                    select(Request.id)
+                    .where(
+                        Request.status == "pending",
+                        exists().where(request_shortlists.c.request_id == Request.id),
+                    )
+                    .order_by(Request.created_at.asc())
+                    .with_for_update(skip_locked=True, key_share=True)
+                )
+                if request_ids is not None:
+                    query = query.where(Request.id.in_(request_ids))
+
+                locked_ids = db.execute(query).scalars().all()
+                if not locked_ids:
+                    return {"assigned": 0, "assignments": [], "unassigned": []}
+
+                # Shortlistees of every locked request, in one query
+                shortlistees = {}
+                for request_id, csr_user_id in db.execute(
+                    select(request_shortlists.c.request_id, request_shortlists.c.csr_user_id)
+                    .where(request_shortlists.c.request_id.in_(locked_ids))
+                ):
+                    shortlistees.setdefault(request_id, []).append(csr_user_id)
+
+                # Lock the candidate CSRs too, so parallel runs never push a CSR over capacity;
+                # NO KEY UPDATE still lets concurrent shortlists take their FK KEY SHARE lock
+                candidate_csrs = {csr for csrs in shortlistees.values() for csr in csrs}
+                locked_csrs = set(
+                    db.execute(
+                        select(CSR.csr_user_id)
+                        .where(CSR.csr_user_id.in_(candidate_csrs))
+                        .with_for_update(skip_locked=True, key_share=True)
+                    ).scalars().all()
+                )
+
+                # Current open load per CSR
+                load = {csr: 0 for csr in locked_csrs}
+                for csr_user_id, open_count in db.execute(
+                    select(Request.assigned_to, func.count(Request.id))
+                    .where(Request.assigned_to.in_(locked_csrs), Request.status == "assigned")
+                    .group_by(Request.assigned_to)
+                ):
+                    load[csr_user_id] = open_count
+
+                # Greedy balancing: most constrained requests first, each to its least loaded shortlistee
+                assignments = {}
+                unassigned = []
+                for request_id in sorted(locked_ids, key=lambda rid: len(shortlistees.get(rid, []))):
+                    options = [csr for csr in shortlistees.get(request_id, []) if load.get(csr, capacity) < capacity]
+                    if not options:
+                        unassigned.append(request_id)
+                        continue
+
+                    csr = min(options, key=lambda c: (load[c], c))
+                    assignments[request_id] = csr
+                    load[csr] += 1
+
+                # Apply all assignments in a few multi-row UPDATEs, same transaction as the locks;
+                # nothing is read back, so with psycopg 3 they are pipelined into one round trip
+                items = list(assignments.items())
+                with pipeline(db):
+                    for i in range(0, len(items), 1000):
+                        chunk = dict(items[i:i + 1000])
+                        db.execute(
+                            update(Request)
+                            .where(Request.id.in_(list(chunk)), Request.status == "pending")
+                            .values(assigned_to=case(chunk, value=Request.id), status="assigned")
+                            .execution_options(synchronize_session=False)
+                        )
+                        db.execute(events_from(list(chunk), "assigned", "pm"))
+                if assignments:
+                    evict_requests(db, list(assignments))
+
+                db.commit() # Commit once, releases all row locks
+
+                return {
+                    "assigned": len(assignments),
+                    "assignments": [
+                        {"request_id": rid, "csr_user_id": csr} for rid, csr in assignments.items()
+                    ],
+                    "unassigned": unassigned,
+                } # Return summary of the batch
+
+        except Exception as e:
+            print(f"Error batch assigning requests: {e}")
+            return f"Failed to batch assign requests: {str(e)}" # Return str on failure
+
     def view_request(self, request_id: int):
+        return cache.get_or_set(request_key(request_id), lambda: self.fetch_request(request_id))
+
+    def fetch_request(self, request_id: int):
         try:
             with get_db_session() as db:
-                req = (
-                    db.query(Request)
-                    .options(joinedload(Request.shortlistees), joinedload(Request.category))
-                    .filter(Request.id == request_id)
-                    .first()
-                ) # Fetch request with related data
+                req = None
+                for model in (Request, ArchivedRequest): # Completed requests may have been archived
+                    req = (
+                        db.query(model)
+                        .options(joinedload(model.shortlistees).joinedload(CSR.user), joinedload(model.category))
+                        .filter(model.id == request_id)
+                        .first()
+                    ) # Fetch request with related data
+                    if req:
+                        break
 
                 if not req:
                     return f"Request with ID {request_id} not found" # Return str if request does not exist
@@ -826,11 +1320,11 @@ class PinRequestEntity:
                     "created_at": req.created_at,
                     "updated_at": req.updated_at,
                     "view": req.view,
-                    "shortlistees_count": len(req.shortlistees),
+                    "shortlistees_count": req.shortlist_count,
                     "shortlistees": [
                         {
-                            "user_id": csr.user_id,
-                            "username": csr.username,
+                            "user_id": csr.csr_user_id, # What assigned_to takes
+                            "username": csr.user.username if csr.user else None,
                             "company": csr.company,
                         }
                         for csr in req.shortlistees
@@ -841,172 +1335,216 @@ class PinRequestEntity:
             print(f"Error fetching request {request_id}: {e}")
             return f"Failed to fetch request: {str(e)}" # Return str on failure
 
-    def generate_pm_daily_report(self):
+    def generate_pm_daily_report(self, day: str = None, page: int = 1, page_size: int = 100):
+        now = datetime.now(timezone.utc)
         try:
-            target_date = date.today()
-
-            start_dt = datetime.combine(target_date, datetime.min.time())
-            end_dt = datetime.combine(target_date, datetime.max.time())
-
-            with get_db_session() as db:
-                # --- Requests created today ---
-                created_today = (
-                    db.query(Request)
-                    .options(joinedload(Request.category))
-                    .filter(Request.created_at >= start_dt, Request.created_at <= end_dt)
-                )
+            target_date = date.fromisoformat(day) if day else now.date()
+        except ValueError:
+            return {"error": "Invalid date, expected YYYY-MM-DD"}
+
+        # UTC day, like the weekly and monthly reports; never the server's local timezone
+        start_dt = datetime.combine(target_date, datetime.min.time(), tzinfo=timezone.utc)
+        end_dt = start_dt + timedelta(days=1)
+
+        # Finished days never change: compute once, then serve the stored snapshot
+        report = ReportSnapshotEntity().get_or_create(
+            "daily",
+            target_date.isoformat(),
+            period_closed(end_dt, now),
+            lambda: self.compute_pm_daily_report(target_date, start_dt, end_dt),
+        )
+        return self.add_report_requests_page(report, start_dt, range_activity(start_dt, end_dt), page, page_size)
+
+    def aggregate_report(self, db, start, end, event_types, **measures):
+        # One range scan over request_events: ROLLUP(category) = GROUPING SETS ((category), ()),
+        # each measure counts distinct requests with a matching event (COUNT(DISTINCT ...) FILTER (WHERE ...))
+        request_count = func.count(distinct(RequestEvent.request_id))
+        columns = [
+            Category.name.label("category"),
+            func.grouping(Category.name).label("is_total"),
+            request_count.label("total"),
+        ] + [request_count.filter(condition).label(name) for name, condition in measures.items()]
+
+        rows = db.execute(
+            select(*columns)
+            .select_from(RequestEvent)
+            .outerjoin(Category, RequestEvent.category_id == Category.id)
+            .where(event_window(start, end, *event_types))
+            .group_by(func.rollup(Category.name))
+        ).all()
+
+        keys = ["total"] + list(measures)
+        totals = {key: 0 for key in keys}
+        by_category = {}
+        for row in rows:
+            counts = {key: int(getattr(row, key) or 0) for key in keys}
+            if row.is_total:
+                totals = counts
+            else:
+                by_category[row.category or "Uncategorized"] = counts
+
+        return totals, by_category # Return (summary, per-category counts)
+
+    def add_report_requests_page(self, report: dict, since, activity, page: int, page_size: int):
+        # The per-request listing is paginated and never part of the (snapshotted) summary;
+        # activity(rows) filters the live (and, for old periods, archived) rows of report_requests(since);
+        # page_size=0 returns the report alone, which is what may be cached for a closed period
+        if "error" in report or page_size == 0:
+            return report
+
+        page = max(1, int(page or 1))
+        page_size = max(1, min(500, int(page_size or 100)))
+        r = report_requests(since)
 
-                # --- Requests assigned today ---
-                assigned_today = (
-                    db.query(Request)
-                    .options(joinedload(Request.category))
-                    .filter(
-                        Request.updated_at >= start_dt,
-                        Request.updated_at <= end_dt,
-                        Request.status == "assigned",
-                    )
-                )
-
-                # --- Requests completed today ---
-                completed_today = (
-                    db.query(Request)
-                    .options(joinedload(Request.category))
-                    .filter(
-                        Request.completed_at >= start_dt,
-                        Request.completed_at <= end_dt,
-                        Request.status == "completed",
-                    )
+        with get_db_session() as db:
+            rows = db.execute(
+                select(
+                    r.c.id, r.c.title, r.c.status, Category.name.label("category"),
+                    r.c.created_at, r.c.updated_at, r.c.completed_at,
                 )
-
-                # ✅ Collect only those requests that had *any* activity today
-                all_requests_today = (
-                    db.query(Request)
-                    .options(joinedload(Request.category))
-                    .filter(
-                        ((Request.created_at >= start_dt) & (Request.created_at <= end_dt))
-                        | ((Request.updated_at >= start_dt) & (Request.updated_at <= end_dt))
-                        | ((Request.completed_at >= start_dt) & (Request.completed_at <= end_dt))
-                    )
-                    .order_by(Request.id.asc())
-                    .all()
+                .outerjoin(Category, r.c.category_id == Category.id)
+                .where(activity(r))
+                .order_by(r.c.id.asc())
+                .limit(page_size + 1)
+                .offset((page - 1) * page_size)
+            ).all()
+
+        report["requests"] = [
+            {
+                "id": r.id,
+                "title": r.title,
+                "status": r.status,
+                "category": r.category or "Uncategorized",
+                "created_at": r.created_at.isoformat() if r.created_at else None,
+                "updated_at": r.updated_at.isoformat() if r.updated_at else None,
+                "completed_at": r.completed_at.isoformat() if r.completed_at else None,
+            }
+            for r in rows[:page_size]
+        ]
+        report["requests_page"] = {"page": page, "page_size": page_size, "has_more": len(rows) > page_size}
+        return report
+
+    def compute_pm_daily_report(self, target_date: date, start_dt: datetime, end_dt: datetime):
+        try:
+            with get_db_session() as db:
+                # ✅ One aggregate over today's created / assigned / completed events
+                totals, by_category = self.aggregate_report(
+                    db,
+                    start_dt,
+                    end_dt,
+                    REPORT_EVENTS,
+                    **{name: RequestEvent.event_type == name for name in REPORT_EVENTS},
                 )
 
-                summary = {
-                    "total": len(all_requests_today),
-                    "created": created_today.count(),
-                    "assigned": assigned_today.count(),
-                    "completed": completed_today.count(),
-                }
-
-                requests_out = [
-                    {
-                        "id": r.id,
-                        "title": r.title,
-                        "status": r.status,
-                        "category": r.category.name if r.category else "Uncategorized",
-                        "created_at": r.created_at.isoformat() if r.created_at else None,
-                        "updated_at": r.updated_at.isoformat() if r.updated_at else None,
-                        "completed_at": r.completed_at.isoformat() if r.completed_at else None,
-                    }
-                    for r in all_requests_today
-                ]
-
                 return {
                     "date": target_date.isoformat(),
-                    "summary": summary,
-                    "requests": requests_out,
+                    "summary": totals,
+                    "categories": {name: row["total"] for name, row in by_category.items()},
                 }
 
         except Exception as e:
             print(f"[ERROR] generate_daily_report failed: {e}")
             return {"error": f"Failed to generate daily report: {str(e)}"}
 
-        
-    def generate_pm_weekly_report(self):
+    def generate_pm_weekly_report(self, week: str = None, page: int = 1, page_size: int = 100):
+        now = datetime.now(timezone.utc)
+        if not week:
+            # Rolling last 7 days, always live
+            report = ReportSnapshotEntity().get_or_create(
+                "weekly", None, False, lambda: self.compute_pm_weekly_report(now - timedelta(days=7), now)
+            )
+            return self.add_report_requests_page(
+                report, now - timedelta(days=7), range_activity(now - timedelta(days=7), now), page, page_size
+            )
+
+        try:
+            # Accept an ISO week ("2025-W41") or any date inside the week
+            if "W" in week.upper():
+                year, week_no = week.upper().split("-W")
+                monday = date.fromisocalendar(int(year), int(week_no), 1)
+            else:
+                day = date.fromisoformat(week)
+                monday = day - timedelta(days=day.weekday())
+        except ValueError:
+            return {"error": "Invalid week, expected YYYY-Www or YYYY-MM-DD"}
+
+        week_start = datetime.combine(monday, datetime.min.time(), tzinfo=timezone.utc)
+        week_end = week_start + timedelta(days=7)
+        iso_year, iso_week, _ = monday.isocalendar()
+
+        report = ReportSnapshotEntity().get_or_create(
+            "weekly",
+            f"{iso_year}-W{iso_week:02d}",
+            period_closed(week_end, now),
+            lambda: self.compute_pm_weekly_report(week_start, week_end),
+        )
+        return self.add_report_requests_page(report, week_start, range_activity(week_start, week_end), page, page_size)
+
+    def compute_pm_weekly_report(self, start: datetime, end: datetime):
         try:
             with get_db_session() as db:
-                now = datetime.now(timezone.utc)
-                week_ago = now - timedelta(days=7)
-
-                # Fetch relevant requests
-                requests = (
-                    db.query(Request)
-                    .options(joinedload(Request.category))
-                    .filter(
-                        or_(
-                            Request.created_at >= week_ago,
-                            Request.updated_at >= week_ago,
-                            Request.completed_at >= week_ago,
-                            Request.updated_at >= week_ago,
-                        )
-                    )
-                    .all()
+                # Summary and per-category counts in one GROUPING SETS query
+                totals, by_category = self.aggregate_report(
+                    db,
+                    start,
+                    end,
+                    REPORT_EVENTS,
+                    **{name: RequestEvent.event_type == name for name in REPORT_EVENTS},
                 )
 
-                if not requests:
-                    return {
-                        "range": {
-                            "start": week_ago.date().isoformat(),
-                            "end": now.date().isoformat(),
-                        },
-                        "summary": {"total": 0, "created": 0, "assigned": 0, "completed": 0},
-                        "categories": {},
-                        "created_by_category": {},
-                        "assigned_by_category": {},
-                        "completed_by_category": {},
-                        "requests": [],
-                    } # Return empty report if no requests
-                
-                # Filter requests by activity
-                created = [r for r in requests if r.created_at and r.created_at >= week_ago]
-                assigned = [r for r in requests if r.status == "assigned" and r.updated_at and r.updated_at >= week_ago]
-                completed = [r for r in requests if r.status == "completed" and r.completed_at and r.completed_at >= week_ago]
-
-                # Compute category counts
-                categories = Counter(getattr(r.category, "name", "Uncategorized") for r in requests)
-                created_by_category = Counter(getattr(r.category, "name", "Uncategorized") for r in created)
-                assigned_by_category = Counter(getattr(r.category, "name", "Uncategorized") for r in assigned)
-                completed_by_category = Counter(getattr(r.category, "name", "Uncategorized") for r in completed)
+                def nonzero(key):
+                    return {name: row[key] for name, row in by_category.items() if row[key]}
 
                 return {
                     "range": {
-                        "start": week_ago.date().isoformat(),
-                        "end": now.date().isoformat(),
-                    },
-                    "summary": {
-                        "total": len(requests),
-                        "created": len(created),
-                        "assigned": len(assigned),
-                        "completed": len(completed),
+                        "start": start.date().isoformat(),
+                        "end": (end - timedelta(microseconds=1)).date().isoformat(),
                     },
-                    "categories": dict(categories),
-                    "created_by_category": dict(created_by_category),
-                    "assigned_by_category": dict(assigned_by_category),
-                    "completed_by_category": dict(completed_by_category),
-                    "requests": [
-                        {
-                            "id": r.id,
-                            "title": r.title,
-                            "status": r.status,
-                            "category": getattr(r.category, "name", "Uncategorized"),
-                            "created_at": r.created_at.isoformat() if r.created_at else None,
-                            "updated_at": r.updated_at.isoformat() if r.updated_at else None,
-                            "completed_at": r.completed_at.isoformat() if r.completed_at else None,
-                        }
-                        for r in requests
-                    ],
+                    "summary": totals,
+                    "categories": nonzero("total"),
+                    "created_by_category": nonzero("created"),
+                    "assigned_by_category": nonzero("assigned"),
+                    "completed_by_category": nonzero("completed"),
+                    "unique_viewers": ViewerSketchEntity().report_viewers(
+                        db, start.date(), (end - timedelta(microseconds=1)).date() + timedelta(days=1)
+                    ),
+                    "completion_time": CompletionDigestEntity().report_percentiles(
+                        db, start.date(), (end - timedelta(microseconds=1)).date() + timedelta(days=1)
+                    ),
                 } # Return the report
 
         except Exception as e:
             print(f"Error generating weekly report: {e}")
             return {"error": f"Failed to generate weekly report: {str(e)}"} # Return str on failure
 
-    def generate_pm_monthly_report(self):
+    def generate_pm_monthly_report(self, month: str = None, page: int = 1, page_size: int = 100):
+        now = datetime.now(timezone.utc)
         try:
-            with get_db_session() as db:
-                now = datetime.now(timezone.utc)
+            if month:
+                start_of_month = datetime.strptime(month, "%Y-%m").replace(tzinfo=timezone.utc)
+            else:
                 start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-
+        except ValueError:
+            return {"error": "Invalid month, expected YYYY-MM"}
+
+        # First day of next month
+        if start_of_month.month == 12:
+            start_next_month = start_of_month.replace(year=start_of_month.year + 1, month=1)
+        else:
+            start_next_month = start_of_month.replace(month=start_of_month.month + 1)
+
+        report = ReportSnapshotEntity().get_or_create(
+            "monthly",
+            start_of_month.strftime("%Y-%m"),
+            period_closed(start_next_month, now),
+            lambda: self.compute_pm_monthly_report(start_of_month),
+        )
+        month_activity = lambda rows: (rows.c.created_at >= start_of_month) & (rows.c.created_at < start_next_month)
+        return self.add_report_requests_page(report, start_of_month, month_activity, page, page_size)
+
+    def compute_pm_monthly_report(self, start_of_month: datetime):
+        try:
+            with get_db_session() as db:
                 # First day of next month
                 if start_of_month.month == 12:
                     start_next_month = start_of_month.replace(year=start_of_month.year + 1, month=1)
@@ -1019,44 +1557,50 @@ class PinRequestEntity:
                 else:
                     start_last_month = start_of_month.replace(month=start_of_month.month - 1)
 
-                # --- Requests for this month ---
-                requests = (
-                    db.query(Request)
-                    .options(joinedload(Request.category))
-                    .filter(Request.created_at >= start_of_month, Request.created_at < start_next_month)
-                    .all()
+                # --- This month and last month (for growth rate), per category, in one query ---
+                this_month = RequestEvent.occurred_at >= start_of_month
+                totals, by_category = self.aggregate_report(
+                    db,
+                    start_last_month,
+                    start_next_month,
+                    ("created", "completed"),
+                    created=this_month & (RequestEvent.event_type == "created"),
+                    completed=this_month & (RequestEvent.event_type == "completed"),
+                    last_month=(RequestEvent.occurred_at < start_of_month) & (RequestEvent.event_type == "created"),
                 )
 
-                # --- Requests last month (for growth rate) ---
-                last_month_requests = (
-                    db.query(Request)
-                    .filter(Request.created_at >= start_last_month, Request.created_at < start_of_month)
-                    .count()
-                )
-
-                total_created = len(requests)
-                total_completed = len([r for r in requests if r.status == "completed"])
+                total_created = totals["created"]
+                total_completed = totals["completed"]
+                last_month_requests = totals["last_month"]
                 completion_rate = round((total_completed / total_created * 100) if total_created else 0, 2)
 
+                # Live rows, plus archived ones for months past the retention window
+                month_rows = report_requests(start_of_month)
+
                 # --- Average completion time (days) ---
                 avg_completion_time = (
                     db.query(
                         func.avg(
-                            func.extract("epoch", Request.completed_at - Request.created_at) / 86400.0
+                            func.extract("epoch", month_rows.c.completed_at - month_rows.c.created_at) / 86400.0
                         )
                     )
                     .filter(
-                        Request.completed_at.isnot(None),
-                        Request.completed_at >= start_of_month,
-                        Request.completed_at < start_next_month,
+                        month_rows.c.status == "completed", # ix_requests_status_completed_at
+                        month_rows.c.completed_at >= start_of_month,
+                        month_rows.c.completed_at < start_next_month,
                     )
                     .scalar()
                     or 0
                 )
                 avg_completion_time = round(avg_completion_time, 2)
 
+                # --- Completion-time percentiles (days), merged from the daily t-digests ---
+                completion_time = CompletionDigestEntity().report_percentiles(
+                    db, start_of_month.date(), start_next_month.date()
+                )
+
                 # --- Category distribution ---
-                category_counts = Counter(getattr(r.category, "name", "Uncategorized") for r in requests)
+                category_counts = {name: row["created"] for name, row in by_category.items() if row["created"]}
                 active_categories = len(category_counts)
 
                 # --- Growth vs last month ---
@@ -1068,11 +1612,11 @@ class PinRequestEntity:
                 # --- Requests by week ---
                 by_week_query = (
                     db.query(
-                        func.floor((func.extract("day", Request.created_at) - 1) / 7 + 1).label("week_of_month"),
-                        func.count(Request.id).label("created"),
-                        func.sum(case((Request.status == "completed", 1), else_=0)).label("completed")
+                        func.floor((func.extract("day", month_rows.c.created_at) - 1) / 7 + 1).label("week_of_month"),
+                        func.count(month_rows.c.id).label("created"),
+                        func.sum(case((month_rows.c.status == "completed", 1), else_=0)).label("completed")
                     )
-                    .filter(Request.created_at >= start_of_month, Request.created_at < start_next_month)
+                    .filter(month_rows.c.created_at >= start_of_month, month_rows.c.created_at < start_next_month)
                     .group_by("week_of_month")
                     .order_by("week_of_month")
                     .all()
@@ -1089,13 +1633,14 @@ class PinRequestEntity:
 
                 # --- Growth trend (past 6 months) ---
                 six_months_ago = (start_of_month - timedelta(days=180)).replace(day=1)
+                trend_rows = report_requests(six_months_ago)
                 growth_trend_query = (
                     db.query(
-                        extract("year", Request.created_at).label("year"),
-                        extract("month", Request.created_at).label("month"),
-                        func.count(Request.id).label("requests")
+                        extract("year", trend_rows.c.created_at).label("year"),
+                        extract("month", trend_rows.c.created_at).label("month"),
+                        func.count(trend_rows.c.id).label("requests")
                     )
-                    .filter(Request.created_at >= six_months_ago)
+                    .filter(trend_rows.c.created_at >= six_months_ago, trend_rows.c.created_at < start_next_month)
                     .group_by("year", "month")
                     .order_by("year", "month")
                     .all()
@@ -1111,15 +1656,13 @@ class PinRequestEntity:
 
                 # --- Top 5 Most Shortlisted Requests ---
                 top_shortlisted_query = (
-                    db.query(
-                        Request.id,
-                        Request.title,
-                        func.count(request_shortlists.c.csr_user_id).label("shortlist_count")
+                    db.query(month_rows.c.id, month_rows.c.title, month_rows.c.shortlist_count)
+                    .filter(
+                        month_rows.c.created_at >= start_of_month,
+                        month_rows.c.created_at < start_next_month,
+                        month_rows.c.shortlist_count > 0,
                     )
-                    .join(request_shortlists, Request.id == request_shortlists.c.request_id)
-                    .filter(Request.created_at >= start_of_month, Request.created_at < start_next_month)
-                    .group_by(Request.id)
-                    .order_by(func.count(request_shortlists.c.csr_user_id).desc())
+                    .order_by(month_rows.c.shortlist_count.desc(), month_rows.c.id) # Live branch is a top-K walk of ix_requests_shortlist_count
                     .limit(5)
                     .all()
                 )
@@ -1145,6 +1688,9 @@ class PinRequestEntity:
                         "completed": total_completed,
                         "completion_rate": completion_rate,
                         "avg_completion_time": avg_completion_time,
+                        "p50_completion_time": completion_time["overall"]["p50"],
+                        "p90_completion_time": completion_time["overall"]["p90"],
+                        "p99_completion_time": completion_time["overall"]["p99"],
                         "active_categories": active_categories,
                         "growth_vs_last_month": growth_vs_last_month,
                     },
@@ -1152,18 +1698,10 @@ class PinRequestEntity:
                     "by_category": dict(category_counts),
                     "growth_trend": growth_trend,
                     "top_shortlisted": top_shortlisted,
-                    "requests": [
-                        {
-                            "id": r.id,
-                            "title": r.title,
-                            "status": r.status,
-                            "category": getattr(r.category, "name", "Uncategorized"),
-                            "created_at": r.created_at.isoformat() if r.created_at else None,
-                            "updated_at": r.updated_at.isoformat() if r.updated_at else None,
-                            "completed_at": r.completed_at.isoformat() if r.completed_at else None,
-                        }
-                        for r in requests
-                    ],
+                    "unique_viewers": ViewerSketchEntity().report_viewers(
+                        db, start_of_month.date(), start_next_month.date()
+                    ),
+                    "completion_time": completion_time,
                 } # Return the report
 
         except Exception as e:
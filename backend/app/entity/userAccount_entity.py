@@ -1,10 +1,19 @@
-from app.models.models import UserAccount, UserProfile, PIN, CSR
+from app.models.models import UserAccount, UserProfile, PIN, CSR, request_shortlists
 from app.database import get_db_session
+from app.utils.loader import get_loader
+from app.utils.cache import evict_on_commit, request_key
+from sqlalchemy import select, update, or_, bindparam
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+BULK_LIMIT = 5000 # Max rows accepted by one bulk call
+
+# Hot statement, compiled once per process (see app/utils/warmup.py)
+LOGIN_STMT = select(UserAccount).where(UserAccount.username == bindparam("username"))
 
 class UserAccountEntity:
     def login(self, username: str, password: str):
         with get_db_session() as db:
-            user = db.query(UserAccount).filter(UserAccount.username == username).first()
+            user = db.execute(LOGIN_STMT, {"username": username}).scalars().first()
             if not user or user.password != password:
                 # Invalid credentials → return empty object
                 return {}
@@ -12,7 +21,7 @@ class UserAccountEntity:
             # Fetch role info from user_profiles using the foreign key
             role_data = None
             if user.role:
-                role = db.query(UserProfile).filter(UserProfile.id == user.role).first()
+                role = get_loader(db, UserProfile).load(user.role)
                 if role:
                     role_data = {
                         "id": role.id,
@@ -23,14 +32,14 @@ class UserAccountEntity:
             # Fetch PIN data if role is PIN
             pin_data = None
             if role_data and role_data["name"].upper() == "PIN":
-                pin = db.query(PIN).filter(PIN.id == user.id).first()
+                pin = get_loader(db, PIN, PIN.id).load(user.id)
                 if pin:
                     pin_data = {"pin_user_id": pin.pin_user_id}
             
             # Fetch CSR data if role is CSR
             csr_data = None
             if role_data and role_data["name"].upper() == "CSR":
-                pin = db.query(CSR).filter(CSR.id == user.id).first()
+                pin = get_loader(db, CSR, CSR.id).load(user.id)
                 if pin:
                     csr_data = {"csr_user_id": pin.csr_user_id}
 
@@ -56,6 +65,15 @@ class UserAccountEntity:
             if not user:
                 return "User not found" # Return str if user does not exist
 
+            # A CSR's username is shown in the cached detail of every request they shortlisted
+            if "username" in user_data and user_data["username"] != user.username:
+                shortlisted = db.execute(
+                    select(request_shortlists.c.request_id)
+                    .join(CSR, CSR.csr_user_id == request_shortlists.c.csr_user_id)
+                    .where(CSR.id == user.id)
+                ).scalars().all()
+                evict_on_commit(db, *[request_key(rid) for rid in shortlisted])
+
             # Update allowed fields if valid user
             for key in ["username", "email_address", "role", "status"]:
                 if key in user_data:
@@ -103,7 +121,7 @@ class UserAccountEntity:
             if existing_email:
                 return "Email address already exists" # Return str if email address exists
             
-            role_info = (db.query(UserProfile).filter(UserProfile.name == user_data.get("role")).first())
+            role_info = get_loader(db, UserProfile, UserProfile.name).load(user_data.get("role"))
             role_id = role_info.id # Get the role
 
             try:
@@ -134,4 +152,200 @@ class UserAccountEntity:
                 (UserAccount.status.ilike(search_pattern))
             ).all() # Fetch users matching the search criteria
             return users # Return the list of matching users
-    
\ No newline at end of file
+
+    def bulk_create_users(self, users: list):
+        if not users:
+            return [] # Nothing to create
+        if len(users) > BULK_LIMIT:
+            return f"Cannot create more than {BULK_LIMIT} users at once"
+
+        with get_db_session() as db:
+            try:
+                usernames = {u.get("username") for u in users if u.get("username")}
+                emails = {u.get("email_address") for u in users if u.get("email_address")}
+
+                # Set-wise validation: one query each for taken usernames, taken emails and roles
+                taken_usernames = set(
+                    db.execute(select(UserAccount.username).where(UserAccount.username.in_(usernames))).scalars()
+                )
+                taken_emails = set(
+                    db.execute(select(UserAccount.email_address).where(UserAccount.email_address.in_(emails))).scalars()
+                )
+                roles = {name: role_id for role_id, name in db.execute(select(UserProfile.id, UserProfile.name))}
+
+                report = []
+                rows = []
+                for i, u in enumerate(users):
+                    username = u.get("username")
+                    email = u.get("email_address")
+                    role_name = u.get("role")
+
+                    if not username or not email or not u.get("password"):
+                        error = "username, email_address and password are required"
+                    elif username in taken_usernames:
+                        error = "Username already exists"
+                    elif email in taken_emails:
+                        error = "Email address already exists"
+                    elif role_name and role_name not in roles:
+                        error = f"Role '{role_name}' not found"
+                    else:
+                        error = None
+
+                    report.append({"row": i, "username": username, "result": error or True})
+                    if error:
+                        continue
+
+                    # Later rows in the same batch may not reuse this username/email
+                    taken_usernames.add(username)
+                    taken_emails.add(email)
+                    rows.append({
+                        "username": username,
+                        "email_address": email,
+                        "password": u.get("password"),
+                        "role": roles.get(role_name),
+                        "status": u.get("status") or "active",
+                    })
+
+                if rows:
+                    # One multi-row insert; rows that lost a race with another writer are skipped
+                    created = set(
+                        db.execute(
+                            pg_insert(UserAccount)
+                            .values(rows)
+                            .on_conflict_do_nothing()
+                            .returning(UserAccount.username)
+                        ).scalars()
+                    )
+                    db.commit() # Commit the changes
+
+                    for entry in report:
+                        if entry["result"] is True and entry["username"] not in created:
+                            entry["result"] = "Username or email address already exists"
+
+                return report # Return per-row report
+
+            except Exception as e:
+                db.rollback()
+                print(f"Error bulk creating users: {e}")
+                return f"Failed to create users: {str(e)}" # Return str on failure
+
+    def bulk_suspend_users(self, body: dict):
+        return self.bulk_set_user_status(body, "suspended") # Suspend by id list or filter
+
+    def bulk_reactivate_users(self, body: dict):
+        return self.bulk_set_user_status(body, "active") # Reactivate by id list or filter
+
+    def bulk_set_user_status(self, body: dict, status: str):
+        user_ids = list(dict.fromkeys(body.get("user_ids") or []))
+        filters = body.get("filter") or {}
+
+        if not user_ids and not filters:
+            return "Provide user_ids or a filter" # Never update every account by accident
+        if len(user_ids) > BULK_LIMIT:
+            return f"Cannot update more than {BULK_LIMIT} users at once"
+
+        with get_db_session() as db:
+            try:
+                query = update(UserAccount).where(UserAccount.status.is_distinct_from(status)) # NULL status counts as different
+                if user_ids:
+                    query = query.where(UserAccount.id.in_(user_ids))
+                if filters:
+                    clauses = self.user_filter_clauses(db, filters)
+                    if clauses is None:
+                        return "Invalid filter"
+                    query = query.where(*clauses)
+
+                # One multi-row update, RETURNING tells us which accounts changed
+                changed = set(
+                    db.execute(
+                        query.values(status=status)
+                        .returning(UserAccount.id)
+                        .execution_options(synchronize_session=False)
+                    ).scalars()
+                )
+
+                # Explain rows that did not change (only needed for explicit id lists)
+                existing = set()
+                if user_ids:
+                    existing = set(db.execute(select(UserAccount.id).where(UserAccount.id.in_(user_ids))).scalars())
+
+                db.commit() # Commit the changes
+
+                if not user_ids:
+                    return {"updated": len(changed), "user_ids": sorted(changed)} # Filter mode summary
+
+                return [
+                    {
+                        "user_id": uid,
+                        "result": True if uid in changed
+                        else "User not found" if uid not in existing
+                        else f"User is already {status}" if not filters
+                        else "User does not match filter",
+                    }
+                    for uid in user_ids
+                ] # Return per-id report
+
+            except Exception as e:
+                db.rollback()
+                print(f"Error bulk updating user status: {e}")
+                return f"Failed to update users: {str(e)}" # Return str on failure
+
+    def bulk_change_user_role(self, body: dict):
+        user_ids = list(dict.fromkeys(body.get("user_ids") or []))
+        role_name = body.get("role")
+
+        if not user_ids or not role_name:
+            return "user_ids and role are required"
+        if len(user_ids) > BULK_LIMIT:
+            return f"Cannot update more than {BULK_LIMIT} users at once"
+
+        with get_db_session() as db:
+            try:
+                role = get_loader(db, UserProfile, UserProfile.name).load(role_name)
+                role_id = role.id if role else None
+                if role_id is None:
+                    return f"Role '{role_name}' not found" # Return str if role does not exist
+
+                changed = set(
+                    db.execute(
+                        update(UserAccount)
+                        .where(UserAccount.id.in_(user_ids))
+                        .values(role=role_id)
+                        .returning(UserAccount.id)
+                        .execution_options(synchronize_session=False)
+                    ).scalars()
+                )
+                db.commit() # Commit the changes
+
+                return [
+                    {"user_id": uid, "result": True if uid in changed else "User not found"}
+                    for uid in user_ids
+                ] # Return per-id report
+
+            except Exception as e:
+                db.rollback()
+                print(f"Error bulk changing user role: {e}")
+                return f"Failed to change user roles: {str(e)}" # Return str on failure
+
+    def user_filter_clauses(self, db, filters: dict):
+        clauses = []
+
+        if filters.get("role"):
+            role = get_loader(db, UserProfile, UserProfile.name).load(filters["role"])
+            if role is None:
+                return None # Unknown role
+            clauses.append(UserAccount.role == role.id)
+
+        if filters.get("status"):
+            clauses.append(UserAccount.status == filters["status"])
+
+        if filters.get("search_input"):
+            pattern = f"%{filters['search_input']}%"
+            clauses.append(
+                or_(UserAccount.username.ilike(pattern), UserAccount.email_address.ilike(pattern))
+            )
+
+        if filters.get("last_login_before"):
+            clauses.append(UserAccount.last_login < filters["last_login_before"])
+
+        return clauses or None # Return None when the filter has no usable keys
@@ -1,11 +1,15 @@
 from app.models.models import UserProfile, UserAccount
 from app.database import get_db_session
+from app.utils.cache import cache, evict_on_commit, USER_PROFILES_KEY
 
 class UserProfilesEntity:
     def get_user_profiles(self):
+        return cache.get_or_set(USER_PROFILES_KEY, self.query_user_profiles)
+
+    def query_user_profiles(self):
         with get_db_session() as db:
             profiles = db.query(UserProfile).order_by(UserProfile.id.asc()).all()
-            return profiles
+            return [{"id": p.id, "name": p.name, "status": p.status} for p in profiles]
 
     def create_user_profile(self, profile_data: dict):
         with get_db_session() as db:
@@ -24,6 +28,7 @@ class UserProfilesEntity:
                     status=profile_data.get("status", "active"),
                 )
                 db.add(new_profile) # Add new profile to the session
+                evict_on_commit(db, USER_PROFILES_KEY)
                 db.commit() # Commit the changes
                 db.refresh(new_profile) # Refresh the instance, reflect latest changes
                 return True # Return True on successful creation
@@ -54,6 +59,7 @@ class UserProfilesEntity:
                     return f"Profile name '{new_name}' already exists." # Return str on duplicate
 
                 profile.name = new_name # Update name
+                evict_on_commit(db, USER_PROFILES_KEY)
                 db.commit() # Commit the changes
                 db.refresh(profile) # Refresh the instance, reflect latest changes
                 return True # Return True on success
@@ -92,6 +98,7 @@ class UserProfilesEntity:
                         f"from suspended profile '{profile.name}'."
                     )
 
+                evict_on_commit(db, USER_PROFILES_KEY)
                 db.commit() # Commit the changes
                 db.refresh(profile) # Refresh the instance, reflect latest changes
                 return True # Return True on success
@@ -111,6 +118,7 @@ class UserProfilesEntity:
                     return f"Profile '{profile.name}' is already active." # Return str if already active
 
                 profile.status = "active" # Set status to active
+                evict_on_commit(db, USER_PROFILES_KEY)
                 db.commit() # Commit the changes
                 db.refresh(profile) # Refresh the instance, reflect latest changes
                 return True # Return True on success
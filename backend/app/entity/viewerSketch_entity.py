@@ -0,0 +1,178 @@
+from app.database import engine, get_db_session
+from app.models.models import ViewerSketch, Category
+from app.utils.hll import HyperLogLog, merge_sketches
+from sqlalchemy import select, update, tuple_, bindparam
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from datetime import datetime, date, timezone
+import os
+import threading
+import time
+
+# Views are folded into in-memory sketches and written in one batch per flush
+VIEW_SKETCH_FLUSH_SECONDS = float(os.getenv("VIEW_SKETCH_FLUSH_SECONDS", "10"))
+VIEW_SKETCH_FLUSH_VIEWS = int(os.getenv("VIEW_SKETCH_FLUSH_VIEWS", "500"))
+
+SKETCH_SCOPES = ("request", "pin", "category", "all")
+
+
+def sketch_keys(request_id, pin_user_id, category_id, day):
+    # One view updates the request, its PIN, its category and the overall sketch for the day
+    return [
+        ("request", request_id, day),
+        ("pin", pin_user_id, day),
+        ("category", category_id or 0, day),
+        ("all", 0, day),
+    ]
+
+
+class ViewBuffer:
+    """Per-process sketches not written yet, keyed by (scope, scope_id, day)."""
+
+    def __init__(self):
+        self.pending = {}
+        self.views = 0
+        self.last_flush = time.monotonic()
+        self.lock = threading.Lock()
+
+    def add(self, keys, viewer: str):
+        with self.lock:
+            for key in keys:
+                self.pending.setdefault(key, HyperLogLog()).add(viewer)
+            self.views += 1
+            return self.views >= VIEW_SKETCH_FLUSH_VIEWS or time.monotonic() - self.last_flush >= VIEW_SKETCH_FLUSH_SECONDS
+
+    def drain(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.views = 0
+            self.last_flush = time.monotonic()
+            return pending
+
+    def restore(self, pending: dict):
+        # Put back a batch that failed to write; merging keeps it idempotent
+        with self.lock:
+            for key, sketch in pending.items():
+                self.pending.setdefault(key, HyperLogLog()).merge(sketch)
+
+
+view_buffer = ViewBuffer()
+
+
+class ViewerSketchEntity:
+    def record_view(self, request_id: int, pin_user_id: int, category_id: int, viewer: str):
+        day = datetime.now(timezone.utc).date()
+        if view_buffer.add(sketch_keys(request_id, pin_user_id, category_id, day), viewer):
+            self.flush()
+
+    def flush(self):
+        pending = view_buffer.drain()
+        if not pending:
+            return 0
+        try:
+            self.write_sketches(pending)
+            return len(pending) # Return number of sketches written
+        except Exception as e:
+            view_buffer.restore(pending)
+            print(f"[WARN] Viewer sketch flush failed, retrying on the next flush: {e}")
+            return 0
+
+    def write_sketches(self, pending: dict):
+        t = ViewerSketch.__table__
+        keys = sorted(pending) # Same lock order in every worker
+
+        # Own transaction, outside any request's unit of work
+        with engine.begin() as conn:
+            # New keys are inserted as they are, existing ones are merged under a row lock
+            inserted = conn.execute(
+                pg_insert(t)
+                .values([
+                    {"scope": s, "scope_id": i, "day": d, "sketch": pending[(s, i, d)].to_bytes()}
+                    for s, i, d in keys
+                ])
+                .on_conflict_do_nothing()
+                .returning(t.c.scope, t.c.scope_id, t.c.day)
+            ).all()
+            inserted = set(map(tuple, inserted))
+            existing = [key for key in keys if key not in inserted]
+            if not existing:
+                return
+
+            rows = conn.execute(
+                select(t.c.scope, t.c.scope_id, t.c.day, t.c.sketch)
+                .where(tuple_(t.c.scope, t.c.scope_id, t.c.day).in_(existing))
+                .order_by(t.c.scope, t.c.scope_id, t.c.day)
+                .with_for_update()
+            ).all()
+            conn.execute(
+                update(t)
+                .where(
+                    t.c.scope == bindparam("k_scope"),
+                    t.c.scope_id == bindparam("k_scope_id"),
+                    t.c.day == bindparam("k_day"),
+                )
+                .values(sketch=bindparam("k_sketch")),
+                [
+                    {
+                        "k_scope": r.scope,
+                        "k_scope_id": r.scope_id,
+                        "k_day": r.day,
+                        "k_sketch": HyperLogLog(r.sketch).merge(pending[(r.scope, r.scope_id, r.day)]).to_bytes(),
+                    }
+                    for r in rows
+                ],
+            )
+
+    def unique_viewers(self, scope: str, ids=None, start: date = None, end: date = None):
+        # Distinct viewers per scope id over [start, end), merged from the daily sketches
+        if scope not in SKETCH_SCOPES:
+            return f"Unknown scope '{scope}', use one of {', '.join(SKETCH_SCOPES)}"
+        try:
+            if isinstance(ids, str):
+                ids = [int(i) for i in ids.split(",") if i.strip()]
+            start = date.fromisoformat(start) if isinstance(start, str) else start
+            end = date.fromisoformat(end) if isinstance(end, str) else end
+        except ValueError:
+            return "Invalid ids or dates, expected ids=1,2,3 and YYYY-MM-DD"
+        self.flush() # Include this worker's buffered views
+
+        try:
+            with get_db_session() as db:
+                query = select(ViewerSketch.scope_id, ViewerSketch.sketch).where(ViewerSketch.scope == scope)
+                if ids:
+                    query = query.where(ViewerSketch.scope_id.in_(ids))
+                if start:
+                    query = query.where(ViewerSketch.day >= start)
+                if end:
+                    query = query.where(ViewerSketch.day < end)
+
+                merged = {}
+                for scope_id, sketch in db.execute(query).all():
+                    merged.setdefault(scope_id, HyperLogLog()).merge(HyperLogLog(sketch))
+                return {scope_id: sketch.count() for scope_id, sketch in merged.items()} # Return {id: distinct viewers}
+
+        except Exception as e:
+            print(f"[ERROR] unique_viewers failed: {e}")
+            return f"Failed to count unique viewers: {str(e)}"
+
+    def report_viewers(self, db, start: date, end: date):
+        # Report block: distinct viewers overall and per category name for [start, end)
+        self.flush()
+        rows = db.execute(
+            select(ViewerSketch.scope, ViewerSketch.scope_id, ViewerSketch.sketch)
+            .where(ViewerSketch.scope.in_(("all", "category")), ViewerSketch.day >= start, ViewerSketch.day < end)
+        ).all()
+
+        total = merge_sketches(r.sketch for r in rows if r.scope == "all").count()
+        per_category = {}
+        for r in rows:
+            if r.scope == "category":
+                per_category.setdefault(r.scope_id, HyperLogLog()).merge(HyperLogLog(r.sketch))
+
+        names = dict(db.execute(select(Category.id, Category.name).where(Category.id.in_(list(per_category)))).all())
+        return {
+            "total": total,
+            "by_category": {
+                names.get(category_id, "Uncategorized"): sketch.count()
+                for category_id, sketch in per_category.items()
+            },
+        }
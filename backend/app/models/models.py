@@ -1,9 +1,10 @@
 from sqlalchemy import (
-    Column, Integer, String, ForeignKey, DateTime, UniqueConstraint, Table
+    Column, Integer, BigInteger, Float, Boolean, String, ForeignKey, Date, DateTime, LargeBinary, UniqueConstraint, Table, Index, FetchedValue
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, foreign
+from sqlalchemy.dialects.postgresql import JSONB
 from app.database import Base
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 
 
 # ===============================================================
@@ -141,6 +142,12 @@ class Request(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     completed_at = Column(DateTime(timezone=True), nullable=True)
     view = Column(Integer, default=0, nullable=False)
+    # Maintained by triggers on request_shortlists (see requestCounter_entity.py)
+    shortlist_count = Column(Integer, default=0, server_default="0", nullable=False)
+    # Id of the last transaction that wrote the row, stamped by a trigger; cursor for /requests/changes
+    change_xid = Column(BigInteger, server_default="0", server_onupdate=FetchedValue(), nullable=False)
+    # Log-space time-decayed score of views and shortlists (see app/utils/trending.py)
+    trend_score = Column(Float, nullable=True)
 
     assigned_to = Column(
         Integer,
@@ -166,5 +173,246 @@ class Request(Base):
 
     category = relationship("Category", back_populates="requests")
 
+    __table_args__ = (
+        # Used by the archival job to find old completed requests
+        Index("ix_requests_status_completed_at", "status", "completed_at"),
+        # Monthly report range scans
+        Index("ix_requests_created_at", "created_at"),
+        # Covering index for the facets endpoint (index-only GROUPING SETS scan)
+        Index(
+            "ix_requests_facets", "status", "category_id", "assigned_to",
+            postgresql_include=["pin_user_id", "created_at"],
+        ),
+        # Top-K most shortlisted (walks the index in order, stops after K rows)
+        Index("ix_requests_shortlist_count", shortlist_count.desc(), "id"),
+        # Delta sync range scans, keyset on (change_xid, id)
+        Index("ix_requests_change_xid", "change_xid", "id"),
+        # Trending feeds: top N pending overall / per category straight off the index
+        Index(
+            "ix_requests_trending", trend_score.desc().nullslast(),
+            postgresql_where=(status == "pending"),
+        ),
+        Index(
+            "ix_requests_trending_category", "category_id", trend_score.desc().nullslast(),
+            postgresql_where=(status == "pending"),
+        ),
+    )
+
     def __repr__(self):
         return f"<Request id={self.id}, title={self.title!r}, status={self.status!r}>"
+
+
+# ===============================================================
+# 🗄 Archived Requests (cold storage, partitioned by month)
+# ===============================================================
+class ArchivedRequest(Base):
+    __tablename__ = "requests_archive"
+
+    # Same columns as Request; created_at is part of the key because
+    # the table is range-partitioned on it (one partition per month)
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime(timezone=True), primary_key=True)
+    pin_user_id = Column(Integer, ForeignKey("pins.pin_user_id", ondelete="CASCADE"), nullable=False)
+    title = Column(String, nullable=False)
+    description = Column(String, nullable=True)
+    status = Column(String, nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.id", ondelete="SET NULL"), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+    view = Column(Integer, default=0, nullable=False)
+    assigned_to = Column(Integer, ForeignKey("csrs.csr_user_id", ondelete="SET NULL"), nullable=True)
+    shortlist_count = Column(Integer, default=0, server_default="0", nullable=False)
+    change_xid = Column(BigInteger, server_default="0", nullable=False)
+    trend_score = Column(Float, nullable=True)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    category = relationship("Category")
+
+    __table_args__ = (
+        # BRIN indexes are tiny and fit append-only, time-ordered partitions
+        Index("ix_requests_archive_completed_at", "completed_at", postgresql_using="brin"),
+        Index("ix_requests_archive_created_at", "created_at", postgresql_using="brin"),
+        # A PIN's own list, search and detail view include their archived requests
+        Index("ix_requests_archive_pin_user_id", "pin_user_id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+
+# Shortlists of archived requests (no FK, the request row lives in requests_archive)
+request_shortlists_archive = Table(
+    "request_shortlists_archive",
+    Base.metadata,
+    Column("csr_user_id", Integer, ForeignKey("csrs.csr_user_id", ondelete="CASCADE"), primary_key=True),
+    Column("request_id", Integer, primary_key=True),
+)
+
+ArchivedRequest.shortlistees = relationship(
+    CSR,
+    secondary=request_shortlists_archive,
+    primaryjoin=ArchivedRequest.id == foreign(request_shortlists_archive.c.request_id),
+    viewonly=True,
+)
+
+
+# ===============================================================
+# ⚙️ Background Jobs (claimed by worker.py with SKIP LOCKED)
+# ===============================================================
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_type = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, succeeded, failed
+    payload = Column(JSONB, nullable=False, default=dict)
+    result = Column(JSONB, nullable=True)  # small results are stored inline
+    result_path = Column(String, nullable=True)  # large results are written to disk
+    error = Column(String, nullable=True)
+    progress = Column(Integer, nullable=False, default=0)  # 0-100
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)  # next attempt (backoff)
+    locked_by = Column(String, nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
+
+
+# ===============================================================
+# 📊 Report Snapshots (frozen reports for closed periods)
+# ===============================================================
+class ReportSnapshot(Base):
+    __tablename__ = "report_snapshots"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    report_type = Column(String(20), nullable=False)  # daily, weekly, monthly
+    period = Column(String(20), nullable=False)  # 2025-10-14, 2025-W42, 2025-10
+    data = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("report_type", "period", name="uq_report_snapshot_period"),
+    )
+
+
+# ===============================================================
+# 🕒 Request Events (append-only lifecycle log used by reports)
+# ===============================================================
+REQUEST_EVENT_TYPES = ("created", "shortlisted", "unshortlisted", "assigned", "completed", "deleted")
+
+class RequestEvent(Base):
+    __tablename__ = "request_events"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    request_id = Column(Integer, nullable=False, index=True)  # no FK: events outlive deleted requests
+    event_type = Column(String(20), nullable=False)  # one of REQUEST_EVENT_TYPES
+    category_id = Column(Integer, nullable=True)  # category at the time of the event
+    actor_role = Column(String(10), nullable=True)  # pin, csr, pm
+    actor_id = Column(Integer, nullable=True)  # pin_user_id / csr_user_id
+    occurred_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Inserting transaction, same clock as requests.change_xid; ids are taken before commit,
+    # so incremental readers track this instead of the highest id they have seen
+    xid = Column(BigInteger, server_default=text("pg_current_xact_id()::text::bigint"), nullable=False)
+
+    __table_args__ = (
+        Index("ix_request_events_type_occurred_at", "event_type", "occurred_at"),
+        Index("ix_request_events_xid", "xid"),
+    )
+
+
+# ===============================================================
+# 🚦 Rate Limit Buckets (token buckets shared across API workers)
+# ===============================================================
+class RateLimitBucket(Base):
+    __tablename__ = "rate_limit_buckets"
+
+    key = Column(String(200), primary_key=True)  # route class + user id or client IP
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = {"prefixes": ["UNLOGGED"]}  # throwaway state, skip the WAL
+
+
+# ===============================================================
+# 🪦 Tombstones (deleted rows, so delta sync clients can drop them)
+# ===============================================================
+class Tombstone(Base):
+    __tablename__ = "tombstones"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    entity = Column(String(20), nullable=False)  # request, category
+    entity_id = Column(Integer, nullable=False)
+    pin_user_id = Column(Integer, nullable=True)  # owner of a deleted request, for the pin scope
+    reason = Column(String(20), nullable=False, default="deleted")  # deleted, archived
+    change_xid = Column(BigInteger, nullable=False)  # deleting transaction, same clock as requests.change_xid
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_tombstones_change_xid", "change_xid"),
+    )
+
+
+# ===============================================================
+# 👀 Viewer Sketches (HyperLogLog of distinct viewers per scope and day)
+# ===============================================================
+class ViewerSketch(Base):
+    __tablename__ = "viewer_sketches"
+
+    scope = Column(String(10), primary_key=True)  # request, pin, category, all
+    scope_id = Column(Integer, primary_key=True)  # request id / pin_user_id / category id (0 = none)
+    day = Column(Date, primary_key=True)  # UTC day; any range is the merge of its days
+    sketch = Column(LargeBinary, nullable=False)  # 256 one-byte registers, see app/utils/hll.py
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
+# ===============================================================
+# 📈 Per-request daily series (views batched by requestSeries_entity.py, shortlists by trigger)
+# ===============================================================
+class RequestDailyStat(Base):
+    __tablename__ = "request_daily_stats"
+
+    request_id = Column(Integer, ForeignKey("requests.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)  # UTC day
+    views = Column(Integer, nullable=False, default=0, server_default="0")
+    shortlists = Column(Integer, nullable=False, default=0, server_default="0")  # shortlists added that day
+
+
+# ===============================================================
+# ⏱️ Completion-time digests (per category and UTC day, see completionDigest_entity.py)
+# ===============================================================
+class CompletionDigest(Base):
+    __tablename__ = "completion_digests"
+
+    category_id = Column(Integer, primary_key=True)  # 0 = uncategorized; no FK, history outlives categories
+    day = Column(Date, primary_key=True)  # UTC day of completion; any range is the merge of its days
+    digest = Column(LargeBinary, nullable=False)  # t-digest of completion times in days, see app/utils/tdigest.py
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
+# ===============================================================
+# 🎯 CSR Recommendations (top-K pending requests per CSR, see recommendation_entity.py)
+# ===============================================================
+class CsrRecommendation(Base):
+    __tablename__ = "csr_recommendations"
+
+    csr_user_id = Column(Integer, ForeignKey("csrs.csr_user_id", ondelete="CASCADE"), primary_key=True)
+    rank = Column(Integer, primary_key=True)  # 1 = best; the PK is the read path
+    request_id = Column(Integer, nullable=False)  # no FK: closed or deleted requests drop out in the read join
+    score = Column(Float, nullable=False)
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class RecommendationRun(Base):
+    __tablename__ = "recommendation_runs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    last_event_id = Column(BigInteger, nullable=False)  # highest request_events id seen (informational)
+    xid_horizon = Column(BigInteger, nullable=True)  # next run reads events with xid >= this
+    full_refresh = Column(Boolean, nullable=False, default=False)
+    csrs_rescored = Column(Integer, nullable=False, default=0)  # CSRs scored against every pending request
+    csrs_merged = Column(Integer, nullable=False, default=0)  # CSRs that only had new requests merged in
+    finished_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Form, Body
+from fastapi import APIRouter, Form, Body, UploadFile, File, Response, Depends, Request
+from fastapi.responses import StreamingResponse, FileResponse
 from app.controllers.login_controller import LoginController
-from app.controllers.user_controller import getUserController, updateUserController, suspendUserController, reactivateUserController, createUserController, searchUserController, getUserProfilesController, createUserProfilesController, updateUserProfilesController, suspendUserProfilesController, reactivateUserProfilesController, searchUserProfilesController
-from app.controllers.pin_controller import getPinRequestsController, createPinRequestController, searchPinRequestController, deletePinRequestController, updatePinRequestController, getPinRequestViewsController, getPinRequestShortlistsController, getPinRequestCompletedController, searchPinRequestCompletedController
-from app.controllers.csr_controller import getCSRRequestAvailableController, searchCSRRequestAvailableController, shortlistCSRRequestController, removeShortlistCSRRequestController, incrementRequestViewController, searchCSRRequestShortlistedController, getCSRRequestShortlistedController, getCSRRequestCompletedController, searchCSRRequestCompletedController
-from app.controllers.pm_controller import createCategoryController, updateCategoryController, deleteCategoryController, getCategoryController, searchCategoryController, generateWeeklyReportController, generateDailyReportController, generateMonthlyReportController
-from app.controllers.assignment_controller import getAllRequestsController, updateRequestController, viewRequestController
+from app.controllers.user_controller import getUserController, updateUserController, suspendUserController, reactivateUserController, createUserController, searchUserController, getUserProfilesController, createUserProfilesController, updateUserProfilesController, suspendUserProfilesController, reactivateUserProfilesController, searchUserProfilesController, bulkCreateUserController, uploadUsersController, bulkSuspendUserController, bulkReactivateUserController, bulkChangeUserRoleController
+from app.controllers.pin_controller import getUniqueViewersController, getRequestSeriesController, getPinRequestsController, createPinRequestController, searchPinRequestController, deletePinRequestController, updatePinRequestController, getPinRequestViewsController, getPinRequestShortlistsController, getPinRequestCompletedController, searchPinRequestCompletedController
+from app.controllers.csr_controller import getCSRRequestAvailableController, searchCSRRequestAvailableController, shortlistCSRRequestController, removeShortlistCSRRequestController, incrementRequestViewController, searchCSRRequestShortlistedController, getCSRRequestShortlistedController, getCSRRequestCompletedController, searchCSRRequestCompletedController, bulkShortlistCSRRequestController, bulkRemoveShortlistCSRRequestController, getTrendingRequestsController, getRecommendedRequestsController
+from app.controllers.pm_controller import createCategoryController, updateCategoryController, deleteCategoryController, getCategoryController, searchCategoryController, generateWeeklyReportController, generateDailyReportController, generateMonthlyReportController, getAnalyticsController
+from app.controllers.assignment_controller import getAllRequestsController, getRequestFacetsController, getRequestChangesController, updateRequestController, viewRequestController, batchAssignRequestsController
+from app.controllers.job_controller import submitJobController, getJobController, watchJobController, getJobResultController
+from app.database import UnitOfWorkRoute
+from app.utils.ratelimit import viewer_key
 from typing import Optional, List, Dict
+import json
+import os
 
-router = APIRouter(prefix="/api", tags=["API"])
+router = APIRouter(prefix="/api", tags=["API"], route_class=UnitOfWorkRoute) # One DB session + transaction per request
 
 # ----------------- Routes -----------------
 
@@ -69,6 +75,46 @@ def search_users(search_input: str):
 
     return result # Return the list of matching users if success and empty list on failure
 
+# Bulk create
+@router.post("/users/bulk")
+def bulk_create_users(users: List[dict] = Body(...)):
+    controller = bulkCreateUserController()
+    result = controller.bulk_create_users(users)
+
+    return result # Return per-row report on success and str on failure
+
+# Bulk create from uploaded CSV / JSON / JSON Lines file
+@router.post("/users/bulk/upload")
+def upload_users(file: UploadFile = File(...)):
+    controller = uploadUsersController()
+    result = controller.upload_users(file.file, file.filename)
+
+    return result # Return per-row report on success and str on failure
+
+# Bulk suspend by user_ids or filter
+@router.put("/users/bulk/suspend")
+def bulk_suspend_users(body: dict = Body(...)):
+    controller = bulkSuspendUserController()
+    result = controller.bulk_suspend_users(body)
+
+    return result # Return report on success and str on failure
+
+# Bulk reactivate by user_ids or filter
+@router.put("/users/bulk/reactivate")
+def bulk_reactivate_users(body: dict = Body(...)):
+    controller = bulkReactivateUserController()
+    result = controller.bulk_reactivate_users(body)
+
+    return result # Return report on success and str on failure
+
+# Bulk role change
+@router.put("/users/bulk/role")
+def bulk_change_user_role(body: dict = Body(...)):
+    controller = bulkChangeUserRoleController()
+    result = controller.bulk_change_user_role(body)
+
+    return result # Return per-id report on success and str on failure
+
 # View
 @router.get("/user_profiles/")
 def get_user_profiles():
@@ -167,6 +213,22 @@ def get_pin_request_views(request_id: int):
 
     return result # Return int when success and str on failure
 
+# Distinct viewers (HyperLogLog estimate) per request, PIN, category or overall; ids="1,2,3", dates YYYY-MM-DD
+@router.get("/pin-request-unique-viewers")
+def get_unique_viewers(scope: str = "request", ids: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None):
+    controller = getUniqueViewersController()
+    result = controller.unique_viewers(scope, ids, start, end)
+
+    return result # Return {id: distinct viewers} on success and str on failure
+
+# Daily views and shortlists for many requests at once (ids="1,2,3" or a PIN's latest 200), dense arrays ending on `end`
+@router.get("/pin-request-series")
+def get_request_series(ids: Optional[str] = None, pin_user_id: Optional[int] = None, days: int = 30, end: Optional[str] = None):
+    controller = getRequestSeriesController()
+    result = controller.get_request_series(ids, pin_user_id, days, end)
+
+    return result # Return {start, end, days, series} on success and str on failure
+
 # Number of shortlists
 @router.get("/pin-request-shortlists")
 def get_pin_request_shortlists(request_id: int):
@@ -201,6 +263,22 @@ def get_csr_requests_available(csr_user_id: int = None):
 
     return result # Return the list of CSR requests objects if success and empty list on failure
 
+# Trending pending requests (time-decayed views and shortlists), optionally within one category
+@router.get("/requests/trending")
+def get_trending_requests(limit: int = 20, category_id: Optional[int] = None):
+    controller = getTrendingRequestsController()
+    result = controller.get_trending_requests(limit, category_id)
+
+    return result # Return the list of trending requests if success and empty list on failure
+
+# Pending requests recommended for this CSR (refreshed by the refresh_recommendations job)
+@router.get("/requests/recommended")
+def get_recommended_requests(csr_user_id: int = None, limit: int = 10):
+    controller = getRecommendedRequestsController()
+    result = controller.get_recommended_requests(csr_user_id, limit)
+
+    return result # Return the list of recommended requests if success, empty list or str on failure
+
 # View shortlisted requests
 @router.get("/requests/shortlisted")
 def get_csr_requests_shortlisted(csr_user_id: int = None):
@@ -241,11 +319,27 @@ def remove_from_shortlist(request_id: int, csr_id: int):
 
     return result # Return True on success and str on failure
 
+# Bulk shortlist/save
+@router.post("/requests/shortlist/bulk")
+def bulk_shortlist_csr_requests(request_info: dict = Body(...)):
+    controller = bulkShortlistCSRRequestController()
+    result = controller.bulk_shortlist_csr_requests(request_info)
+
+    return result # Return list of per-request results on success and str on failure
+
+# Bulk remove shortlist/unsave
+@router.post("/requests/shortlist/bulk/remove")
+def bulk_remove_from_shortlist(request_info: dict = Body(...)):
+    controller = bulkRemoveShortlistCSRRequestController()
+    result = controller.bulk_remove_from_shortlist(request_info)
+
+    return result # Return list of per-request results on success and str on failure
+
 # Increment view count
 @router.post("/requests/{request_id}/view")
-def increment_request_view(request_id: int):
+def increment_request_view(request_id: int, request: Request):
     controller = incrementRequestViewController()
-    result = controller.increment_request_view(request_id)
+    result = controller.increment_request_view(request_id, viewer_key(request.scope)) # User id param, else client IP
 
     return result # Return True on success and str on failure
 
@@ -307,45 +401,139 @@ def search_category(search_input: str):
 
     return result # Return list of matching categories if success and empty list on failure
 
+# Closed report periods never change, so browsers and proxies may cache them forever;
+# the per-request listing shows live status, so a response that carries it is never stored
+def set_report_cache_headers(response: Response, report):
+    if isinstance(report, dict) and report.get("closed") and "requests" not in report:
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    else:
+        response.headers["Cache-Control"] = "no-store"
+
 # Generate daily report
 @router.get("/pm-daily-report")
-def generate_pm_daily_report():
+def generate_pm_daily_report(response: Response, date: Optional[str] = None, page: int = 1, page_size: int = 100): # date is optional, defaults to today; page_size=0 leaves out the request listing
     controller = generateDailyReportController()
-    result = controller.generate_pm_daily_report()
+    result = controller.generate_pm_daily_report(date, page, page_size)
+    set_report_cache_headers(response, result)
 
     return result # Return daily report data if success and error message on failure
 
 # Generate weekly report
 @router.get("/pm-weekly-report")
-def generate_pm_weekly_report():
+def generate_pm_weekly_report(response: Response, week: Optional[str] = None, page: int = 1, page_size: int = 100): # week is optional, defaults to the last 7 days; page_size=0 leaves out the request listing
     controller = generateWeeklyReportController()
-    result = controller.generate_pm_weekly_report()
+    result = controller.generate_pm_weekly_report(week, page, page_size)
+    set_report_cache_headers(response, result)
 
     return result # Return weekly report data if success and error message on failure
 
 # Generate monthly report
 @router.get("/pm-monthly-report")
-def generate_pm_monthly_report():
+def generate_pm_monthly_report(response: Response, month: Optional[str] = None, page: int = 1, page_size: int = 100): # month is optional, defaults to the current month; page_size=0 leaves out the request listing
     controller = generateMonthlyReportController()
-    result = controller.generate_pm_monthly_report()
+    result = controller.generate_pm_monthly_report(month, page, page_size)
+    set_report_cache_headers(response, result)
 
     return result # Return monthly report data if success and error message on failure
 
+def analytics_params(
+    dataset: str = "requests", # requests or shortlists
+    group_by: Optional[str] = None, # e.g. category,status
+    metrics: Optional[str] = None, # e.g. count,completed,p90_completion_days
+    bucket: Optional[str] = None, # day, week, month, quarter, year
+    time_field: str = "created_at",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    status: Optional[str] = None,
+    category_id: Optional[str] = None,
+    pin_user_id: Optional[str] = None,
+    assigned_to: Optional[str] = None,
+    csr_user_id: Optional[str] = None,
+    archived: Optional[str] = None,
+):
+    return {
+        "dataset": dataset,
+        "group_by": group_by,
+        "metrics": metrics,
+        "bucket": bucket,
+        "time_field": time_field,
+        "start": start,
+        "end": end,
+        "status": status,
+        "category_id": category_id,
+        "pin_user_id": pin_user_id,
+        "assigned_to": assigned_to,
+        "csr_user_id": csr_user_id,
+        "archived": archived,
+    }
+
+# Ad-hoc aggregates over the latest columnar snapshot (export_analytics job), never touches the database
+@router.get("/pm-analytics")
+def query_analytics(params: dict = Depends(analytics_params)):
+    controller = getAnalyticsController()
+    result = controller.query_analytics(params)
+
+    return result # Return aggregated rows on success and str on failure
+
 # ------------------ Assignment ------------------
 
+def request_filters(
+    status: Optional[str] = None,
+    category_id: Optional[int] = None,
+    pin_user_id: Optional[int] = None,
+    csr_user_id: Optional[int] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+    search_input: Optional[str] = None,
+):
+    # Same scope filters for the list and facets endpoints
+    return {
+        "status": status,
+        "category_id": category_id,
+        "pin_user_id": pin_user_id,
+        "csr_user_id": csr_user_id,
+        "created_from": created_from,
+        "created_to": created_to,
+        "search_input": search_input,
+    }
+
 @router.get("/show-all-requests")
-def get_all_requests():
+def get_all_requests(filters: dict = Depends(request_filters), page: Optional[int] = None, page_size: Optional[int] = None):
     controller = getAllRequestsController()
-    result = controller.get_all_requests()
+    result = controller.get_all_requests(filters, page, page_size)
 
     return result  # returns list of requests or []
 
+# Counts by status, category and assigned CSR for the same filters
+@router.get("/requests/facets")
+def get_request_facets(filters: dict = Depends(request_filters)):
+    controller = getRequestFacetsController()
+    result = controller.get_request_facets(filters)
+
+    return result # Returns facet counts on success and str on failure
+
+# Delta sync: requests created, updated or deleted since the cursor from the previous call
+@router.get("/requests/changes")
+def get_request_changes(since: Optional[str] = None, scope: Optional[str] = None, limit: Optional[int] = None):
+    controller = getRequestChangesController()
+    result = controller.get_request_changes(since, scope, limit)
+
+    return result # Returns changes, tombstones and the next cursor on success and str on failure
+
 @router.put("/requests/{request_id}")
 def update_request(request_id: int, body: dict):
     controller = updateRequestController()
     result = controller.update_request(request_id, body)
 
     return result # Returns true on success and str on failure
+
+# Batch auto-assign pending requests to shortlisted CSRs
+@router.post("/requests/assign/batch")
+def batch_assign_requests(body: dict = Body(default={})):
+    controller = batchAssignRequestsController()
+    result = controller.batch_assign_requests(body)
+
+    return result # Returns assignment summary on success and str on failure
     
 @router.get("/show-all-requests/{request_id}")
 def get_request(request_id: int):
@@ -353,3 +541,46 @@ def get_request(request_id: int):
     result = controller.view_request(request_id)
 
     return result # returns request object or str on failure
+
+# ------------------ Background Jobs ------------------
+
+# Submit a job (reports, exports, bulk imports, batch assignment, archiving)
+@router.post("/jobs")
+def submit_job(job_info: dict = Body(...)):
+    controller = submitJobController()
+    result = controller.submit_job(job_info)
+
+    return result # Return {id, status} on success and str on failure
+
+# Poll job status
+@router.get("/jobs/{job_id}")
+def get_job(job_id: int):
+    controller = getJobController()
+    result = controller.get_job(job_id)
+
+    return result # Return job status on success and str on failure
+
+# Stream job status as server-sent events until it finishes
+@router.get("/jobs/{job_id}/events")
+def watch_job(job_id: int):
+    controller = watchJobController()
+    updates = controller.watch_job(job_id)
+
+    return StreamingResponse(
+        (f"data: {json.dumps(update)}\n\n" for update in updates),
+        media_type="text/event-stream",
+    ) # Return a stream of status updates
+
+# Download a job's file result
+@router.get("/jobs/{job_id}/download")
+def download_job_result(job_id: int):
+    controller = getJobResultController()
+    result = controller.get_job_result_path(job_id)
+
+    if result and os.path.exists(result):
+        return FileResponse(result, filename=os.path.basename(result)) # Stream the file from disk
+    if result is None:
+        return getJobController().get_job(job_id)["result"] # Inline result, no file
+
+    return result # Return str on failure
+
@@ -0,0 +1,138 @@
+from starlette.responses import JSONResponse
+import asyncio
+import math
+import os
+import re
+import time
+
+# Endpoint classes as (name, methods, path pattern), first match wins;
+# anything else (login, single-row writes, job polling) is not limited
+ENDPOINT_CLASSES = [
+    ("reports", {"GET"}, re.compile(r"^/api/(pm-(daily|weekly|monthly)-report|pm-analytics|requests/facets)")),
+    ("exports", {"GET", "POST"}, re.compile(r"^/api/(jobs/\d+/download|users/bulk/upload)")),
+    ("search", {"GET", "POST"}, re.compile(r"^/api/(.*/)?search|^/api/requests/completed/")),
+    ("feeds", {"GET"}, re.compile(r"^/api/(requests/(available|shortlisted|changes|trending|recommended)|pin-requests|pin-request-|show-all-requests|categories)")),
+]
+
+# limit = requests running at once, queue = requests allowed to wait for a slot
+DEFAULT_LIMITS = {
+    "reports": (2, 4),
+    "exports": (2, 4),
+    "search": (6, 12),
+    "feeds": (12, 48),
+}
+
+BULKHEAD_MAX_WAIT = float(os.getenv("BULKHEAD_MAX_WAIT", "2.0")) # Seconds a queued request may wait
+
+
+def configured_limits(name: str):
+    # BULKHEAD_REPORTS="2,4" overrides limit and queue for the reports class
+    value = os.getenv(f"BULKHEAD_{name.upper()}")
+    if not value:
+        return DEFAULT_LIMITS[name]
+    limit, queue = (int(v) for v in value.split(","))
+    return limit, queue
+
+
+class Bulkhead:
+    """Concurrency limit with a bounded wait queue for one endpoint class."""
+
+    def __init__(self, name: str, limit: int, queue: int, max_wait: float):
+        self.name = name
+        self.limit = limit
+        self.queue = queue
+        self.max_wait = max_wait
+        self.semaphore = asyncio.Semaphore(limit)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = 0 # Rejected because the queue was full
+        self.timed_out = 0 # Rejected after waiting max_wait
+        self.avg_seconds = 0.0 # EWMA of time in the endpoint, used for Retry-After
+
+    async def acquire(self):
+        if self.semaphore.locked() and self.waiting >= self.queue:
+            self.shed += 1
+            return False # Fast path: no point queueing
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), self.max_wait)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            return False
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        self.admitted += 1
+        return True
+
+    def release(self, elapsed: float):
+        self.active -= 1
+        self.avg_seconds = elapsed if not self.avg_seconds else 0.8 * self.avg_seconds + 0.2 * elapsed
+        self.semaphore.release()
+
+    def retry_after(self):
+        # Roughly the time for the current queue to drain, at least one second
+        return max(1, math.ceil(self.avg_seconds * (self.waiting + 1) / self.limit))
+
+    def stats(self):
+        return {
+            "limit": self.limit,
+            "queue": self.queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "timed_out": self.timed_out,
+            "avg_seconds": round(self.avg_seconds, 4),
+        }
+
+
+BULKHEADS = {
+    name: Bulkhead(name, *configured_limits(name), BULKHEAD_MAX_WAIT) for name in DEFAULT_LIMITS
+}
+
+
+def endpoint_class(method: str, path: str):
+    for name, methods, pattern in ENDPOINT_CLASSES:
+        if method in methods and pattern.match(path):
+            return name
+    return None
+
+
+def admission_stats():
+    return {name: bulkhead.stats() for name, bulkhead in BULKHEADS.items()}
+
+
+class AdmissionMiddleware:
+    """ASGI middleware: run each endpoint class inside its bulkhead, shed with 503 when full.
+
+    The slot is held until the response body is fully sent, so streamed exports count too.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        name = endpoint_class(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        bulkhead = BULKHEADS[name]
+        if not await bulkhead.acquire():
+            response = JSONResponse(
+                {"detail": f"Server busy ({name}), retry later"},
+                status_code=503,
+                headers={"Retry-After": str(bulkhead.retry_after())},
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            bulkhead.release(time.monotonic() - started)
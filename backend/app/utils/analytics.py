@@ -0,0 +1,120 @@
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+# Snapshot file layouts; every group-by / filter column must be listed here
+SCHEMAS = {
+    "requests": pa.schema([
+        ("id", pa.int32()),
+        ("pin_user_id", pa.int32()),
+        ("category_id", pa.int32()),
+        ("category", pa.string()),
+        ("status", pa.string()),
+        ("assigned_to", pa.int32()),
+        ("created_at", pa.timestamp("us", tz="UTC")),
+        ("completed_at", pa.timestamp("us", tz="UTC")),
+        ("completion_days", pa.float64()),
+        ("view", pa.int32()),
+        ("shortlist_count", pa.int32()),
+        ("archived", pa.bool_()),
+    ]),
+    "shortlists": pa.schema([
+        ("csr_user_id", pa.int32()),
+        ("request_id", pa.int32()),
+        ("pin_user_id", pa.int32()),
+        ("category_id", pa.int32()),
+        ("category", pa.string()),
+        ("status", pa.string()),
+        ("created_at", pa.timestamp("us", tz="UTC")),
+        ("completed_at", pa.timestamp("us", tz="UTC")),
+        ("archived", pa.bool_()),
+    ]),
+    "categories": pa.schema([
+        ("id", pa.int32()),
+        ("name", pa.string()),
+    ]),
+}
+
+DIMENSIONS = {
+    "requests": ("category", "category_id", "status", "pin_user_id", "assigned_to", "archived"),
+    "shortlists": ("category", "category_id", "status", "csr_user_id", "pin_user_id", "archived"),
+}
+TIME_FIELDS = ("created_at", "completed_at")
+BUCKETS = ("day", "week", "month", "quarter", "year")
+
+# metric name -> (column, arrow aggregate, options); "completed" counts the is_completed helper column
+METRICS = {
+    "requests": {
+        "count": ("id", "count", None),
+        "completed": ("is_completed", "sum", None),
+        "views": ("view", "sum", None),
+        "shortlists": ("shortlist_count", "sum", None),
+        "pins": ("pin_user_id", "count_distinct", None),
+        "avg_completion_days": ("completion_days", "mean", None),
+        "p50_completion_days": ("completion_days", "tdigest", pc.TDigestOptions(q=0.5)),
+        "p90_completion_days": ("completion_days", "tdigest", pc.TDigestOptions(q=0.9)),
+    },
+    "shortlists": {
+        "count": ("request_id", "count", None),
+        "requests": ("request_id", "count_distinct", None),
+        "csrs": ("csr_user_id", "count_distinct", None),
+        "completed": ("is_completed", "sum", None),
+    },
+}
+
+
+def filter_expression(filters: dict, time_field: str, start, end):
+    # filters: column -> list of accepted values; pushed down into the Parquet scan
+    expression = None
+    for column, values in filters.items():
+        clause = ds.field(column).isin(values) if len(values) > 1 else ds.field(column) == values[0]
+        expression = clause if expression is None else expression & clause
+    for clause in (
+        ds.field(time_field) >= pa.scalar(start, pa.timestamp("us", tz="UTC")) if start else None,
+        ds.field(time_field) < pa.scalar(end, pa.timestamp("us", tz="UTC")) if end else None,
+    ):
+        if clause is not None:
+            expression = clause if expression is None else expression & clause
+    return expression
+
+
+def aggregate(path: str, dataset: str, group_by, metrics, filters: dict, time_field: str, bucket: str = None, start=None, end=None):
+    """Vectorized GROUP BY over one snapshot file; returns a list of row dicts sorted by the keys."""
+    specs = [(name, *METRICS[dataset][name]) for name in metrics]
+    columns = {*group_by, *filters, time_field} | {column for _, column, _, _ in specs if column != "is_completed"}
+    if any(column == "is_completed" for _, column, _, _ in specs):
+        columns.add("status")
+
+    table = ds.dataset(path, format="parquet").to_table(
+        columns=sorted(columns), filter=filter_expression(filters, time_field, start, end)
+    )
+    if "status" in table.column_names:
+        table = table.append_column("is_completed", pc.cast(pc.equal(table["status"], "completed"), pa.int64()))
+
+    keys = list(group_by)
+    if bucket:
+        table = table.append_column("bucket", pc.floor_temporal(table[time_field], unit=bucket))
+        keys.insert(0, "bucket")
+    if not keys:
+        table = table.append_column("total", pa.array(["all"] * table.num_rows, pa.string()))
+        keys = ["total"]
+
+    # One zero-copy alias per metric, so two metrics over one column get distinct output names
+    for name, column, _, _ in specs:
+        table = table.append_column(f"m_{name}", table[column])
+    result = table.group_by(keys).aggregate(
+        [(f"m_{name}", function, options) if options else (f"m_{name}", function) for name, _, function, options in specs]
+    )
+    names = {f"m_{name}_{function}": name for name, _, function, _ in specs} # Arrow names outputs "<column>_<function>"
+    result = result.rename_columns([names.get(c, c) for c in result.column_names])
+    if keys == ["total"]:
+        result = result.drop_columns(["total"])
+    else:
+        result = result.sort_by([(key, "ascending") for key in keys])
+
+    rows = result.to_pylist()
+    for row in rows:
+        for name, _, function, _ in specs:
+            if function == "tdigest":
+                row[name] = row[name][0] if row[name] else None # tdigest returns one value per q
+    return rows
@@ -0,0 +1,317 @@
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from collections import OrderedDict
+from urllib.parse import urlparse
+import json
+import os
+import socket
+import threading
+import time
+
+# "memory" (per process), "resp" (Redis protocol server at CACHE_URL) or "none"
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_URL = os.getenv("CACHE_URL", "redis://localhost:6379/0")
+CACHE_TTL = int(os.getenv("CACHE_TTL", "60")) # Seconds; also bounds staleness of view counters
+# Evictions reach only the worker that made the write, so with several uvicorn workers the
+# memory backend is only as fresh as this TTL; use CACHE_BACKEND=resp to share one cache instead
+CACHE_MEMORY_TTL = int(os.getenv("CACHE_MEMORY_TTL", "5"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+
+
+# --- Keys: one per entity and scope ---
+def request_key(request_id):
+    return f"request:{request_id}"
+
+def pin_requests_key(pin_user_id):
+    return f"pin_requests:{pin_user_id}"
+
+# Prefixes of every per-request and per-PIN entry (category names are copied into both)
+REQUEST_PREFIXES = ("request:", "pin_requests:")
+
+CSR_COMPLETED_KEY = "completed_requests:csr"
+USER_PROFILES_KEY = "user_profiles:all"
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    def as_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+        }
+
+
+class MemoryCache:
+    """LRU + TTL cache in process memory, safe to share between threadpool threads."""
+
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict() # key -> (expires_at, value), least recently used first
+        self.lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self.entries[key]
+                self.expirations += 1
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value, ttl: int = None):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + (ttl or self.ttl), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys: str):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def delete_prefix(self, prefix: str):
+        with self.lock:
+            for key in [key for key in self.entries if key.startswith(prefix)]:
+                del self.entries[key]
+
+    def stats(self):
+        return {
+            "backend": "memory",
+            "size": len(self.entries),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class RespCache:
+    """Minimal Redis-protocol (RESP) client: GET / SET EX / DEL over one socket.
+
+    Values are stored as JSON, entries expire on the server after `ttl`.
+    """
+
+    def __init__(self, url: str, ttl: int, timeout: float = 0.5):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.strip("/") or 0)
+        self.password = parsed.password
+        self.ttl = ttl
+        self.timeout = timeout
+        self.sock = None
+        self.reader = None
+        self.lock = threading.Lock()
+
+    def connect(self):
+        self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self.reader = self.sock.makefile("rb")
+        if self.password:
+            self.send("AUTH", self.password)
+        if self.db:
+            self.send("SELECT", self.db)
+
+    def send(self, *args):
+        payload = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            payload.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self.sock.sendall(b"".join(payload))
+        return self.read_reply()
+
+    def read_reply(self):
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Cache server closed the connection")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RuntimeError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            size = int(body)
+            if size < 0:
+                return None
+            data = self.reader.read(size + 2)[:-2]
+            return data
+        if kind == b"*":
+            count = int(body)
+            return None if count < 0 else [self.read_reply() for _ in range(count)]
+        raise RuntimeError(f"Unexpected cache reply: {line!r}")
+
+    def command(self, *args):
+        with self.lock:
+            try:
+                if self.sock is None:
+                    self.connect()
+                return self.send(*args)
+            except (OSError, ConnectionError):
+                self.close() # Reconnect on the next command
+                raise
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            finally:
+                self.sock = None
+                self.reader = None
+
+    def get(self, key: str):
+        data = self.command("GET", key)
+        return json.loads(data) if data is not None else None
+
+    def set(self, key: str, value, ttl: int = None):
+        self.command("SET", key, json.dumps(value), "EX", ttl or self.ttl)
+
+    def delete(self, *keys: str):
+        if keys:
+            self.command("DEL", *keys)
+
+    def delete_prefix(self, prefix: str):
+        # SCAN in steps instead of KEYS, so the server is never blocked on a large keyspace
+        cursor = b"0"
+        while True:
+            cursor, keys = self.command("SCAN", cursor, "MATCH", f"{prefix}*", "COUNT", 1000)
+            if keys:
+                self.command("DEL", *keys)
+            if cursor == b"0":
+                break
+
+    def stats(self):
+        stats = {"backend": "resp", "url": f"{self.host}:{self.port}/{self.db}"}
+        try:
+            stats["size"] = self.command("DBSIZE")
+            info = self.command("INFO", "stats") or b""
+            for line in info.decode().splitlines():
+                if line.startswith("evicted_keys:"):
+                    stats["evictions"] = int(line.split(":")[1])
+        except Exception as e:
+            stats["error"] = str(e)
+        return stats
+
+
+class ResponseCache:
+    """Cache-aside front end: hit/miss accounting, failures fall through to the database."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.counters = CacheStats()
+
+    def get_or_set(self, key: str, compute, ttl: int = None):
+        if self.backend is None:
+            return compute()
+
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            print(f"[WARN] Cache get failed: {e}")
+            self.counters.errors += 1
+            return compute()
+
+        if value is not None:
+            self.counters.hits += 1
+            return value
+
+        self.counters.misses += 1
+        value = compute()
+        if isinstance(value, str):
+            return value # Error message, never cached
+
+        value = jsonable_encoder(value) # Same shape from every backend
+        try:
+            self.backend.set(key, value, ttl)
+        except Exception as e:
+            print(f"[WARN] Cache set failed: {e}")
+            self.counters.errors += 1
+        return value
+
+    def delete(self, *keys: str):
+        if self.backend is None or not keys:
+            return
+        try:
+            self.backend.delete(*keys)
+            self.counters.invalidations += len(keys)
+        except Exception as e:
+            print(f"[WARN] Cache delete failed: {e}")
+            self.counters.errors += 1
+
+    def delete_prefix(self, *prefixes: str):
+        if self.backend is None:
+            return
+        try:
+            for prefix in prefixes:
+                self.backend.delete_prefix(prefix)
+                self.counters.invalidations += 1
+        except Exception as e:
+            print(f"[WARN] Cache delete failed: {e}")
+            self.counters.errors += 1
+
+    def stats(self):
+        if self.backend is None:
+            return {"backend": "none"}
+        return {**self.backend.stats(), **self.counters.as_dict()}
+
+
+def make_backend(name: str):
+    if name == "memory":
+        return MemoryCache(CACHE_MAX_ENTRIES, CACHE_MEMORY_TTL)
+    if name == "resp":
+        return RespCache(CACHE_URL, CACHE_TTL)
+    return None
+
+
+cache = ResponseCache(make_backend(CACHE_BACKEND))
+
+
+def cache_stats():
+    return cache.stats()
+
+
+# --- Invalidation: evict once the writing transaction has committed ---
+def evict_on_commit(db, *keys: str):
+    # Evicting before COMMIT would let a concurrent reader re-cache the old rows
+    db.info.setdefault("cache_evictions", set()).update(keys)
+
+def evict_prefixes_on_commit(db, *prefixes: str):
+    # For writes copied into many entries (e.g. a category name), drop every key with these prefixes
+    db.info.setdefault("cache_prefix_evictions", set()).update(prefixes)
+
+
+def _evict(session):
+    keys = session.info.pop("cache_evictions", None)
+    if keys:
+        cache.delete(*keys)
+    prefixes = session.info.pop("cache_prefix_evictions", None)
+    if prefixes:
+        cache.delete_prefix(*prefixes)
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_after_commit(session):
+    _evict(session)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _evict_after_rollback(session, previous_transaction):
+    # The rolled back writes may have been read (and cached) inside the same transaction
+    _evict(session)
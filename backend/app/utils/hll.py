@@ -0,0 +1,52 @@
+from hashlib import blake2b
+import math
+
+HLL_PRECISION = 8 # 2^8 registers: 256 bytes per sketch, ~6.5% standard error
+HLL_REGISTERS = 1 << HLL_PRECISION
+HLL_RANK_BITS = 64 - HLL_PRECISION
+
+
+def hash64(value: str):
+    # Stable across processes and restarts (unlike hash()), so sketches from any worker merge
+    return int.from_bytes(blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """Distinct-count sketch: one byte register per bucket, merged with an element-wise max."""
+
+    def __init__(self, registers: bytes = None):
+        self.registers = bytearray(registers) if registers else bytearray(HLL_REGISTERS)
+        if len(self.registers) != HLL_REGISTERS:
+            raise ValueError(f"Expected a {HLL_REGISTERS} byte sketch, got {len(self.registers)}")
+
+    def add(self, value: str):
+        x = hash64(value)
+        index = x >> HLL_RANK_BITS
+        rest = x & ((1 << HLL_RANK_BITS) - 1)
+        rank = HLL_RANK_BITS - rest.bit_length() + 1 # Position of the first 1 bit
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog"):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self):
+        m = HLL_REGISTERS
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros) # Linear counting is more accurate for small sets
+        return int(round(estimate))
+
+    def to_bytes(self):
+        return bytes(self.registers)
+
+
+def merge_sketches(sketches):
+    merged = HyperLogLog()
+    for sketch in sketches:
+        merged.merge(sketch if isinstance(sketch, HyperLogLog) else HyperLogLog(sketch))
+    return merged
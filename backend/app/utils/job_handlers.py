@@ -0,0 +1,99 @@
+import csv
+import os
+from pathlib import Path
+from app.entity.request_entity import PinRequestEntity
+from app.entity.userAccount_entity import UserAccountEntity
+from app.entity.archive_entity import RequestArchiveEntity
+from app.entity.requestCounter_entity import RequestCounterEntity
+from app.entity.recommendation_entity import RecommendationEntity
+from app.entity.completionDigest_entity import CompletionDigestEntity
+from app.entity.analytics_entity import AnalyticsEntity
+
+# Large job results (exports) are written here and streamed back from disk
+JOB_RESULTS_DIR = Path(os.getenv("JOB_RESULTS_DIR", Path(__file__).resolve().parents[2] / "job_results"))
+EXPORT_CHUNK = 5000 # Rows fetched per round trip while exporting
+
+
+def run_daily_report(job, progress):
+    payload = job["payload"]
+    return PinRequestEntity().generate_pm_daily_report(payload.get("date")), None
+
+
+def run_weekly_report(job, progress):
+    payload = job["payload"]
+    return PinRequestEntity().generate_pm_weekly_report(payload.get("week")), None
+
+
+def run_monthly_report(job, progress):
+    payload = job["payload"]
+    return PinRequestEntity().generate_pm_monthly_report(payload.get("month")), None
+
+
+def run_batch_assign(job, progress):
+    return PinRequestEntity().batch_assign_requests(job["payload"]), None
+
+
+def run_bulk_create_users(job, progress):
+    return UserAccountEntity().bulk_create_users(job["payload"].get("users") or []), None
+
+
+def run_archive_requests(job, progress):
+    payload = job["payload"]
+    return RequestArchiveEntity().archive_completed_requests(int(payload.get("batch_size", 1000))), None
+
+
+def run_reconcile_counters(job, progress):
+    payload = job["payload"]
+    return RequestCounterEntity().reconcile_shortlist_counts(int(payload.get("batch_size", 5000))), None
+
+
+def run_refresh_recommendations(job, progress):
+    payload = job["payload"]
+    return RecommendationEntity().refresh_recommendations(bool(payload.get("full", False))), None
+
+
+def run_rebuild_completion_digests(job, progress):
+    return CompletionDigestEntity().rebuild_digests(job["payload"].get("since")), None
+
+
+def run_export_analytics(job, progress):
+    return AnalyticsEntity().export_snapshot(), None
+
+
+def run_export_completed_requests(job, progress):
+    entity = PinRequestEntity()
+    total = entity.count_completed_requests(job["payload"])
+    progress(10)
+
+    JOB_RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    path = JOB_RESULTS_DIR / f"job_{job['id']}_completed_requests.csv"
+    fields = ["id", "pin_user_id", "title", "description", "status", "category_name", "created_at", "completed_at"]
+
+    # Rows are streamed from the database and written as they arrive, never held all at once
+    rows = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        for row in entity.stream_completed_requests(job["payload"], EXPORT_CHUNK):
+            writer.writerow(row)
+            rows += 1
+            if rows % EXPORT_CHUNK == 0:
+                progress(10 + 90 * min(rows, total) // max(total, 1))
+
+    return {"rows": rows}, str(path)
+
+
+# job_type -> handler(job, progress) returning (result, result_path)
+JOB_HANDLERS = {
+    "pm_daily_report": run_daily_report,
+    "pm_weekly_report": run_weekly_report,
+    "pm_monthly_report": run_monthly_report,
+    "batch_assign": run_batch_assign,
+    "bulk_create_users": run_bulk_create_users,
+    "archive_requests": run_archive_requests,
+    "reconcile_counters": run_reconcile_counters,
+    "refresh_recommendations": run_refresh_recommendations,
+    "rebuild_completion_digests": run_rebuild_completion_digests,
+    "export_analytics": run_export_analytics,
+    "export_completed_requests": run_export_completed_requests,
+}
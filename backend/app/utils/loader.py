@@ -0,0 +1,40 @@
+from sqlalchemy import select, inspect
+
+
+class BatchLoader:
+    """Per-session lookup cache for small reference rows (categories, CSRs, profiles).
+
+    Keys that are not cached yet are fetched together with one IN query; misses
+    are remembered as None so the same id is never looked up twice.
+    """
+
+    def __init__(self, db, model, column):
+        self.db = db
+        self.model = model
+        self.column = column
+        self.rows = {}
+
+    def load_many(self, keys):
+        missing = [k for k in dict.fromkeys(keys) if k is not None and k not in self.rows]
+        if missing:
+            found = self.db.execute(select(self.model).where(self.column.in_(missing))).scalars().all()
+            for row in found:
+                self.rows[getattr(row, self.column.key)] = row
+            for key in missing:
+                self.rows.setdefault(key, None)
+        return {k: self.rows.get(k) for k in keys if k is not None}
+
+    def load(self, key):
+        if key is None:
+            return None
+        return self.load_many([key])[key]
+
+
+def get_loader(db, model, column=None):
+    # One loader per (model, column) per session, so a request-scoped session shares it across entity calls
+    column = column if column is not None else inspect(model).primary_key[0]
+    loaders = db.info.setdefault("loaders", {})
+    key = (model, column.key)
+    if key not in loaders:
+        loaders[key] = BatchLoader(db, model, column)
+    return loaders[key]
@@ -0,0 +1,230 @@
+from app.database import engine
+from app.models.models import RateLimitBucket
+from app.utils.admission import endpoint_class
+from sqlalchemy import delete, func, literal, Float
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from collections import OrderedDict
+import math
+import os
+import random
+import re
+import time
+
+# "memory" keeps buckets per worker process; "postgres" shares them across workers
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000")) # Memory bound for the in-process backend
+
+# Route class -> (tokens per second, burst); the view counter gets its own class
+DEFAULT_RATES = {
+    "view": (2.0, 10),
+    "feeds": (5.0, 20),
+    "search": (2.0, 10),
+    "reports": (0.5, 5),
+    "exports": (0.2, 3),
+}
+
+VIEW_PATH = re.compile(r"^/api/requests/\d+/view$")
+
+# Peers allowed to set X-Forwarded-For (e.g. "10.0.0.5,10.0.0.6" for the load balancers);
+# from anyone else the header is ignored, since a client could send any address in it
+RATE_LIMIT_TRUSTED_PROXIES = {p.strip() for p in os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "").split(",") if p.strip()}
+
+# Query params that name the caller; unverified (there is no auth token yet), so they only tell
+# unique viewers apart and never choose a rate limit bucket
+USER_PARAMS = ("id", "pin_user_id", "csr_user_id", "csr_id", "user_id")
+USER_PARAM = re.compile(r"(?:^|&)(" + "|".join(USER_PARAMS) + r")=(\d+)")
+
+
+def configured_rate(name: str):
+    # RATE_LIMIT_VIEW="2,10" overrides tokens/second and burst for the view class
+    value = os.getenv(f"RATE_LIMIT_{name.upper()}")
+    if not value:
+        return DEFAULT_RATES[name]
+    rate, burst = value.split(",")
+    return float(rate), int(burst)
+
+
+RATES = {name: configured_rate(name) for name in DEFAULT_RATES}
+
+
+def rate_class(method: str, path: str):
+    if method == "POST" and VIEW_PATH.match(path):
+        return "view"
+    return endpoint_class(method, path)
+
+
+def client_ip(scope):
+    # Peer address; behind a trusted proxy, the nearest untrusted address it forwarded
+    client = scope.get("client")
+    ip = client[0] if client else "unknown"
+    if ip not in RATE_LIMIT_TRUSTED_PROXIES:
+        return ip
+    forwarded = [
+        value.decode("latin-1") for name, value in scope.get("headers", []) if name == b"x-forwarded-for"
+    ]
+    hops = [hop.strip() for value in forwarded for hop in value.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if hop not in RATE_LIMIT_TRUSTED_PROXIES:
+            return hop
+    return ip
+
+
+def client_key(scope):
+    # Rate limit bucket: the client IP, never a value the client can change per call
+    return f"ip:{client_ip(scope)}"
+
+
+def viewer_key(scope):
+    # Unique-viewer identity: user id from the query string when present, otherwise the client IP
+    match = USER_PARAM.search(scope.get("query_string", b"").decode("latin-1"))
+    if match:
+        return f"user:{match.group(2)}"
+    return client_key(scope)
+
+
+class MemoryBuckets:
+    """Token buckets in an LRU dict; idle buckets are dropped once they would be full again."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict() # key -> (tokens, last refill time), least recently used first
+        self.idle_seconds = max(burst / rate for rate, burst in RATES.values())
+        self.expired = 0
+
+    def take(self, key: str, rate: float, burst: int):
+        now = time.monotonic()
+        tokens, last = self.buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - last) * rate)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self.buckets[key] = (tokens, now)
+        self.expire(now)
+
+        retry_after = 0 if allowed else math.ceil((1 - tokens) / rate)
+        return allowed, int(tokens), retry_after
+
+    def expire(self, now: float):
+        # A bucket idle longer than the slowest refill is full again, so forgetting it changes nothing
+        while self.buckets:
+            key, (_, last) = next(iter(self.buckets.items()))
+            if now - last < self.idle_seconds and len(self.buckets) <= self.max_keys:
+                break
+            del self.buckets[key]
+            self.expired += 1
+
+    def stats(self):
+        return {"backend": "memory", "buckets": len(self.buckets), "expired": self.expired}
+
+
+class PostgresBuckets:
+    """Token buckets in the UNLOGGED rate_limit_buckets table, one upsert per check."""
+
+    def __init__(self):
+        self.table = RateLimitBucket.__table__
+
+    def take(self, key: str, rate: float, burst: int):
+        t = self.table
+        refilled = func.least(
+            literal(burst, Float), t.c.tokens + func.extract("epoch", func.now() - t.c.updated_at) * rate
+        )
+        # Refill and take one token atomically; the WHERE skips the update when the bucket is empty
+        stmt = (
+            pg_insert(t)
+            .values(key=key, tokens=burst - 1, updated_at=func.now())
+            .on_conflict_do_update(
+                index_elements=[t.c.key],
+                set_={"tokens": refilled - 1, "updated_at": func.now()},
+                where=refilled >= 1,
+            )
+            .returning(t.c.tokens)
+        )
+        with engine.begin() as conn:
+            tokens = conn.execute(stmt).scalar()
+            if random.random() < 0.001:
+                # Occasionally drop buckets that have been idle for a day
+                conn.execute(delete(t).where(t.c.updated_at < func.now() - func.make_interval(0, 0, 0, 1)))
+
+        if tokens is None:
+            return False, 0, math.ceil(1 / rate)
+        return True, int(tokens), 0
+
+    def stats(self):
+        return {"backend": "postgres"}
+
+
+class RateLimiter:
+    def __init__(self, backend: str):
+        self.store = PostgresBuckets() if backend == "postgres" else MemoryBuckets(RATE_LIMIT_MAX_KEYS)
+        self.allowed = {name: 0 for name in RATES}
+        self.limited = {name: 0 for name in RATES}
+
+    async def check(self, name: str, key: str):
+        rate, burst = RATES[name]
+        bucket_key = f"{name}:{key}"
+        if isinstance(self.store, PostgresBuckets):
+            result = await run_in_threadpool(self.store.take, bucket_key, rate, burst)
+        else:
+            result = self.store.take(bucket_key, rate, burst) # In-process: no await, no I/O
+
+        if result[0]:
+            self.allowed[name] += 1
+        else:
+            self.limited[name] += 1
+        return result
+
+    def stats(self):
+        return {**self.store.stats(), "allowed": self.allowed, "limited": self.limited, "rates": RATES}
+
+
+limiter = RateLimiter(RATE_LIMIT_BACKEND)
+
+
+def rate_limit_stats():
+    return limiter.stats()
+
+
+class RateLimitMiddleware:
+    """ASGI middleware: per-client-IP token bucket per route class, 429 when empty.
+
+    Runs before admission control and before any route code touches the database.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        name = rate_class(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        allowed, remaining, retry_after = await limiter.check(name, client_key(scope))
+        limit = str(RATES[name][1])
+
+        if not allowed:
+            response = JSONResponse(
+                {"detail": f"Too many requests ({name}), retry later"},
+                status_code=429,
+                headers={
+                    "Retry-After": str(retry_after),
+                    "X-RateLimit-Limit": limit,
+                    "X-RateLimit-Remaining": "0",
+                },
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"x-ratelimit-limit", limit.encode()),
+                    (b"x-ratelimit-remaining", str(remaining).encode()),
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,87 @@
+import numpy as np
+from scipy import sparse
+
+# History weights: an assignment says more about a CSR than a shortlist
+SHORTLIST_WEIGHT = 1.0
+ASSIGNMENT_WEIGHT = 3.0
+
+CATEGORY_PRIOR = 0.2 # Weight of what all CSRs like, so CSRs without history still get a ranking
+POPULARITY_WEIGHT = 0.05 # Tie-breaker: log(1 + shortlist_count)
+CHUNK_ROWS = 256 # CSRs scored per dense block (CHUNK_ROWS x pending requests floats)
+
+
+def index_of(keys):
+    return {key: i for i, key in enumerate(keys)}
+
+
+def affinity_matrix(history, csr_index: dict, category_index: dict):
+    # history: (csr_user_id, category_id, weight) rows, duplicates are summed; each CSR row sums to 1
+    rows, cols, weights = [], [], []
+    for csr_user_id, category_id, weight in history:
+        if csr_user_id in csr_index and category_id in category_index:
+            rows.append(csr_index[csr_user_id])
+            cols.append(category_index[category_id])
+            weights.append(float(weight))
+
+    matrix = sparse.csr_matrix(
+        (np.array(weights, dtype=np.float64), (rows, cols)),
+        shape=(len(csr_index), len(category_index)),
+    )
+    totals = np.asarray(matrix.sum(axis=1)).ravel()
+    totals[totals == 0] = 1.0
+    return (sparse.diags(1.0 / totals) @ matrix).tocsr()
+
+
+def category_matrix(request_categories, category_index: dict):
+    # One-hot (categories x requests): column j has a 1 in the row of request j's category
+    cols = np.arange(len(request_categories))
+    rows = np.array([category_index[c] for c in request_categories], dtype=np.int64)
+    return sparse.csr_matrix(
+        (np.ones(len(cols)), (rows, cols)), shape=(len(category_index), len(request_categories))
+    )
+
+
+def pair_matrix(pairs, csr_index: dict, request_index: dict):
+    # (csr_user_id, request_id) pairs -> sparse 0/1 matrix, used to mask already shortlisted requests
+    kept = [(csr_index[c], request_index[r]) for c, r in pairs if c in csr_index and r in request_index]
+    rows = np.array([p[0] for p in kept], dtype=np.int64)
+    cols = np.array([p[1] for p in kept], dtype=np.int64)
+    return sparse.csr_matrix(
+        (np.ones(len(kept)), (rows, cols)), shape=(len(csr_index), len(request_index))
+    )
+
+
+def base_scores(affinity, categories, popularity):
+    # Per-request part of the score shared by every CSR
+    overall = np.asarray(affinity.sum(axis=0)).ravel()
+    if overall.sum() > 0:
+        overall = overall / overall.sum()
+    return CATEGORY_PRIOR * (categories.T @ overall) + POPULARITY_WEIGHT * np.log1p(np.asarray(popularity, dtype=np.float64))
+
+
+def top_k(affinity, categories, base, excluded, k: int, rows=None):
+    """Best k request columns per CSR row, as (columns, scores) arrays of shape (len(rows), <=k).
+
+    Scores are affinity[csr] . category(request) + base[request]; excluded pairs score -inf.
+    """
+    rows = np.arange(affinity.shape[0]) if rows is None else np.asarray(rows)
+    n_requests = categories.shape[1]
+    k = min(k, n_requests)
+    if k == 0 or len(rows) == 0:
+        return np.empty((len(rows), 0), dtype=np.int64), np.empty((len(rows), 0))
+
+    all_columns, all_scores = [], []
+    for start in range(0, len(rows), CHUNK_ROWS):
+        block = rows[start:start + CHUNK_ROWS]
+        scores = (affinity[block] @ categories).toarray() + base
+        masked = excluded[block].nonzero()
+        scores[masked] = -np.inf
+
+        # argpartition finds the k best in O(n), only those k are sorted
+        best = np.argpartition(-scores, k - 1, axis=1)[:, :k] if k < n_requests else np.tile(np.arange(n_requests), (len(block), 1))
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1)
+        all_columns.append(np.take_along_axis(best, order, axis=1))
+        all_scores.append(np.take_along_axis(best_scores, order, axis=1))
+
+    return np.vstack(all_columns), np.vstack(all_scores)
@@ -0,0 +1,105 @@
+import math
+import struct
+
+TDIGEST_COMPRESSION = 100 # At most ~compression centroids: ~0.1% rank error at p99, ~0.8KB stored
+TDIGEST_HEADER = struct.Struct("<dd") # min, max; then (mean, weight) float32 pairs
+
+
+def q_limit(q: float, compression: float):
+    # Largest quantile a centroid starting at q may reach (k1 scale: small centroids at the tails)
+    k = compression / (2 * math.pi) * math.asin(2 * q - 1) + 1
+    if k >= compression / 4:
+        return 1.0
+    return (math.sin(k * 2 * math.pi / compression) + 1) / 2
+
+
+class TDigest:
+    """Quantile sketch: sorted (mean, weight) centroids, merged by re-clustering their union."""
+
+    def __init__(self, data: bytes = None, compression: float = TDIGEST_COMPRESSION):
+        self.compression = compression
+        self.centroids = [] # [(mean, weight)] sorted by mean, compressed
+        self.buffer = []
+        self.min = math.inf
+        self.max = -math.inf
+        if data:
+            self.min, self.max = TDIGEST_HEADER.unpack_from(data)
+            values = struct.unpack_from(f"<{(len(data) - TDIGEST_HEADER.size) // 4}f", data, TDIGEST_HEADER.size)
+            self.centroids = list(zip(values[::2], values[1::2]))
+
+    @property
+    def count(self):
+        return sum(w for _, w in self.centroids) + sum(w for _, w in self.buffer)
+
+    def add(self, value: float, weight: float = 1.0):
+        self.buffer.append((float(value), float(weight)))
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self.buffer) >= 5 * self.compression:
+            self.compress()
+        return self
+
+    def merge(self, other: "TDigest"):
+        self.buffer.extend(other.centroids)
+        self.buffer.extend(other.buffer)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.compress()
+        return self
+
+    def compress(self):
+        points = sorted(self.centroids + self.buffer)
+        self.buffer = []
+        if not points:
+            return
+        total = sum(w for _, w in points)
+
+        merged = []
+        mean, weight = points[0]
+        so_far = 0.0
+        limit = total * q_limit(0.0, self.compression)
+        for m, w in points[1:]:
+            if so_far + weight + w <= limit:
+                weight += w
+                mean += (m - mean) * w / weight
+            else:
+                merged.append((mean, weight))
+                so_far += weight
+                limit = total * q_limit(so_far / total, self.compression)
+                mean, weight = m, w
+        merged.append((mean, weight))
+        self.centroids = merged
+
+    def quantile(self, q: float):
+        # Interpolate between centroid centres, pinned to the exact min and max
+        self.compress()
+        if not self.centroids:
+            return None
+        total = sum(w for _, w in self.centroids)
+        target = min(max(q, 0.0), 1.0) * total
+
+        prev_rank, prev_value = 0.0, self.min
+        cumulative = 0.0
+        for mean, weight in self.centroids:
+            rank = cumulative + weight / 2
+            if target <= rank:
+                if rank == prev_rank:
+                    return mean
+                return prev_value + (mean - prev_value) * (target - prev_rank) / (rank - prev_rank)
+            prev_rank, prev_value = rank, mean
+            cumulative += weight
+        if total == prev_rank:
+            return self.max
+        return prev_value + (self.max - prev_value) * (target - prev_rank) / (total - prev_rank)
+
+    def to_bytes(self):
+        self.compress()
+        values = [v for centroid in self.centroids for v in centroid]
+        return TDIGEST_HEADER.pack(self.min, self.max) + struct.pack(f"<{len(values)}f", *values)
+
+
+def merge_digests(digests):
+    merged = TDigest()
+    for digest in digests:
+        merged.merge(digest if isinstance(digest, TDigest) else TDigest(digest))
+    return merged
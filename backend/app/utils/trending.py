@@ -0,0 +1,37 @@
+from sqlalchemy import func
+from datetime import datetime, timezone
+import math
+import os
+
+TREND_HALF_LIFE_HOURS = float(os.getenv("TREND_HALF_LIFE_HOURS", "24"))
+TREND_VIEW_WEIGHT = float(os.getenv("TREND_VIEW_WEIGHT", "1"))
+TREND_SHORTLIST_WEIGHT = float(os.getenv("TREND_SHORTLIST_WEIGHT", "5"))
+TREND_CREATED_WEIGHT = 1.0 # New requests start with one view's worth of score
+
+# requests.trend_score holds log(sum of weight * e^(rate * (t - epoch))) over its events.
+# Decaying every score by the same factor never changes their order, so nothing is
+# rewritten as time passes; the log keeps the stored values small.
+TREND_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+TREND_RATE = math.log(2) / (TREND_HALF_LIFE_HOURS * 3600) # per second
+
+
+def trend_point(weight: float, at=None):
+    # Log-space score of one event of this weight at `at` (default: transaction time)
+    at = func.now() if at is None else at
+    return math.log(weight) + TREND_RATE * (func.extract("epoch", at) - TREND_EPOCH.timestamp())
+
+
+def trend_bump(score, created_at, weight: float):
+    # log(e^score + e^point) without overflow; rows never scored start from their creation
+    current = func.coalesce(score, trend_point(TREND_CREATED_WEIGHT, created_at))
+    point = trend_point(weight)
+    gap = func.greatest(-func.abs(current - point), -50) # exp() underflow is an error in Postgres
+    return func.greatest(current, point) + func.ln(1 + func.exp(gap))
+
+
+def decayed_score(stored: float, now: datetime = None):
+    # Score as of now: the weighted event count, each event halved every TREND_HALF_LIFE_HOURS
+    if stored is None:
+        return 0.0
+    now = now or datetime.now(timezone.utc)
+    return math.exp(stored - TREND_RATE * (now - TREND_EPOCH).total_seconds())
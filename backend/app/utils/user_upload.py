@@ -0,0 +1,44 @@
+import csv
+import io
+import json
+
+USER_FIELDS = ("username", "email_address", "password", "role", "status")
+
+
+def iter_user_rows(file, filename: str):
+    """Yield user dicts from an uploaded CSV, JSON array or JSON Lines file.
+
+    CSV and JSON Lines are read line by line, so large uploads are never held in memory.
+    """
+    name = (filename or "").lower()
+
+    if name.endswith(".csv"):
+        reader = csv.DictReader(io.TextIOWrapper(file, encoding="utf-8-sig", newline=""))
+        for row in reader:
+            yield {k: (row.get(k) or "").strip() or None for k in USER_FIELDS}
+
+    elif name.endswith((".jsonl", ".ndjson")):
+        for line in io.TextIOWrapper(file, encoding="utf-8"):
+            if line.strip():
+                yield json.loads(line)
+
+    elif name.endswith(".json"):
+        rows = json.load(io.TextIOWrapper(file, encoding="utf-8"))
+        if not isinstance(rows, list):
+            raise ValueError("JSON upload must be an array of users")
+        yield from rows
+
+    else:
+        raise ValueError("Unsupported file type, use .csv, .json or .jsonl")
+
+
+def chunked(rows, size: int):
+    """Group an iterable into lists of at most `size` items."""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
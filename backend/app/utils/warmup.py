@@ -0,0 +1,81 @@
+from app.database import engine, SessionLocal, DB_POOL_SIZE
+from app.entity.request_entity import PIN_REQUESTS_STMT, CSR_FEED_STMT, VIEW_INCREMENT_STMT
+from app.entity.userAccount_entity import LOGIN_STMT
+from app.entity.category_entity import CATEGORIES_STMT
+from sqlalchemy import text
+from sqlalchemy.orm import configure_mappers
+import os
+import threading
+import time
+
+# Connections opened before the API reports ready (capped at the pool size)
+DB_WARM_CONNECTIONS = int(os.getenv("DB_WARM_CONNECTIONS", str(DB_POOL_SIZE)))
+
+# Hot statements and the params used to compile them; the ids match nothing, only the plan matters
+HOT_STATEMENTS = [
+    (PIN_REQUESTS_STMT, {"pin_user_id": -1}),
+    (CSR_FEED_STMT, {"csr_user_id": -1}),
+    (VIEW_INCREMENT_STMT, {"request_id": -1}),
+    (LOGIN_STMT, {"username": ""}),
+    (CATEGORIES_STMT, {}),
+]
+
+state = {"ready": False, "error": None, "warmup_seconds": None}
+lock = threading.Lock()
+
+
+def open_pool_connections(count: int):
+    # Check out `count` connections at once so the pool really holds that many, then return them
+    connections = []
+    try:
+        for _ in range(count):
+            conn = engine.connect()
+            conn.execute(text("SELECT 1"))
+            connections.append(conn)
+    finally:
+        for conn in connections:
+            conn.close()
+    return len(connections)
+
+
+def compile_hot_statements():
+    # Executing once fills the engine's compiled cache for each statement
+    with SessionLocal() as db:
+        for stmt, params in HOT_STATEMENTS:
+            db.execute(stmt, params).all()
+        db.rollback()
+    return len(HOT_STATEMENTS)
+
+
+def warm_up():
+    # Idempotent; safe to call again from the readiness check after a failed start
+    with lock:
+        if state["ready"]:
+            return state
+
+        started = time.monotonic()
+        try:
+            configure_mappers() # Otherwise done lazily by the first query
+            opened = open_pool_connections(min(DB_WARM_CONNECTIONS, DB_POOL_SIZE))
+            compiled = compile_hot_statements()
+        except Exception as e:
+            print(f"[WARN] Warmup failed: {e}")
+            state["error"] = str(e)
+            return state
+
+        state.update(
+            ready=True,
+            error=None,
+            connections=opened,
+            statements=compiled,
+            warmup_seconds=round(time.monotonic() - started, 3),
+        )
+        print(f"✅ Warmup done: {opened} connections, {compiled} statements in {state['warmup_seconds']}s")
+        return state
+
+
+def readiness():
+    # Ready only after a successful warmup; retry when the first attempt failed (e.g. DB not up yet)
+    if not state["ready"]:
+        warm_up()
+    return state
@@ -0,0 +1,28 @@
+"""
+Move completed requests older than ARCHIVE_RETENTION_DAYS (default 180) from
+`requests` into the month-partitioned `requests_archive` table.
+
+Run it periodically (e.g. nightly cron):
+
+    py archive_requests.py --batch-size 1000
+"""
+import argparse
+from app.entity.archive_entity import RequestArchiveEntity
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive old completed requests")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows moved per transaction")
+    parser.add_argument("--max-batches", type=int, default=None, help="stop after this many batches")
+    parser.add_argument("--pause", type=float, default=0.1, help="seconds to sleep between batches")
+    args = parser.parse_args()
+
+    result = RequestArchiveEntity().archive_completed_requests(args.batch_size, args.max_batches, args.pause)
+    if isinstance(result, str):
+        print(f"❌ {result}")
+    else:
+        print(f"🎉 Archived {result['archived']} requests in {result['batches']} batches (cutoff {result['cutoff']})")
+
+
+if __name__ == "__main__":
+    main()
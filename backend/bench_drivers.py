@@ -0,0 +1,85 @@
+"""
+Compare psycopg2 and psycopg 3 on the hot paths: the CSR feed and the
+request view counter.
+
+    py bench_drivers.py --iterations 2000 --csr-user-id 1 --request-id 1
+
+Each driver gets its own engine on the same DATABASE_URL. View increments
+run inside one transaction that is rolled back, so the data is left as it
+was. A driver that is not installed is skipped.
+"""
+import argparse
+import statistics
+import time
+from app.database import make_engine, DB_PREPARE_THRESHOLD
+from app.entity.request_entity import CSR_FEED_STMT, VIEW_INCREMENT_STMT
+
+DRIVERS = ["psycopg2", "psycopg"]
+
+
+def timed(conn, stmt, params, iterations: int, warmup: int):
+    # Per-call latency in ms; the warmup calls also let psycopg 3 reach its prepare threshold
+    for _ in range(warmup):
+        conn.execute(stmt, params).all()
+
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        conn.execute(stmt, params).all()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def summary(samples):
+    ordered = sorted(samples)
+    return {
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": round(ordered[len(ordered) // 2], 3),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1], 3),
+        "ops_per_s": round(1000 / statistics.fmean(ordered), 1),
+    }
+
+
+def bench_driver(driver: str, args):
+    try:
+        engine = make_engine(driver, pool_size=1, max_overflow=0)
+    except ImportError as e:
+        print(f"⚠️ Skipping {driver}: {e}")
+        return None
+
+    results = {}
+    try:
+        with engine.connect() as conn:
+            results["csr_feed"] = summary(
+                timed(conn, CSR_FEED_STMT, {"csr_user_id": args.csr_user_id}, args.iterations, args.warmup)
+            )
+            conn.rollback()
+
+            results["view_increment"] = summary(
+                timed(conn, VIEW_INCREMENT_STMT, {"request_id": args.request_id}, args.iterations, args.warmup)
+            )
+            conn.rollback() # Leave the view counter untouched
+    finally:
+        engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark psycopg2 vs psycopg 3 on hot queries")
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=max(20, DB_PREPARE_THRESHOLD * 2))
+    parser.add_argument("--csr-user-id", type=int, default=1)
+    parser.add_argument("--request-id", type=int, default=1)
+    args = parser.parse_args()
+
+    for driver in DRIVERS:
+        results = bench_driver(driver, args)
+        if results is None:
+            continue
+        print(f"\n=== {driver} ===")
+        for path, stats in results.items():
+            print(f"{path:15} " + "  ".join(f"{k}={v}" for k, v in stats.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""
+Export requests, shortlists and categories (live and archived) into a columnar
+Parquet snapshot under ANALYTICS_DIR, which GET /api/pm-analytics queries
+instead of the database. Run it periodically (cron or the "export_analytics" job):
+
+    py export_analytics.py
+"""
+from app.entity.analytics_entity import AnalyticsEntity
+
+
+def main():
+    result = AnalyticsEntity().export_snapshot()
+    if isinstance(result, str):
+        print(f"❌ {result}")
+    else:
+        rows = ", ".join(f"{count} {dataset}" for dataset, count in result["rows"].items())
+        print(f"🎉 Exported {result['snapshot']}: {rows}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Synthetic seed data generator.
+
+Writes a consistent dataset of any size in the same JSON layout as the seed
+files in this folder, so the output can be loaded with insert_users.py:
+
+    py generate_data.py --requests 200000 --out seed_data
+    py insert_users.py seed_data
+
+The output is deterministic for a given --seed and --end date. Files are
+streamed row by row, so memory use does not grow with --requests.
+
+IDs are assigned in file order and assume the tables are empty (same as the
+hand-written seed files), e.g. request_shortlists.request_id is the 1-based
+position of the request in pin_requests.json.
+"""
+import argparse
+import bisect
+import json
+import math
+import random
+import string
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from pathlib import Path
+
+
+BASE_DIR = Path(__file__).resolve().parent
+
+PROFILES = ["PLATFORM", "ADMIN", "CSR", "PIN"]
+
+COMPANIES = [
+    "Ryan PLC", "Baker PLC", "Powell LLC", "Helping Hands", "CareLink",
+    "Harbor Services", "Northside Outreach", "BrightPath", "Unity Aid", "Kin & Co",
+]
+
+TITLE_TEMPLATES = [
+    "{cat} request",
+    "Need help with {cat_l}",
+    "Urgent: {cat_l} assistance",
+    "Follow-up on {cat_l}",
+    "{cat} support for family",
+    "Referral for {cat_l}",
+]
+
+
+# -----------------------------
+# 🧩 HELPERS
+# -----------------------------
+
+class JsonArrayWriter:
+    """Writes a JSON array one element at a time."""
+
+    def __init__(self, path: Path):
+        self.f = open(path, "w", encoding="utf-8")
+        self.f.write("[")
+        self.count = 0
+
+    def write(self, obj: dict):
+        self.f.write("\n  " if self.count == 0 else ",\n  ")
+        json.dump(obj, self.f, ensure_ascii=False)
+        self.count += 1
+
+    def close(self):
+        self.f.write("\n]\n")
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ZipfSampler:
+    """Samples ranks 0..n-1 with P(k) proportional to 1 / (k + 1) ** s."""
+
+    def __init__(self, n: int, s: float):
+        self.cum = list(accumulate(1.0 / (k + 1) ** s for k in range(n)))
+        self.total = self.cum[-1]
+
+    def sample(self, rng: random.Random) -> int:
+        return bisect.bisect_left(self.cum, rng.random() * self.total)
+
+
+def fmt_ts(dt: datetime) -> str:
+    return dt.isoformat(timespec="seconds")
+
+
+def random_password(rng: random.Random) -> str:
+    alphabet = string.ascii_letters + string.digits + "!#$%&*+^_"
+    return "".join(rng.choice(alphabet) for _ in range(10))
+
+
+def category_names(count: int):
+    """Reuse the hand-written category names, then pad with numbered ones."""
+    names = []
+    try:
+        with open(BASE_DIR / "categories.json", "r", encoding="utf-8") as f:
+            names = [c["name"] for c in json.load(f) if c.get("name")]
+    except (FileNotFoundError, ValueError):
+        pass
+
+    names = list(dict.fromkeys(names))[:count]
+    n = 1
+    while len(names) < count:
+        names.append(f"Community Services {n}")
+        n += 1
+    return names
+
+
+# -----------------------------
+# 🧩 GENERATORS
+# -----------------------------
+
+def write_users(out: Path, rng: random.Random, args, start: datetime, end: datetime):
+    """Write user_profiles, user_accounts, pins and csrs."""
+    with JsonArrayWriter(out / "user_profiles.json") as w:
+        for name in PROFILES:
+            w.write({"name": name, "status": "active"})
+
+    span = (end - start).total_seconds()
+    user_id = 0
+
+    with JsonArrayWriter(out / "user_accounts.json") as accounts, \
+            JsonArrayWriter(out / "pins.json") as pins, \
+            JsonArrayWriter(out / "csrs.json") as csrs:
+
+        def add_account(role: str, username: str):
+            nonlocal user_id
+            user_id += 1
+            # Most accounts logged in recently, a long tail has been idle for months
+            last_login = end - timedelta(seconds=min(span, rng.expovariate(1 / (span / 20))))
+            accounts.write({
+                "id": user_id,
+                "username": username,
+                "password": random_password(rng),
+                "email_address": f"{username}@example.com",
+                "role": role,
+                "status": "suspended" if rng.random() < args.suspended_rate else "active",
+                "last_login": last_login.strftime("%Y-%m-%d %H:%M:%S"),
+            })
+            return user_id
+
+        add_account("PLATFORM", "platform1")
+        for i in range(1, args.admins + 1):
+            add_account("ADMIN", f"admin{i}")
+
+        for i in range(1, args.csrs + 1):
+            account_id = add_account("CSR", f"csr{i}")
+            csrs.write({"csr_user_id": i, "id": account_id, "company": rng.choice(COMPANIES)})
+
+        for i in range(1, args.pins + 1):
+            account_id = add_account("PIN", f"pin{i}")
+            pins.write({"pin_user_id": i, "id": account_id})
+
+    print(f"✅ Wrote {user_id} user accounts ({args.csrs} CSRs, {args.pins} PINs)")
+
+
+def write_categories(out: Path, names):
+    with JsonArrayWriter(out / "categories.json") as w:
+        for name in names:
+            w.write({"name": name})
+    print(f"✅ Wrote {len(names)} categories")
+
+
+def pick_shortlistees(rng: random.Random, csr_sampler: ZipfSampler, k: int):
+    """Pick k distinct CSRs, favouring the most active ones."""
+    picked = []
+    seen = set()
+    while len(picked) < k:
+        csr = csr_sampler.sample(rng) + 1
+        if csr not in seen:
+            seen.add(csr)
+            picked.append(csr)
+    return picked
+
+
+def write_requests(out: Path, rng: random.Random, args, names, start: datetime, end: datetime):
+    """Stream pin_requests and request_shortlists together so they stay consistent."""
+    category_sampler = ZipfSampler(len(names), args.zipf)
+    pin_sampler = ZipfSampler(args.pins, 0.8)
+    csr_sampler = ZipfSampler(args.csrs, 0.6)
+
+    # Zipf rank order should not simply follow the file order of the categories
+    category_order = names[:]
+    rng.shuffle(category_order)
+
+    span = (end - start).total_seconds()
+    max_shortlist = max(1, min(args.max_shortlist, args.csrs))
+    shortlist_total = 0
+
+    with JsonArrayWriter(out / "pin_requests.json") as requests, \
+            JsonArrayWriter(out / "request_shortlists.json") as shortlists:
+        for request_id in range(1, args.requests + 1):
+            category = category_order[category_sampler.sample(rng)]
+
+            # Request volume grows over time: density rises linearly towards `end`
+            created_at = start + timedelta(seconds=span * math.sqrt(rng.random()))
+            # Office hours are busier than nights
+            if rng.random() < 0.7:
+                created_at = min(end, created_at.replace(hour=rng.randint(8, 18)))
+
+            # Heavy tail: most requests get 0-2 shortlistees, a few get dozens
+            k = min(max_shortlist, int(rng.paretovariate(args.shortlist_alpha)) - 1)
+
+            # Lifecycle: shortlist -> assigned -> completed, each with a random delay
+            assigned_at = created_at + timedelta(days=rng.expovariate(1 / 7))
+            completed_at = assigned_at + timedelta(days=rng.lognormvariate(1.2, 0.8))
+
+            if completed_at <= end and rng.random() < 0.95:
+                status = "completed"
+            elif assigned_at <= end and rng.random() < 0.9:
+                status = "assigned"
+                completed_at = None
+            else:
+                status = "pending"
+                assigned_at = None
+                completed_at = None
+
+            if status != "pending":
+                k = max(k, 1)  # an assigned CSR is always one of the shortlistees
+
+            csr_ids = pick_shortlistees(rng, csr_sampler, k)
+            assigned_to = rng.choice(csr_ids) if status != "pending" else None
+
+            updated_at = completed_at or assigned_at or created_at
+            if status == "pending" and rng.random() < 0.2:
+                updated_at = min(end, created_at + timedelta(hours=rng.expovariate(1 / 24)))
+
+            view = k * rng.randint(2, 6) + int(rng.lognormvariate(2, 1))
+
+            requests.write({
+                "pin_user_id": pin_sampler.sample(rng) + 1,
+                "title": rng.choice(TITLE_TEMPLATES).format(cat=category, cat_l=category.lower()),
+                "description": f"Generated request under {category.lower()} category.",
+                "status": status,
+                "type": category,
+                "assigned_to": assigned_to,
+                "created_at": fmt_ts(created_at),
+                "updated_at": fmt_ts(updated_at),
+                "completed_at": fmt_ts(completed_at) if completed_at else None,
+                "view": view,
+            })
+
+            for csr_id in csr_ids:
+                shortlists.write({"csr_user_id": csr_id, "request_id": request_id})
+            shortlist_total += len(csr_ids)
+
+            if request_id % 100000 == 0:
+                print(f"... {request_id} requests written")
+
+    print(f"✅ Wrote {args.requests} requests and {shortlist_total} shortlist links")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic seed data for insert_users.py")
+    parser.add_argument("--requests", type=int, default=10000, help="number of PIN requests")
+    parser.add_argument("--pins", type=int, default=None, help="number of PIN users (default: requests / 10)")
+    parser.add_argument("--csrs", type=int, default=None, help="number of CSR users (default: requests / 50)")
+    parser.add_argument("--admins", type=int, default=5)
+    parser.add_argument("--categories", type=int, default=40)
+    parser.add_argument("--months", type=int, default=12, help="history length ending at --end")
+    parser.add_argument("--end", type=str, default=None, help="YYYY-MM-DD, defaults to today (UTC)")
+    parser.add_argument("--seed", type=int, default=314)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent for category popularity")
+    parser.add_argument("--shortlist-alpha", type=float, default=1.3, help="Pareto shape for shortlists per request")
+    parser.add_argument("--max-shortlist", type=int, default=50)
+    parser.add_argument("--suspended-rate", type=float, default=0.02)
+    parser.add_argument("--out", type=str, default="seed_data", help="output folder")
+    args = parser.parse_args()
+
+    args.pins = args.pins or max(1, args.requests // 10)
+    args.csrs = args.csrs or max(1, args.requests // 50)
+
+    if args.end:
+        end = datetime.strptime(args.end, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    else:
+        end = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    end = end + timedelta(days=1) - timedelta(seconds=1)  # include the whole end day
+    start = end - timedelta(days=30 * args.months)
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+
+    rng = random.Random(args.seed)
+    names = category_names(args.categories)
+
+    write_users(out, rng, args, start, end)
+    write_categories(out, names)
+    write_requests(out, rng, args, names, start, end)
+    print(f"\n🎉 Dataset written to {out.resolve()}")
+
+
+if __name__ == "__main__":
+    main()
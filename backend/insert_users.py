@@ -1,7 +1,9 @@
 import json
+import sys
 from datetime import datetime
+from pathlib import Path
 from app.database import SessionLocal
-from sqlalchemy import insert
+from sqlalchemy import insert, select, literal, String
 
 # --- Models ---
 from app.models.models import (
@@ -11,13 +13,18 @@ from app.models.models import (
     CSR,
     Request,
     Category,
+    RequestEvent,
     request_shortlists,
 )
 
 
+# Folder holding the seed JSON files (e.g. output of generate_data.py)
+DATA_DIR = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(".")
+
+
 # --- Utility Functions ---
 def load_json(filename):
-    with open(filename, "r", encoding="utf-8") as f:
+    with open(DATA_DIR / filename, "r", encoding="utf-8") as f:
         return json.load(f)
 
 
@@ -166,19 +173,23 @@ def import_requests(db):
     skipped_no_pin = 0
     skipped_no_csr = 0
 
+    # Load valid IDs and categories once instead of querying per row
+    pin_ids = {pid for (pid,) in db.query(PIN.pin_user_id)}
+    csr_ids = {cid for (cid,) in db.query(CSR.csr_user_id)}
+    categories = {c.name.lower(): c for c in db.query(Category)}
+
     for r in rows:
         pin_user_id = r["pin_user_id"]
 
         # Ensure the PIN exists
-        if not db.query(PIN).filter(PIN.pin_user_id == pin_user_id).first():
+        if pin_user_id not in pin_ids:
             print(f"⚠️ Skipped request (no matching PIN): pin_user_id={pin_user_id}")
             skipped_no_pin += 1
             continue
 
         assigned_to = r.get("assigned_to")
         if assigned_to is not None:
-            csr_exists = db.query(CSR).filter(CSR.csr_user_id == assigned_to).first()
-            if not csr_exists:
+            if assigned_to not in csr_ids:
                 print(f"⚠️ Skipped request (invalid CSR ID={assigned_to})")
                 skipped_no_csr += 1
                 continue
@@ -189,12 +200,13 @@ def import_requests(db):
         service_type = r.get("service_type") or r.get("type") or "Misc"
 
         # 🟩 Find or create category
-        category = db.query(Category).filter(Category.name.ilike(service_type)).first()
+        category = categories.get(service_type.lower())
         if not category:
             category = Category(name=service_type)
             db.add(category)
             db.commit()
             db.refresh(category)
+            categories[service_type.lower()] = category
 
         new_req = Request(
             pin_user_id=pin_user_id,
@@ -232,6 +244,14 @@ def import_request_shortlists(db):
     created = 0
     skipped = 0
 
+    # Load valid IDs and existing links once instead of querying per row
+    csr_ids = {cid for (cid,) in db.query(CSR.csr_user_id)}
+    request_ids = {rid for (rid,) in db.query(Request.id)}
+    existing_links = {
+        (row.csr_user_id, row.request_id)
+        for row in db.execute(request_shortlists.select())
+    }
+
     for row in rows:
         csr_id = row.get("csr_user_id")
         req_id = row.get("request_id")
@@ -241,22 +261,13 @@ def import_request_shortlists(db):
             continue
 
         # Check existence of CSR and Request
-        csr_exists = db.query(CSR).filter(CSR.csr_user_id == csr_id).first()
-        req_exists = db.query(Request).filter(Request.id == req_id).first()
-        if not csr_exists or not req_exists:
+        if csr_id not in csr_ids or req_id not in request_ids:
             print(f"⚠️ Skipped shortlist link — invalid IDs (csr={csr_id}, request={req_id})")
             skipped += 1
             continue
 
         # Prevent duplicates
-        existing = db.execute(
-            request_shortlists.select().where(
-                (request_shortlists.c.csr_user_id == csr_id)
-                & (request_shortlists.c.request_id == req_id)
-            )
-        ).first()
-
-        if existing:
+        if (csr_id, req_id) in existing_links:
             print(f"⚠️ Skipped existing shortlist: CSR {csr_id} → Request {req_id}")
             skipped += 1
             continue
@@ -267,6 +278,7 @@ def import_request_shortlists(db):
                 request_id=req_id,
             )
         )
+        existing_links.add((csr_id, req_id))
         created += 1
         print(f"✅ Linked CSR {csr_id} → Request {req_id}")
 
@@ -274,6 +286,30 @@ def import_request_shortlists(db):
     print(f"🎉 request_shortlists imported successfully! Added={created}, Skipped={skipped}")
 
 
+def import_request_events(db):
+    """Backfill request_events from existing requests (no assigned_at exists, updated_at stands in)."""
+    if db.query(RequestEvent.id).first():
+        print("⚠️ request_events already populated — skipping backfill.")
+        return
+
+    sources = [
+        ("created", Request.created_at, Request.created_at.isnot(None)),
+        ("assigned", Request.updated_at, Request.assigned_to.isnot(None)),
+        ("completed", Request.completed_at, Request.completed_at.isnot(None)),
+    ]
+    for event_type, occurred_at, condition in sources:
+        result = db.execute(
+            insert(RequestEvent).from_select(
+                ["request_id", "event_type", "category_id", "occurred_at"],
+                select(Request.id, literal(event_type, String), Request.category_id, occurred_at).where(condition),
+            )
+        )
+        print(f"✅ Backfilled {result.rowcount} '{event_type}' events")
+
+    db.commit()
+    print("🎉 request_events backfilled successfully!")
+
+
 def main():
     db = SessionLocal()
     try:
@@ -285,6 +321,7 @@ def main():
         import_categories(db)
         import_requests(db)
         import_request_shortlists(db)
+        import_request_events(db)
         print("\n✅ All data imported successfully!")
     except Exception as e:
         db.rollback()
@@ -356,6 +393,7 @@ if __name__ == "__main__":
 #     updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
 #     completed_at TIMESTAMPTZ,
 #     view INTEGER NOT NULL DEFAULT 0,
+#     shortlist_count INTEGER NOT NULL DEFAULT 0,
 #     CONSTRAINT valid_status CHECK (status IN ('pending', 'assigned', 'completed'))
 # );
 
@@ -364,4 +402,207 @@ if __name__ == "__main__":
 #     request_id  INTEGER NOT NULL REFERENCES requests(id) ON DELETE CASCADE,
 #     created_at  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
 #     PRIMARY KEY (csr_user_id, request_id)
-# );
\ No newline at end of file
+# );
+
+# CREATE INDEX ix_requests_status_completed_at ON requests (status, completed_at);
+
+# -- Cold archive for completed requests (filled by archive_requests.py),
+# -- one partition per month is created automatically by the archival job
+# CREATE TABLE requests_archive (
+#     id INTEGER NOT NULL,
+#     pin_user_id INTEGER NOT NULL REFERENCES pins(pin_user_id) ON DELETE CASCADE,
+#     title VARCHAR(255) NOT NULL,
+#     description TEXT,
+#     status VARCHAR(50) NOT NULL,
+#     category_id INTEGER REFERENCES categories(id) ON DELETE SET NULL,
+#     assigned_to INTEGER REFERENCES csrs(csr_user_id) ON DELETE SET NULL,
+#     created_at TIMESTAMPTZ NOT NULL,
+#     updated_at TIMESTAMPTZ NOT NULL,
+#     completed_at TIMESTAMPTZ,
+#     view INTEGER NOT NULL DEFAULT 0,
+#     shortlist_count INTEGER NOT NULL DEFAULT 0,
+#     archived_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+#     PRIMARY KEY (id, created_at)
+# ) PARTITION BY RANGE (created_at);
+# CREATE INDEX ix_requests_archive_completed_at ON requests_archive USING brin (completed_at);
+# CREATE INDEX ix_requests_archive_created_at ON requests_archive USING brin (created_at);
+# CREATE INDEX ix_requests_archive_pin_user_id ON requests_archive (pin_user_id);
+
+# CREATE TABLE request_shortlists_archive (
+#     csr_user_id INTEGER NOT NULL REFERENCES csrs(csr_user_id) ON DELETE CASCADE,
+#     request_id  INTEGER NOT NULL,
+#     PRIMARY KEY (csr_user_id, request_id)
+# );
+
+# CREATE TABLE jobs (
+#     id SERIAL PRIMARY KEY,
+#     job_type VARCHAR(50) NOT NULL,
+#     status VARCHAR(20) NOT NULL DEFAULT 'queued',
+#     payload JSONB NOT NULL DEFAULT '{}',
+#     result JSONB,
+#     result_path TEXT,
+#     error TEXT,
+#     progress INTEGER NOT NULL DEFAULT 0,
+#     attempts INTEGER NOT NULL DEFAULT 0,
+#     max_attempts INTEGER NOT NULL DEFAULT 3,
+#     run_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+#     locked_by TEXT,
+#     locked_at TIMESTAMPTZ,
+#     created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+#     updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+#     finished_at TIMESTAMPTZ,
+#     CONSTRAINT valid_job_status CHECK (status IN ('queued', 'running', 'succeeded', 'failed'))
+# );
+# CREATE INDEX ix_jobs_status_run_at ON jobs (status, run_at);
+
+# CREATE TABLE report_snapshots (
+#     id SERIAL PRIMARY KEY,
+#     report_type VARCHAR(20) NOT NULL,
+#     period VARCHAR(20) NOT NULL,
+#     data JSONB NOT NULL,
+#     created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+#     CONSTRAINT uq_report_snapshot_period UNIQUE (report_type, period)
+# );
+
+# CREATE TABLE request_events (
+#     id BIGSERIAL PRIMARY KEY,
+#     request_id INTEGER NOT NULL,
+#     event_type VARCHAR(20) NOT NULL,
+#     category_id INTEGER,
+#     actor_role VARCHAR(10),
+#     actor_id INTEGER,
+#     occurred_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+#     CONSTRAINT valid_event_type CHECK (event_type IN ('created', 'shortlisted', 'unshortlisted', 'assigned', 'completed', 'deleted'))
+# );
+# CREATE INDEX ix_request_events_request_id ON request_events (request_id);
+# CREATE INDEX ix_request_events_type_occurred_at ON request_events (event_type, occurred_at);
+# CREATE INDEX ix_requests_created_at ON requests (created_at);
+# CREATE INDEX ix_requests_facets ON requests (status, category_id, assigned_to) INCLUDE (pin_user_id, created_at);
+
+# CREATE UNLOGGED TABLE rate_limit_buckets (
+#     key VARCHAR(200) PRIMARY KEY,
+#     tokens DOUBLE PRECISION NOT NULL,
+#     updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+# );
+
+# -- Stored shortlist counts: add the columns, install the triggers
+# -- (py reconcile_counters.py --install-triggers), then backfill with
+# -- py reconcile_counters.py --repair
+# ALTER TABLE requests ADD COLUMN shortlist_count INTEGER NOT NULL DEFAULT 0;
+# ALTER TABLE requests_archive ADD COLUMN shortlist_count INTEGER NOT NULL DEFAULT 0;
+# CREATE INDEX ix_requests_shortlist_count ON requests (shortlist_count DESC, id);
+
+# -- Delta sync (GET /api/requests/changes): every write stamps the writing
+# -- transaction id on the row, deletes leave a tombstone (PostgreSQL 13+)
+# ALTER TABLE requests ADD COLUMN change_xid BIGINT NOT NULL DEFAULT 0;
+# ALTER TABLE requests_archive ADD COLUMN change_xid BIGINT NOT NULL DEFAULT 0;
+# CREATE INDEX ix_requests_change_xid ON requests (change_xid, id);
+#
+# CREATE TABLE tombstones (
+#     id BIGSERIAL PRIMARY KEY,
+#     entity VARCHAR(20) NOT NULL,
+#     entity_id INTEGER NOT NULL,
+#     pin_user_id INTEGER,
+#     reason VARCHAR(20) NOT NULL DEFAULT 'deleted',
+#     change_xid BIGINT NOT NULL DEFAULT pg_current_xact_id()::text::bigint,
+#     deleted_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+#     CONSTRAINT valid_tombstone_entity CHECK (entity IN ('request', 'category'))
+# );
+# CREATE INDEX ix_tombstones_change_xid ON tombstones (change_xid);
+#
+# CREATE OR REPLACE FUNCTION requests_stamp_change() RETURNS trigger AS $$
+# BEGIN
+#     NEW.change_xid := pg_current_xact_id()::text::bigint;
+#     RETURN NEW;
+# END $$ LANGUAGE plpgsql;
+# CREATE TRIGGER trg_requests_stamp_change
+#     BEFORE INSERT OR UPDATE ON requests
+#     FOR EACH ROW EXECUTE FUNCTION requests_stamp_change();
+#
+# -- Rows moved by archive_requests.py are tombstoned as 'archived'
+# CREATE OR REPLACE FUNCTION requests_tombstone() RETURNS trigger AS $$
+# BEGIN
+#     INSERT INTO tombstones (entity, entity_id, pin_user_id, reason)
+#     SELECT 'request', o.id, o.pin_user_id,
+#            CASE WHEN EXISTS (SELECT 1 FROM requests_archive a WHERE a.id = o.id) THEN 'archived' ELSE 'deleted' END
+#     FROM old_rows o;
+#     RETURN NULL;
+# END $$ LANGUAGE plpgsql;
+# CREATE TRIGGER trg_requests_tombstone
+#     AFTER DELETE ON requests
+#     REFERENCING OLD TABLE AS old_rows
+#     FOR EACH STATEMENT EXECUTE FUNCTION requests_tombstone();
+#
+# CREATE OR REPLACE FUNCTION categories_tombstone() RETURNS trigger AS $$
+# BEGIN
+#     INSERT INTO tombstones (entity, entity_id) SELECT 'category', o.id FROM old_rows o;
+#     RETURN NULL;
+# END $$ LANGUAGE plpgsql;
+# CREATE TRIGGER trg_categories_tombstone
+#     AFTER DELETE ON categories
+#     REFERENCING OLD TABLE AS old_rows
+#     FOR EACH STATEMENT EXECUTE FUNCTION categories_tombstone();
+
+# -- Distinct viewers: HyperLogLog sketches (256 bytes) per request / PIN / category / overall and UTC day
+# CREATE TABLE viewer_sketches (
+#     scope VARCHAR(10) NOT NULL,
+#     scope_id INTEGER NOT NULL,
+#     day DATE NOT NULL,
+#     sketch BYTEA NOT NULL,
+#     updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+#     PRIMARY KEY (scope, scope_id, day),
+#     CONSTRAINT valid_sketch_scope CHECK (scope IN ('request', 'pin', 'category', 'all'))
+# );
+
+# -- Trending: log-space decayed score (app/utils/trending.py), backfilled as one
+# -- creation event per request (rate = ln 2 / (TREND_HALF_LIFE_HOURS * 3600), epoch 2025-01-01 UTC)
+# ALTER TABLE requests ADD COLUMN trend_score DOUBLE PRECISION;
+# ALTER TABLE requests_archive ADD COLUMN trend_score DOUBLE PRECISION;
+# UPDATE requests SET trend_score = (ln(2) / 86400) * (extract(epoch FROM created_at) - extract(epoch FROM TIMESTAMPTZ '2025-01-01 00:00:00+00'));
+# CREATE INDEX ix_requests_trending ON requests (trend_score DESC NULLS LAST) WHERE status = 'pending';
+# CREATE INDEX ix_requests_trending_category ON requests (category_id, trend_score DESC NULLS LAST) WHERE status = 'pending';
+
+# -- CSR recommendations (refresh_recommendations.py / refresh_recommendations job)
+# CREATE TABLE csr_recommendations (
+#     csr_user_id INTEGER NOT NULL REFERENCES csrs(csr_user_id) ON DELETE CASCADE,
+#     rank INTEGER NOT NULL,
+#     request_id INTEGER NOT NULL,
+#     score DOUBLE PRECISION NOT NULL,
+#     refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+#     PRIMARY KEY (csr_user_id, rank)
+# );
+#
+# CREATE TABLE recommendation_runs (
+#     id SERIAL PRIMARY KEY,
+#     last_event_id BIGINT NOT NULL,
+#     xid_horizon BIGINT,
+#     full_refresh BOOLEAN NOT NULL DEFAULT FALSE,
+#     csrs_rescored INTEGER NOT NULL DEFAULT 0,
+#     csrs_merged INTEGER NOT NULL DEFAULT 0,
+#     finished_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+# );
+
+# -- Completion-time t-digests per category and UTC day; fill from history with the rebuild_completion_digests job
+# CREATE TABLE completion_digests (
+#     category_id INTEGER NOT NULL,
+#     day DATE NOT NULL,
+#     digest BYTEA NOT NULL,
+#     updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+#     PRIMARY KEY (category_id, day)
+# );
+
+# -- Per-request daily series: views batched from the view endpoint, shortlists by the shortlist insert trigger;
+# -- `py reconcile_counters.py --install-triggers` also creates it (IF NOT EXISTS) together with the trigger
+# CREATE TABLE request_daily_stats (
+#     request_id INTEGER NOT NULL REFERENCES requests(id) ON DELETE CASCADE,
+#     day DATE NOT NULL,
+#     views INTEGER NOT NULL DEFAULT 0,
+#     shortlists INTEGER NOT NULL DEFAULT 0,
+#     PRIMARY KEY (request_id, day)
+# );
+
+# -- Incremental recommendation refresh reads events by inserting transaction, not by id
+# ALTER TABLE request_events ADD COLUMN xid BIGINT NOT NULL DEFAULT 0;
+# ALTER TABLE request_events ALTER COLUMN xid SET DEFAULT pg_current_xact_id()::text::bigint;
+# CREATE INDEX ix_request_events_xid ON request_events (xid);
+# ALTER TABLE recommendation_runs ADD COLUMN xid_horizon BIGINT;
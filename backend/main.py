@@ -1,8 +1,43 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from app.routes import api_routes
+from app.utils.warmup import warm_up, readiness
+from app.utils.admission import AdmissionMiddleware, admission_stats
+from app.utils.ratelimit import RateLimitMiddleware, rate_limit_stats
+from app.utils.cache import cache_stats
+from app.entity.viewerSketch_entity import ViewerSketchEntity, VIEW_SKETCH_FLUSH_SECONDS
+from app.entity.requestSeries_entity import RequestSeriesEntity
 
-app = FastAPI()
+
+async def flush_view_buffers():
+    # Buffers also flush on a timer, so an idle worker does not sit on views until its next one
+    while True:
+        await asyncio.sleep(VIEW_SKETCH_FLUSH_SECONDS)
+        await run_in_threadpool(ViewerSketchEntity().flush)
+        await run_in_threadpool(RequestSeriesEntity().flush)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open pool connections, configure mappers and compile hot statements before serving
+    await run_in_threadpool(warm_up)
+    flusher = asyncio.create_task(flush_view_buffers())
+    yield
+    flusher.cancel()
+    # Write viewer sketches and view counts still buffered in this worker
+    await run_in_threadpool(ViewerSketchEntity().flush)
+    await run_in_threadpool(RequestSeriesEntity().flush)
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Bulkheads per endpoint class; added first so CORS headers are still set on 503s
+app.add_middleware(AdmissionMiddleware)
+# Token buckets per user/IP, checked before a request can take a bulkhead slot
+app.add_middleware(RateLimitMiddleware)
 
 # Allow your frontend origins
 origins = [
@@ -20,4 +55,19 @@ app.add_middleware(
 
 
 # Routes
-app.include_router(api_routes.router)
\ No newline at end of file
+app.include_router(api_routes.router)
+
+
+# Readiness probe: 503 until warmup has finished, so deploys do not route traffic to cold workers
+@app.get("/ready")
+async def ready(response: Response):
+    state = await run_in_threadpool(readiness)
+    if not state["ready"]:
+        response.status_code = 503
+    return state
+
+
+# Load metrics: bulkhead queue depth, admitted and shed counts, rate limiter counts, cache hit rate
+@app.get("/metrics")
+def metrics():
+    return {"admission": admission_stats(), "rate_limit": rate_limit_stats(), "cache": cache_stats()}
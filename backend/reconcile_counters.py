@@ -0,0 +1,52 @@
+"""
+Check and repair requests.shortlist_count against request_shortlists.
+
+The counter is maintained by triggers; this catches drift from writes made
+while the triggers were missing (restores, manual SQL, the first backfill).
+
+    py reconcile_counters.py --install-triggers
+    py reconcile_counters.py                 # report drift only
+    py reconcile_counters.py --repair --batch-size 5000
+"""
+import argparse
+from app.entity.requestCounter_entity import RequestCounterEntity
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile stored shortlist counts")
+    parser.add_argument("--install-triggers", action="store_true", help="(re)create the counter triggers first")
+    parser.add_argument("--repair", action="store_true", help="rewrite counts that do not match")
+    parser.add_argument("--batch-size", type=int, default=5000, help="requests locked and checked per transaction")
+    parser.add_argument("--limit", type=int, default=20, help="drifted rows to print when only checking")
+    args = parser.parse_args()
+
+    entity = RequestCounterEntity()
+
+    if args.install_triggers:
+        result = entity.install_triggers()
+        if isinstance(result, str):
+            print(f"❌ {result}")
+            return
+        print("✅ Counter triggers installed")
+
+    if args.repair:
+        result = entity.reconcile_shortlist_counts(args.batch_size)
+        if isinstance(result, str):
+            print(f"❌ {result}")
+        else:
+            print(f"🎉 Checked {result['checked']} requests, repaired {result['repaired']}")
+        return
+
+    drift = entity.find_drift(args.limit)
+    if isinstance(drift, str):
+        print(f"❌ {drift}")
+    elif not drift:
+        print("✅ No drift: every shortlist_count matches request_shortlists")
+    else:
+        for row in drift:
+            print(f"⚠️ Request {row['id']}: stored {row['stored']}, actual {row['actual']}")
+        print("Run with --repair to fix")
+
+
+if __name__ == "__main__":
+    main()
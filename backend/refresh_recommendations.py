@@ -0,0 +1,33 @@
+"""
+Refresh the top-K pending requests recommended to each CSR.
+
+Incremental by default: CSRs whose shortlists or assignments changed since the
+last run are rescored against every pending request, everyone else only gets
+the newly created requests merged into their stored list. Run it every few
+minutes (cron or the "refresh_recommendations" job), and --full nightly:
+
+    py refresh_recommendations.py
+    py refresh_recommendations.py --full --top-k 20
+"""
+import argparse
+from app.entity.recommendation_entity import RecommendationEntity, RECOMMEND_TOP_K
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh CSR request recommendations")
+    parser.add_argument("--full", action="store_true", help="rescore every CSR against every pending request")
+    parser.add_argument("--top-k", type=int, default=RECOMMEND_TOP_K, help="recommendations stored per CSR")
+    args = parser.parse_args()
+
+    result = RecommendationEntity().refresh_recommendations(args.full, args.top_k)
+    if isinstance(result, str):
+        print(f"❌ {result}")
+    elif result.get("csrs_rescored") == 0 and result.get("csrs_merged") == 0:
+        print("✅ Recommendations already up to date")
+    else:
+        mode = "Full" if result["full"] else "Incremental"
+        print(f"🎉 {mode} refresh: {result['csrs_rescored']} CSRs rescored, {result['csrs_merged']} merged")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,26 @@
 # Inject login details into controller to test the code
 
 import unittest
+import threading
+import socketserver
+import time
+from sqlalchemy import event, select, update, func, text
 from app.controllers.login_controller import LoginController
+from app.controllers.csr_controller import shortlistCSRRequestController, removeShortlistCSRRequestController
+from app.controllers.assignment_controller import getRequestChangesController, batchAssignRequestsController, updateRequestController, getAllRequestsController
+from app.database import engine, get_db_session, UnitOfWorkLocal, request_session
+from app.models.models import Request, RequestEvent, CSR, Job, CompletionDigest, request_shortlists
+from app.entity.job_entity import JobEntity
+from app.entity.archive_entity import RequestArchiveEntity, archive_horizon
+from app.entity.request_entity import PinRequestEntity
+from app.utils.cache import MemoryCache, RespCache, ResponseCache
+from app.entity.request_entity import xid_horizon
+from app.utils.hll import HyperLogLog, merge_sketches
+from app.utils.tdigest import TDigest, merge_digests
+from app.entity.requestSeries_entity import ViewCountBuffer
+from app.utils.trending import decayed_score, TREND_EPOCH, TREND_RATE, TREND_HALF_LIFE_HOURS
+from datetime import datetime, timedelta, timezone
+import math
 
 class TestLogin(unittest.TestCase):
     def test_login_success_admin(self):
@@ -21,6 +40,539 @@ class TestLogin(unittest.TestCase):
         result = controller.login("charlie", "1234")
         assert result == {} # Ensure that wrong login details will return an empty object
 
+class TestShortlistConcurrency(unittest.TestCase):
+    THREADS = 20
+
+    def setUp(self):
+        with get_db_session() as db:
+            self.request_id = db.execute(select(Request.id).where(Request.status == "pending").limit(1)).scalar()
+            self.csr_id = db.execute(select(CSR.csr_user_id).limit(1)).scalar()
+        removeShortlistCSRRequestController().remove_from_shortlist(self.request_id, self.csr_id) # Start from a clean state
+
+        self.statements = 0
+        self.lock = threading.Lock()
+        event.listen(engine, "before_cursor_execute", self.count_statement)
+
+    def tearDown(self):
+        event.remove(engine, "before_cursor_execute", self.count_statement)
+        removeShortlistCSRRequestController().remove_from_shortlist(self.request_id, self.csr_id)
+
+    def count_statement(self, *args):
+        with self.lock:
+            self.statements += 1
+
+    def hammer(self, call):
+        results = []
+        barrier = threading.Barrier(self.THREADS)
+
+        def worker():
+            barrier.wait() # Release all threads at once
+            results.append(call())
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return results
+
+    def shortlist_rows(self):
+        with get_db_session() as db:
+            return db.execute(
+                select(func.count()).select_from(request_shortlists).where(
+                    request_shortlists.c.request_id == self.request_id,
+                    request_shortlists.c.csr_user_id == self.csr_id,
+                )
+            ).scalar()
+
+    def counts(self):
+        # (stored shortlist_count, actual rows) for the request under test
+        with get_db_session() as db:
+            return db.execute(
+                select(
+                    Request.shortlist_count,
+                    select(func.count()).select_from(request_shortlists)
+                    .where(request_shortlists.c.request_id == self.request_id).scalar_subquery(),
+                ).where(Request.id == self.request_id)
+            ).one()
+
+    def test_concurrent_shortlist(self):
+        controller = shortlistCSRRequestController()
+        results = self.hammer(lambda: controller.shortlist_csr_requests(self.request_id, {"csr_id": self.csr_id}))
+
+        self.assertEqual(results.count(True), 1) # Exactly one caller wins
+        self.assertEqual(results.count("Request already shortlisted"), self.THREADS - 1) # No PK violation errors
+        self.assertEqual(self.statements, self.THREADS) # One statement per call
+        self.assertEqual(self.shortlist_rows(), 1)
+        stored, actual = self.counts()
+        self.assertEqual(stored, actual) # Trigger kept the stored counter in step
+
+    def test_concurrent_unshortlist(self):
+        shortlistCSRRequestController().shortlist_csr_requests(self.request_id, {"csr_id": self.csr_id})
+        self.statements = 0
+
+        controller = removeShortlistCSRRequestController()
+        results = self.hammer(lambda: controller.remove_from_shortlist(self.request_id, self.csr_id))
+
+        self.assertEqual(results.count(True), 1) # Exactly one caller wins
+        self.assertEqual(results.count("Not shortlisted"), self.THREADS - 1)
+        self.assertEqual(self.statements, self.THREADS) # One statement per call
+        self.assertEqual(self.shortlist_rows(), 0)
+        stored, actual = self.counts()
+        self.assertEqual(stored, actual)
+
+    def test_shortlist_missing_request(self):
+        controller = shortlistCSRRequestController()
+        result = controller.shortlist_csr_requests(-1, {"csr_id": self.csr_id})
+        self.assertEqual(result, "Request not found") # Ensure the existing return string is kept
+
+class TestBatchAssign(unittest.TestCase):
+    def setUp(self):
+        self.statements = 0
+        event.listen(engine, "before_cursor_execute", self.count_statement)
+
+    def tearDown(self):
+        event.remove(engine, "before_cursor_execute", self.count_statement)
+
+    def count_statement(self, *args):
+        self.statements += 1
+
+    def test_empty_request_ids_assigns_nothing(self):
+        result = batchAssignRequestsController().batch_assign_requests({"request_ids": []})
+        self.assertEqual(result, {"assigned": 0, "assignments": [], "unassigned": []})
+        self.assertEqual(self.statements, 0) # Not "every pending request"
+
+    def test_invalid_capacity_is_an_error_string(self):
+        controller = batchAssignRequestsController()
+        self.assertEqual(controller.batch_assign_requests({"capacity": "many"}), "Capacity must be a number")
+        self.assertEqual(controller.batch_assign_requests({"capacity": 0}), "Capacity must be at least 1")
+
+class TestJobOwnership(unittest.TestCase):
+    def setUp(self):
+        self.created = []
+
+    def make_job(self, **values):
+        with get_db_session() as db:
+            job = Job(job_type="pm_daily_report", payload={}, status="running", locked_by="worker-a", **values)
+            db.add(job)
+            db.commit()
+            self.created.append(job.id)
+            return job.id
+
+    def job(self, job_id):
+        with get_db_session() as db:
+            return db.query(Job).filter(Job.id == job_id).one()
+
+    def tearDown(self):
+        with get_db_session() as db:
+            db.query(Job).filter(Job.id.in_(self.created)).delete(synchronize_session=False)
+            db.commit()
+
+    def test_reclaimed_job_ignores_the_old_run(self):
+        job_id = self.make_job(attempts=1, locked_at=datetime.now(timezone.utc))
+        entity = JobEntity()
+        entity.update_progress(job_id, "worker-b", 50)
+        self.assertFalse(entity.complete_job(job_id, "worker-b", {"rows": 1}))
+        self.assertFalse(entity.fail_job(job_id, "worker-b", "boom"))
+        job = self.job(job_id)
+        self.assertEqual((job.status, job.progress, job.locked_by), ("running", 0, "worker-a"))
+        self.assertTrue(entity.complete_job(job_id, "worker-a", {"rows": 1}))
+        self.assertEqual(self.job(job_id).status, "succeeded")
+
+    def test_stale_job_out_of_attempts_is_failed_not_rerun(self):
+        job_id = self.make_job(attempts=3, max_attempts=3, locked_at=datetime.now(timezone.utc) - timedelta(hours=1))
+        claimed = JobEntity().claim_job("worker-test")
+        if claimed:
+            with get_db_session() as db: # Put back an unrelated job this claim picked up
+                db.query(Job).filter(Job.id == claimed["id"]).update(
+                    {"status": "queued", "locked_by": None, "attempts": Job.attempts - 1}
+                )
+                db.commit()
+        self.assertNotEqual(claimed and claimed["id"], job_id)
+        self.assertEqual(self.job(job_id).status, "failed")
+
+class TestReportsIncludeArchive(unittest.TestCase):
+    def setUp(self):
+        # Every entity call below shares one transaction that tearDown rolls back,
+        # so the rows archived by the test stay live in the seeded database
+        self.uow = UnitOfWorkLocal()
+        self.token = request_session.set(self.uow)
+
+    def tearDown(self):
+        request_session.reset(self.token)
+        self.uow.finish(False)
+
+    def test_monthly_report_unchanged_by_archiving(self):
+        with get_db_session() as db:
+            oldest = db.execute(
+                select(Request.created_at)
+                .where(Request.status == "completed", Request.completed_at < archive_horizon())
+                .order_by(Request.completed_at)
+                .limit(1)
+            ).scalar()
+        if oldest is None:
+            self.skipTest("No completed requests old enough to archive")
+
+        month = oldest.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        entity = PinRequestEntity()
+
+        def report():
+            # Computed directly, bypassing stored snapshots
+            result = entity.compute_pm_monthly_report(month)
+            month_end = month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1)
+            listing = entity.add_report_requests_page(
+                {}, month, lambda rows: (rows.c.created_at >= month) & (rows.c.created_at < month_end), 1, 500
+            )
+            return result, [r["id"] for r in listing["requests"]]
+
+        before, listed_before = report()
+        moved = RequestArchiveEntity().archive_completed_requests(batch_size=20, max_batches=1, pause=0)
+        self.assertGreater(moved["archived"], 0)
+        after, listed_after = report()
+
+        for key in ("by_week", "growth_trend", "top_shortlisted", "by_category"):
+            self.assertEqual(before[key], after[key], key)
+        self.assertEqual(before["summary"], after["summary"])
+        self.assertEqual(listed_before, listed_after)
+
+class TestCompleteAssignedRequest(unittest.TestCase):
+    def test_completion_keeps_the_assignee(self):
+        with get_db_session() as db:
+            req = db.execute(
+                select(Request.id, Request.assigned_to).where(Request.status == "assigned", Request.assigned_to.isnot(None)).limit(1)
+            ).first()
+            if req is None:
+                self.skipTest("No assigned request")
+            last_event = db.execute(select(func.coalesce(func.max(RequestEvent.id), 0))).scalar()
+
+        try:
+            self.assertTrue(updateRequestController().update_request(req.id, {"status": "completed"}))
+            with get_db_session() as db:
+                self.assertEqual(db.execute(select(Request.assigned_to).where(Request.id == req.id)).scalar(), req.assigned_to)
+                events = db.execute(
+                    select(RequestEvent.event_type, RequestEvent.actor_id)
+                    .where(RequestEvent.request_id == req.id, RequestEvent.id > last_event)
+                ).all()
+            self.assertEqual([tuple(e) for e in events], [("completed", req.assigned_to)]) # No spurious "assigned"
+        finally:
+            with get_db_session() as db:
+                db.execute(update(Request).where(Request.id == req.id).values(status="assigned", completed_at=None))
+                db.commit()
+
+class TestCompletionRecordedOnce(unittest.TestCase):
+    def setUp(self):
+        # Rolled back in tearDown, so neither the request nor the digests change for good
+        self.uow = UnitOfWorkLocal()
+        self.token = request_session.set(self.uow)
+
+    def tearDown(self):
+        request_session.reset(self.token)
+        self.uow.finish(False)
+
+    def test_reopened_request_is_not_counted_twice(self):
+        with get_db_session() as db:
+            req = db.execute(
+                select(Request.id, Request.category_id).where(Request.status == "assigned", Request.completed_at.is_(None)).limit(1)
+            ).first()
+        if req is None:
+            self.skipTest("No assigned request")
+
+        def samples():
+            with get_db_session() as db:
+                digests = db.execute(
+                    select(CompletionDigest.digest).where(CompletionDigest.category_id == (req.category_id or 0))
+                ).scalars().all()
+            return merge_digests(digests).count
+
+        before = samples()
+        controller = updateRequestController()
+        self.assertTrue(controller.update_request(req.id, {"status": "completed"}))
+        self.assertTrue(controller.update_request(req.id, {"status": "assigned"})) # Reopened
+        self.assertTrue(controller.update_request(req.id, {"status": "completed"}))
+        self.assertEqual(samples(), before + 1)
+
+class TestAllRequestsShortlistees(unittest.TestCase):
+    def test_shortlisted_requests_are_listed_with_csrs(self):
+        with get_db_session() as db:
+            row = db.execute(
+                select(Request.id, Request.pin_user_id, request_shortlists.c.csr_user_id)
+                .join(request_shortlists, request_shortlists.c.request_id == Request.id)
+                .limit(1)
+            ).first()
+        if row is None:
+            self.skipTest("No shortlisted request")
+
+        result = getAllRequestsController().get_all_requests({"pin_user_id": row.pin_user_id}, 1, 500)
+        listed = {r["id"]: r for r in result}
+        self.assertIn(row.id, listed) # Used to come back as [] for any page with a shortlisted request
+        shortlistees = listed[row.id]["shortlistees"]
+        self.assertIn(row.csr_user_id, [c["user_id"] for c in shortlistees])
+        self.assertTrue(all(c["username"] for c in shortlistees))
+
+        detail = PinRequestEntity().fetch_request(row.id)
+        self.assertIn(row.csr_user_id, [c["user_id"] for c in detail["shortlistees"]])
+
+class TestUnitOfWork(unittest.TestCase):
+    def setUp(self):
+        # What UnitOfWorkRoute does around a route handler
+        self.uow = UnitOfWorkLocal()
+        self.token = request_session.set(self.uow)
+        self.created = []
+
+    def tearDown(self):
+        request_session.reset(self.token)
+        with get_db_session() as db:
+            db.query(Job).filter(Job.id.in_(self.created)).delete(synchronize_session=False)
+            db.commit()
+
+    def submit(self):
+        job = JobEntity().submit_job({"job_type": "pm_daily_report"}, {"pm_daily_report"})
+        self.created.append(job["id"])
+        return job["id"]
+
+    def saved(self, job_id):
+        request_session.set(None)
+        with get_db_session() as db:
+            return db.query(Job).filter(Job.id == job_id).first() is not None
+
+    def test_commits_once_every_call_succeeded(self):
+        job_id = self.submit()
+        self.assertTrue(self.uow.finish(True))
+        self.assertTrue(self.saved(job_id))
+
+    def test_entity_rollback_fails_the_request(self):
+        job_id = self.submit()
+        with get_db_session() as db: # A later entity call's error path
+            db.rollback()
+        self.assertFalse(self.uow.finish(True))
+        self.assertFalse(self.saved(job_id))
+
+    def test_swallowed_error_fails_the_request(self):
+        job_id = self.submit()
+        with get_db_session() as db:
+            try:
+                db.execute(text("SELECT 1 / 0"))
+            except Exception:
+                pass # An entity that logs the error and returns without rolling back
+        self.assertFalse(self.uow.finish(True))
+        self.assertFalse(self.saved(job_id))
+
+class TestRequestChanges(unittest.TestCase):
+    def setUp(self):
+        with get_db_session() as db:
+            self.request_id = db.execute(select(Request.id).where(Request.status == "pending").limit(1)).scalar()
+            self.csr_id = db.execute(select(CSR.csr_user_id).limit(1)).scalar()
+            self.cursor = str(xid_horizon(db) - 1) # Everything written so far counts as seen
+        removeShortlistCSRRequestController().remove_from_shortlist(self.request_id, self.csr_id)
+
+    def tearDown(self):
+        removeShortlistCSRRequestController().remove_from_shortlist(self.request_id, self.csr_id)
+
+    def test_shortlist_shows_up_as_change(self):
+        controller = getRequestChangesController()
+        shortlistCSRRequestController().shortlist_csr_requests(self.request_id, {"csr_id": self.csr_id})
+
+        result = controller.get_request_changes(self.cursor, "all")
+        changed = {row["id"]: row for row in result["changes"]}
+        self.assertIn(self.request_id, changed) # The counter trigger stamped the row
+        self.assertGreaterEqual(changed[self.request_id]["shortlistees_count"], 1)
+
+        again = controller.get_request_changes(result["cursor"], "all")
+        self.assertNotIn(self.request_id, [row["id"] for row in again["changes"]]) # Cursor moved past it
+
+    def test_invalid_scope(self):
+        result = getRequestChangesController().get_request_changes(None, "csr:1")
+        self.assertIsInstance(result, str)
+
+class RespStandIn(socketserver.StreamRequestHandler):
+    # Local stand-in for a Redis-protocol server: GET, SET (EX), DEL, SCAN (one page), DBSIZE
+    store = {}
+
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:])):
+                size = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(size + 2)[:-2])
+
+            command = args[0].upper()
+            if command == b"GET":
+                value, expires = self.store.get(args[1], (None, None))
+                if value is None or expires < time.monotonic():
+                    self.wfile.write(b"$-1\r\n")
+                else:
+                    self.wfile.write(b"$%d\r\n%s\r\n" % (len(value), value))
+            elif command == b"SET":
+                ttl = int(args[4]) if len(args) > 4 else 3600
+                self.store[args[1]] = (args[2], time.monotonic() + ttl)
+                self.wfile.write(b"+OK\r\n")
+            elif command == b"DEL":
+                removed = sum(self.store.pop(key, None) is not None for key in args[1:])
+                self.wfile.write(b":%d\r\n" % removed)
+            elif command == b"SCAN":
+                prefix = args[3].rstrip(b"*")
+                keys = [key for key in self.store if key.startswith(prefix)]
+                self.wfile.write(b"*2\r\n$1\r\n0\r\n*%d\r\n" % len(keys))
+                for key in keys:
+                    self.wfile.write(b"$%d\r\n%s\r\n" % (len(key), key))
+            elif command == b"DBSIZE":
+                self.wfile.write(b":%d\r\n" % len(self.store))
+            else:
+                self.wfile.write(b"-ERR unknown command\r\n")
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        RespStandIn.store = {}
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), RespStandIn)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def backends(self):
+        host, port = self.server.server_address
+        return [MemoryCache(max_entries=2, ttl=60), RespCache(f"redis://{host}:{port}/0", ttl=60)]
+
+    def test_get_or_set_hits_after_first_call(self):
+        for backend in self.backends():
+            cache = ResponseCache(backend)
+            calls = []
+            compute = lambda: calls.append(1) or {"id": 1, "title": "Food"}
+
+            self.assertEqual(cache.get_or_set("request:1", compute), {"id": 1, "title": "Food"})
+            self.assertEqual(cache.get_or_set("request:1", compute), {"id": 1, "title": "Food"})
+            self.assertEqual(len(calls), 1) # Second read served from the cache
+            self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_delete_invalidates(self):
+        for backend in self.backends():
+            cache = ResponseCache(backend)
+            cache.get_or_set("pin_requests:7", lambda: [1])
+            cache.delete("pin_requests:7")
+            self.assertEqual(cache.get_or_set("pin_requests:7", lambda: [2]), [2]) # Recomputed after eviction
+
+    def test_delete_prefix_invalidates_every_matching_key(self):
+        for backend in self.backends():
+            cache = ResponseCache(backend)
+            cache.get_or_set("request:1", lambda: {"id": 1})
+            cache.get_or_set("categories", lambda: [1])
+            cache.delete_prefix("request:")
+            self.assertEqual(cache.get_or_set("request:1", lambda: {"id": 2}), {"id": 2}) # Recomputed
+            self.assertEqual(cache.get_or_set("categories", lambda: [2]), [1]) # Other keys kept
+
+    def test_error_strings_are_not_cached(self):
+        for backend in self.backends():
+            cache = ResponseCache(backend)
+            cache.get_or_set("request:2", lambda: "Request with ID 2 not found")
+            self.assertEqual(cache.get_or_set("request:2", lambda: {"id": 2}), {"id": 2})
+
+    def test_memory_lru_and_ttl(self):
+        backend = MemoryCache(max_entries=2, ttl=60)
+        backend.set("a", 1)
+        backend.set("b", 2)
+        backend.get("a") # a is now most recently used
+        backend.set("c", 3)
+        self.assertIsNone(backend.get("b")) # Least recently used entry evicted
+        self.assertEqual(backend.stats()["evictions"], 1)
+
+        backend.set("d", 4, ttl=-1)
+        self.assertIsNone(backend.get("d")) # Expired entries are never returned
+
+    def test_resp_backend_unavailable_falls_through(self):
+        cache = ResponseCache(RespCache("redis://127.0.0.1:1/0", ttl=60))
+        self.assertEqual(cache.get_or_set("request:3", lambda: {"id": 3}), {"id": 3})
+        self.assertEqual(cache.stats()["errors"], 1)
+
+class TestHyperLogLog(unittest.TestCase):
+    def test_estimate_within_error(self):
+        sketch = HyperLogLog()
+        for i in range(5000):
+            sketch.add(f"user:{i}")
+            sketch.add(f"user:{i}") # Repeat views do not count twice
+        self.assertLess(abs(sketch.count() - 5000) / 5000, 0.2) # ~6.5% standard error at 256 registers
+        self.assertEqual(len(sketch.to_bytes()), 256)
+
+    def test_small_sets_are_exact_enough(self):
+        sketch = HyperLogLog()
+        for viewer in ("user:1", "user:2", "ip:10.0.0.1"):
+            sketch.add(viewer)
+        self.assertEqual(sketch.count(), 3)
+
+    def test_merge_is_union(self):
+        monday, tuesday = HyperLogLog(), HyperLogLog()
+        for i in range(1000):
+            monday.add(f"user:{i}")
+        for i in range(500, 1500):
+            tuesday.add(f"user:{i}")
+        week = merge_sketches([monday.to_bytes(), tuesday.to_bytes()]) # Stored bytes merge the same way
+        self.assertLess(abs(week.count() - 1500) / 1500, 0.2)
+
+class TestTrendingScore(unittest.TestCase):
+    def stored(self, weight, at):
+        # What trend_point() stores in SQL for one event
+        return math.log(weight) + TREND_RATE * (at - TREND_EPOCH).total_seconds()
+
+    def test_score_halves_every_half_life(self):
+        at = datetime(2026, 3, 1, tzinfo=timezone.utc)
+        score = self.stored(4, at)
+        self.assertAlmostEqual(decayed_score(score, at), 4)
+        self.assertAlmostEqual(decayed_score(score, at + timedelta(hours=TREND_HALF_LIFE_HOURS)), 2)
+
+    def test_recent_activity_outranks_old_activity(self):
+        now = datetime(2026, 3, 10, tzinfo=timezone.utc)
+        old = math.log(sum(math.exp(self.stored(1, now - timedelta(days=3))) for _ in range(10)))
+        fresh = self.stored(5, now - timedelta(hours=1)) # One shortlist an hour ago
+        self.assertGreater(fresh, old) # Stored scores compare the same way as decayed ones
+        self.assertEqual(decayed_score(None), 0.0) # Never scored
+
+class TestTDigest(unittest.TestCase):
+    def test_percentiles_close_to_exact(self):
+        values = [(i * 7919 % 10007) / 100 for i in range(10007)] # 0..100 days, shuffled
+        digest = TDigest()
+        for v in values:
+            digest.add(v)
+        exact = sorted(values)
+        for q in (0.5, 0.9, 0.99):
+            self.assertLess(abs(digest.quantile(q) - exact[int(q * len(exact))]), 0.5)
+
+    def test_merged_daily_digests_match_one_digest(self):
+        days = [TDigest() for _ in range(30)]
+        for i in range(6000):
+            days[i % 30].add((i % 97) * 0.25)
+        month = merge_digests([d.to_bytes() for d in days]) # Stored bytes merge the same way
+        self.assertEqual(month.count, 6000)
+        self.assertLess(abs(month.quantile(0.5) - 12), 0.5)
+        self.assertLess(len(month.to_bytes()), 2048)
+
+    def test_small_and_empty(self):
+        digest = TDigest()
+        self.assertIsNone(digest.quantile(0.5))
+        for v in (1, 2, 3):
+            digest.add(v)
+        self.assertEqual((digest.quantile(0), digest.quantile(0.5), digest.quantile(1)), (1, 2, 3))
+
+class TestViewCountBuffer(unittest.TestCase):
+    def test_counts_per_request_and_day(self):
+        buffer, today = ViewCountBuffer(), datetime(2026, 3, 1, tzinfo=timezone.utc).date()
+        for request_id in (1, 1, 2, 1):
+            buffer.add(request_id, today)
+        buffer.add(1, today + timedelta(days=1))
+        self.assertEqual(buffer.drain(), {(1, today): 3, (2, today): 1, (1, today + timedelta(days=1)): 1})
+        self.assertEqual(buffer.drain(), {})
+
+    def test_failed_batch_is_added_back(self):
+        buffer, today = ViewCountBuffer(), datetime(2026, 3, 1, tzinfo=timezone.utc).date()
+        buffer.add(7, today)
+        failed = buffer.drain()
+        buffer.add(7, today) # A view arriving while the write failed
+        buffer.restore(failed)
+        self.assertEqual(buffer.drain(), {(7, today): 2})
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -0,0 +1,66 @@
+"""
+Background job worker. Run next to uvicorn (one or more processes):
+
+    uvicorn main:app
+    py worker.py
+
+Jobs are claimed from the `jobs` table with FOR UPDATE SKIP LOCKED, so any
+number of workers can run at once without a message broker.
+"""
+import argparse
+import os
+import socket
+import time
+import traceback
+from app.entity.job_entity import JobEntity
+from app.utils.job_handlers import JOB_HANDLERS
+
+
+def run_job(entity: JobEntity, job: dict):
+    handler = JOB_HANDLERS.get(job["job_type"])
+    if not handler:
+        entity.fail_job(job["id"], job["locked_by"], f"Unknown job type '{job['job_type']}'")
+        return
+
+    try:
+        result, result_path = handler(job, lambda pct: entity.update_progress(job["id"], job["locked_by"], pct))
+
+        # Entities report failures as str (or {"error": ...} for reports)
+        if isinstance(result, str):
+            raise RuntimeError(result)
+        if isinstance(result, dict) and "error" in result:
+            raise RuntimeError(result["error"])
+
+        if entity.complete_job(job["id"], job["locked_by"], result, result_path):
+            print(f"✅ Job {job['id']} ({job['job_type']}) succeeded")
+        else:
+            print(f"⚠️ Job {job['id']} ({job['job_type']}) finished after it was reclaimed, result dropped")
+    except Exception as e:
+        traceback.print_exc()
+        entity.fail_job(job["id"], job["locked_by"], str(e))
+        print(f"❌ Job {job['id']} ({job['job_type']}) failed on attempt {job['attempts']}: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run background jobs")
+    parser.add_argument("--poll", type=float, default=1.0, help="seconds to wait when the queue is empty")
+    parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    args = parser.parse_args()
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    entity = JobEntity()
+    print(f"⚙️ Worker {worker_id} started")
+
+    while True:
+        job = entity.claim_job(worker_id)
+        if job:
+            run_job(entity, job)
+            continue
+
+        if args.once:
+            break
+        time.sleep(args.poll)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 "use client"
 
-import { useEffect, useState, useMemo } from "react"
+import { useEffect, useState } from "react"
 import {
   Card,
   CardHeader,
@@ -41,8 +41,42 @@ type CSRItem = {
   email_address?: string | null
 }
 
+type Facets = {
+  total: number
+  status: Record<string, number>
+  categories: Record<string, number>
+}
+
+const PAGE_SIZE = 100
+
+// 🟩 Page controls for one status, page count from the facet counts
+function Pager({ page, count, onPage, disabled }: {
+  page: number
+  count: number
+  onPage: (page: number) => void
+  disabled?: boolean
+}) {
+  const pages = Math.max(1, Math.ceil(count / PAGE_SIZE))
+  if (pages <= 1 && page <= 1) return null
+  return (
+    <div className="flex items-center justify-end gap-2 mt-4">
+      <Button variant="outline" size="sm" onClick={() => onPage(page - 1)} disabled={disabled || page <= 1}>
+        Previous
+      </Button>
+      <span className="text-sm text-gray-600">Page {page} of {pages}</span>
+      <Button variant="outline" size="sm" onClick={() => onPage(page + 1)} disabled={disabled || page >= pages}>
+        Next
+      </Button>
+    </div>
+  )
+}
+
 export default function AssignmentPage() {
-  const [requests, setRequests] = useState<RequestItem[]>([])
+  const [pendingRequests, setPendingRequests] = useState<RequestItem[]>([])
+  const [assignedRequests, setAssignedRequests] = useState<RequestItem[]>([])
+  const [pendingPage, setPendingPage] = useState(1)
+  const [assignedPage, setAssignedPage] = useState(1)
+  const [facets, setFacets] = useState<Facets | null>(null)
   const [loading, setLoading] = useState(false)
   const [error, setError] = useState<string | null>(null)
 
@@ -51,17 +85,31 @@ export default function AssignmentPage() {
   const [csrOptions, setCsrOptions] = useState<CSRItem[]>([])
   const [saving, setSaving] = useState(false)
 
-  // 🟩 Fetch all requests (pending, assigned, completed)
+  // 🟩 Fetch counts plus the current page of pending and assigned requests
   const fetchRequests = async () => {
     setLoading(true)
     setError(null)
     try {
-      const res = await fetch(`${API_BASE}/api/show-all-requests`, {
-        headers: { Accept: "application/json" },
-      })
-      if (!res.ok) throw new Error(`HTTP ${res.status}`)
-      const data = (await res.json()) as RequestItem[]
-      setRequests(data)
+      const getJson = async (path: string) => {
+        const res = await fetch(`${API_BASE}/api/${path}`, {
+          headers: { Accept: "application/json" },
+        })
+        if (!res.ok) throw new Error(`HTTP ${res.status}`)
+        return res.json()
+      }
+      const [facetData, pending, assigned] = await Promise.all([
+        getJson("requests/facets"),
+        getJson(`show-all-requests?status=pending&page=${pendingPage}&page_size=${PAGE_SIZE}`),
+        getJson(`show-all-requests?status=assigned&page=${assignedPage}&page_size=${PAGE_SIZE}`),
+      ])
+      const counts = facetData as Facets
+      // A page emptied by assignments or completions moves back to the new last page
+      const lastPage = (count?: number) => Math.max(1, Math.ceil((count ?? 0) / PAGE_SIZE))
+      if (pendingPage > lastPage(counts.status.pending)) setPendingPage(lastPage(counts.status.pending))
+      if (assignedPage > lastPage(counts.status.assigned)) setAssignedPage(lastPage(counts.status.assigned))
+      setFacets(counts)
+      setPendingRequests(pending as RequestItem[])
+      setAssignedRequests(assigned as RequestItem[])
     } catch (e: any) {
       setError(e?.message || "Failed to fetch requests")
     } finally {
@@ -71,11 +119,7 @@ export default function AssignmentPage() {
 
   useEffect(() => {
     fetchRequests()
-  }, [])
-
-  // 🟦 Derived lists
-  const pendingRequests = useMemo(() => requests.filter(r => r.status === "pending"), [requests])
-  const assignedRequests = useMemo(() => requests.filter(r => r.status === "assigned"), [requests])
+  }, [pendingPage, assignedPage])
 
   // 🟩 Open assign modal and fetch shortlistees
   const handleOpenAssign = async (req: RequestItem) => {
@@ -160,7 +204,9 @@ export default function AssignmentPage() {
 
       {/* 🟡 Pending Requests */}
       <section>
-        <h2 className="text-xl font-semibold mb-4 text-gray-800">Pending Requests</h2>
+        <h2 className="text-xl font-semibold mb-4 text-gray-800">
+          Pending Requests{facets ? ` (${facets.status.pending ?? 0})` : ""}
+        </h2>
         {pendingRequests.length === 0 ? (
           <p className="text-sm text-gray-500">No pending requests.</p>
         ) : (
@@ -192,11 +238,19 @@ export default function AssignmentPage() {
             ))}
           </div>
         )}
+        <Pager
+          page={pendingPage}
+          count={facets?.status.pending ?? 0}
+          onPage={setPendingPage}
+          disabled={loading}
+        />
       </section>
 
       {/* 🔵 Assigned Requests */}
       <section>
-        <h2 className="text-xl font-semibold mb-4 text-gray-800">Assigned Requests</h2>
+        <h2 className="text-xl font-semibold mb-4 text-gray-800">
+          Assigned Requests{facets ? ` (${facets.status.assigned ?? 0})` : ""}
+        </h2>
         {assignedRequests.length === 0 ? (
           <p className="text-sm text-gray-500">No assigned requests.</p>
         ) : (
@@ -233,6 +287,12 @@ export default function AssignmentPage() {
             ))}
           </div>
         )}
+        <Pager
+          page={assignedPage}
+          count={facets?.status.assigned ?? 0}
+          onPage={setAssignedPage}
+          disabled={loading}
+        />
       </section>
 
       {/* 🟩 Assign Dialog */}